@@ -27,6 +27,9 @@ IOBLK_SIZE = getattr(__config__, 'ao2mo_outcore_ioblk_size', 256)  # 256 MB
 IOBUF_WORDS = getattr(__config__, 'ao2mo_outcore_iobuf_words', 1e8)  # 800 MB
 IOBUF_ROW_MIN = getattr(__config__, 'ao2mo_outcore_row_min', 160)
 MAX_MEMORY = getattr(__config__, 'ao2mo_outcore_max_memory', 2000)  # 2GB
+# Keep the half-transformed integrals in memory (HDF5 core driver, no swap
+# file) if they take less than this fraction of max_memory.  0 to disable.
+SWAP_INCORE_RATIO = getattr(__config__, 'ao2mo_outcore_swap_incore_ratio', .5)
 
 
 def full(mol, mo_coeff, erifile, dataname='eri_mo',
@@ -153,7 +156,14 @@ def general(mol, mo_coeffs, erifile, dataname='eri_mo',
             Components of the integrals, e.g. int2e_ip_sph has 3 components.
         max_memory : float or int
             The maximum size of cache to use (in MB), large cache may **not**
-            improve performance.
+            improve performance.  The half-transformed integrals are kept in
+            memory if they take less than SWAP_INCORE_RATIO of max_memory.
+            Otherwise, e.g. the full transformation of 150 or more orbitals
+            with the default max_memory, they are written to a temporary swap
+            file and the I/O saving does not apply.  For such large systems,
+            the disk I/O is only overlapped with the computation within each
+            pass (asynchronous writes in step 1, prefetch and asynchronous
+            writes in step 2).
         ioblk_size : float or int
             The block size for IO, large block size may **not** improve performance
         verbose : int
@@ -265,7 +275,14 @@ def general(mol, mo_coeffs, erifile, dataname='eri_mo',
               float(nij_pair)*nkl_pair*comp, nij_pair*nkl_pair*comp*8/1e6)
 
 # transform e1
-    fswap = lib.H5TmpFile()
+    swap_size = comp * nij_pair * nao_pair * 8/1e6
+    if swap_size < max_memory * SWAP_INCORE_RATIO:
+        log.debug('half-transformed integrals (%.8g MB) are held in memory',
+                  swap_size)
+        fswap = lib.H5TmpFile(mode='w', driver='core', backing_store=False)
+        max_memory = max_memory - swap_size
+    else:
+        fswap = lib.H5TmpFile()
     half_e1(mol, mo_coeffs, fswap, intor, aosym, comp, max_memory, ioblk_size,
             log, compact)
 
@@ -68,6 +68,21 @@ class KnownValues(unittest.TestCase):
         feri.close()
         self.assertTrue(numpy.allclose(eri1, eriref))
 
+    def test_nroutcore_swap_incore(self):
+        ftmp = tempfile.NamedTemporaryFile(dir=lib.param.TMPDIR)
+        erifile = ftmp.name
+        mos = (mo[:,:6], mo[:,:5], mo, mo[:,:4])
+        ao2mo.outcore.general(mol, mos, erifile, dataname='incore',
+                              max_memory=100, ioblk_size=5, compact=False)
+        with lib.temporary_env(ao2mo.outcore, SWAP_INCORE_RATIO=0):
+            ao2mo.outcore.general(mol, mos, erifile, dataname='outcore',
+                                  max_memory=100, ioblk_size=5, compact=False)
+        eriref = ao2mo.incore.general(mol.intor('int2e', aosym='s8'), mos,
+                                      compact=False)
+        with h5py.File(erifile, 'r') as feri:
+            self.assertAlmostEqual(abs(feri['incore'][()]-eriref).max(), 0, 9)
+            self.assertAlmostEqual(abs(feri['outcore'][()]-eriref).max(), 0, 9)
+
     def test_nroutcore_eri(self):
         ftmp = tempfile.NamedTemporaryFile(dir=lib.param.TMPDIR)
         erifile = ftmp.name
@@ -37,6 +37,11 @@ from pyscf import __config__
 
 BLKMIN = getattr(__config__, 'cc_ccsd_blkmin', 4)
 MEMORYMIN = getattr(__config__, 'cc_ccsd_memorymin', 2000)
+# Machine parameters for the cost model of plan_eris: FLOPS, disk bandwidth
+# (MB/s) and the number of AO integrals evaluated per second
+PLAN_ERIS_FLOPS = getattr(__config__, 'cc_ccsd_plan_eris_flops', 5e9)
+PLAN_ERIS_IO_BANDWIDTH = getattr(__config__, 'cc_ccsd_plan_eris_io_bandwidth', 200)
+PLAN_ERIS_INT2E_RATE = getattr(__config__, 'cc_ccsd_plan_eris_int2e_rate', 2e7)
 
 
 # t1: ia
@@ -82,6 +87,9 @@ def kernel(mycc, eris=None, t1=None, t2=None, max_cycle=50, tol=1e-8,
         eold, eccsd = eccsd, mycc.energy(t1, t2, eris)
         log.info('cycle = %d  E(CCSD) = %.15g  dE = %.9g  norm(t1,t2) = %.6g',
                  istep+1, eccsd, eccsd - eold, normt)
+        if getattr(eris, 'predicted_time', None) is not None:
+            log.debug('CCSD iter predicted wall time %.2f sec, actual %.2f sec',
+                      eris.predicted_time, time.time() - cput1[1])
         cput1 = log.timer('CCSD iter', *cput1)
         if abs(eccsd-eold) < tol and normt < tolnormt:
             conv = True
@@ -874,6 +882,7 @@ class CCSD(lib.StreamObject):
     async_io = getattr(__config__, 'cc_ccsd_CCSD_async_io', True)
     incore_complete = getattr(__config__, 'cc_ccsd_CCSD_incore_complete', False)
     cc2 = getattr(__config__, 'cc_ccsd_CCSD_cc2', False)
+    plan_eris_layout = getattr(__config__, 'cc_ccsd_CCSD_plan_eris_layout', False)
 
     def __init__(self, mf, frozen=0, mo_coeff=None, mo_occ=None):
         from pyscf import gto
@@ -923,7 +932,7 @@ http://sunqm.net/pyscf/code-rule.html#api-rules for the details of API conventio
         keys = set(('max_cycle', 'conv_tol', 'iterative_damping',
                     'conv_tol_normt', 'diis', 'diis_space', 'diis_file',
                     'diis_start_cycle', 'diis_start_energy_diff', 'direct',
-                    'async_io', 'incore_complete', 'cc2'))
+                    'async_io', 'incore_complete', 'cc2', 'plan_eris_layout'))
         self._keys = set(self.__dict__.keys()).union(keys)
 
     @property
@@ -962,6 +971,7 @@ http://sunqm.net/pyscf/code-rule.html#api-rules for the details of API conventio
             log.info('frozen orbitals %s', self.frozen)
         log.info('max_cycle = %d', self.max_cycle)
         log.info('direct = %d', self.direct)
+        log.info('plan_eris_layout = %s', self.plan_eris_layout)
         log.info('conv_tol = %g', self.conv_tol)
         log.info('conv_tol_normt = %s', self.conv_tol_normt)
         log.info('diis_space = %d', self.diis_space)
@@ -1053,12 +1063,12 @@ http://sunqm.net/pyscf/code-rule.html#api-rules for the details of API conventio
                                    verbose=self.verbose)
         return self.l1, self.l2
 
-    def ccsd_t(self, t1=None, t2=None, eris=None):
+    def ccsd_t(self, t1=None, t2=None, eris=None, chkfile=None):
         from pyscf.cc import ccsd_t
         if t1 is None: t1 = self.t1
         if t2 is None: t2 = self.t2
         if eris is None: eris = self.ao2mo(self.mo_coeff)
-        return ccsd_t.kernel(self, eris, t1, t2, self.verbose)
+        return ccsd_t.kernel(self, eris, t1, t2, self.verbose, chkfile=chkfile)
 
     def ipccsd(self, nroots=1, left=False, koopmans=False, guess=None,
                partition=None, eris=None):
@@ -1143,25 +1153,39 @@ http://sunqm.net/pyscf/code-rule.html#api-rules for the details of API conventio
         # eris.fock = numpy.diag(self._scf.mo_energy)
         # return eris
 
-        nmo = self.nmo
-        nao = self.mo_coeff.shape[0]
-        nmo_pair = nmo * (nmo+1) // 2
-        nao_pair = nao * (nao+1) // 2
-        mem_incore = (max(nao_pair**2, nmo**4) + nmo_pair**2) * 8/1e6
-        mem_now = lib.current_memory()[0]
-        if (self._scf._eri is not None and
-            (mem_incore+mem_now < self.max_memory or self.incore_complete)):
-            return _make_eris_incore(self, mo_coeff)
+        if self.plan_eris_layout:
+            layout, costs = plan_eris(self)
+        else:
+            nmo = self.nmo
+            nao = self.mo_coeff.shape[0]
+            nmo_pair = nmo * (nmo+1) // 2
+            nao_pair = nao * (nao+1) // 2
+            mem_incore = (max(nao_pair**2, nmo**4) + nmo_pair**2) * 8/1e6
+            mem_now = lib.current_memory()[0]
+            if (self._scf._eri is not None and
+                (mem_incore+mem_now < self.max_memory or self.incore_complete)):
+                layout = 'incore'
+            elif getattr(self._scf, 'with_df', None):
+                layout = 'df'
+            else:
+                layout = 'outcore'
+            costs = None
 
-        elif getattr(self._scf, 'with_df', None):
+        if layout == 'incore':
+            eris = _make_eris_incore(self, mo_coeff)
+        elif layout == 'df':
             logger.warn(self, 'CCSD detected DF being used in the HF object. '
                         'MO integrals are computed based on the DF 3-index tensors.\n'
                         'It\'s recommended to use dfccsd.CCSD for the '
                         'DF-CCSD calculations')
-            return _make_df_eris_outcore(self, mo_coeff)
-
+            eris = _make_df_eris_outcore(self, mo_coeff)
         else:
-            return _make_eris_outcore(self, mo_coeff)
+            # vvvv is not generated if self.direct is set
+            eris = _make_eris_outcore(self, mo_coeff)
+        eris.layout = layout
+        if costs is not None:
+            eris.predicted_time = costs[layout][2]
+        return eris
 
     def run_diis(self, t1, t2, istep, normt, de, adiis):
         if (adiis and
@@ -1499,6 +1523,89 @@ def _make_df_eris_outcore(mycc, mo_coeff=None):
     log.timer('CCSD integral transformation', *cput0)
     return eris
 
+def plan_eris(mycc, verbose=None):
+    '''Estimate the memory, I/O and time per CCSD iteration for the storage
+    layouts of the MO integrals, and pick the fastest layout which fits in
+    mycc.max_memory.  This function is called by CCSD.ao2mo if
+    mycc.plan_eris_layout is set.
+
+    Layouts:
+        incore : all MO integrals in memory (requires mf._eri)
+        outcore : MO integrals, including vvvv, on disk
+        direct : MO integrals except vvvv on disk.  The vvvv contraction
+            is computed with the AO integrals on the fly.  This layout is
+            used only if mycc.direct is set.
+        df : MO integrals on disk, generated from the DF tensors of mf.with_df
+
+    Returns:
+        layout and a dict {layout: (memory in MB, I/O in MB, time in sec)}
+        which has the estimated costs per iteration of the possible layouts
+    '''
+    log = logger.new_logger(mycc, verbose)
+    nocc = mycc.nocc
+    nmo = mycc.nmo
+    nvir = nmo - nocc
+    nao = mycc.mo_coeff.shape[0]
+    nmo_pair = nmo * (nmo+1) // 2
+    nao_pair = nao * (nao+1) // 2
+    nvir_pair = nvir * (nvir+1) // 2
+    mem_now = lib.current_memory()[0]
+
+    flop_time = _fp(nocc, nvir) / PLAN_ERIS_FLOPS
+    # t1, t2, t2new and the intermediates of the same size
+    mem_amps = nocc**2*nvir**2 * 3 * 8/1e6
+    # ovvv, ovov, oovv, ovvo, ovoo, oooo are loaded in each iteration
+    io_ov = (nocc*nvir*nvir_pair + nocc**2*nvir**2*3 + nocc**3*nvir) * 8/1e6
+    io_vvvv = nvir_pair**2 * 8/1e6
+
+    costs = {}
+    if mycc._scf._eri is not None:
+        mem_incore = (max(nao_pair**2, nmo**4) + nmo_pair**2) * 8/1e6
+        costs['incore'] = (mem_incore + mem_amps, 0, flop_time)
+    if getattr(mycc._scf, 'with_df', None):
+        costs['df'] = (mem_amps, io_ov + io_vvvv,
+                       flop_time + (io_ov + io_vvvv) / PLAN_ERIS_IO_BANDWIDTH)
+    else:
+        costs['outcore'] = (mem_amps, io_ov + io_vvvv,
+                            flop_time + (io_ov + io_vvvv) / PLAN_ERIS_IO_BANDWIDTH)
+        # the AO-direct vvvv contraction holds tau and its result in AO basis
+        costs['direct'] = (mem_amps + nocc**2*nao**2 * 8/1e6, io_ov,
+                           flop_time + io_ov / PLAN_ERIS_IO_BANDWIDTH +
+                           nao_pair**2 * .5 / PLAN_ERIS_INT2E_RATE)
+
+    if mycc.direct:
+        candidates = [k for k in ('incore', 'df', 'direct') if k in costs]
+    else:
+        candidates = [k for k in ('incore', 'df', 'outcore') if k in costs]
+
+    if 'incore' in candidates and mycc.incore_complete:
+        layout = 'incore'
+    else:
+        fits = [k for k in candidates
+                if costs[k][0] + mem_now < mycc.max_memory]
+        if fits:
+            layout = min(fits, key=lambda k: costs[k][2])
+        else:
+            # The integrals on disk require the least memory
+            layout = candidates[-1]
+            log.warn('Not enough memory for the CCSD integral layouts. '
+                     '%s requires %.1f MB (max_memory %d MB, current use %d MB)',
+                     layout, costs[layout][0], mycc.max_memory, mem_now)
+
+    if log.verbose >= logger.INFO:
+        log.info('plan_eris: layout     memory(MB)  I/O(MB)/iter  time(s)/iter')
+        for key in sorted(costs):
+            log.info('plan_eris: %-10s %10.1f %13.1f %12.2f %s', key,
+                     costs[key][0], costs[key][1], costs[key][2],
+                     '*' if key == layout else '')
+        if (not mycc.direct and 'direct' in costs and
+            costs['direct'][2] < costs[layout][2] and
+            costs['direct'][0] + mem_now < mycc.max_memory):
+            log.info('plan_eris: AO-direct vvvv is estimated to be faster. '
+                     'It can be enabled by setting %s.direct = True',
+                     mycc.__class__.__name__)
+    return layout, costs
+
 def _fp(nocc, nvir):
     '''Total float points'''
     return (nocc**3*nvir**2*2 + nocc**2*nvir**3*2 +     # Ftilde
@@ -24,6 +24,7 @@ import gc
 import time
 import ctypes
 import numpy
+import h5py
 from pyscf import lib
 from pyscf import symm
 from pyscf.lib import logger
@@ -32,7 +33,16 @@ from pyscf.cc import _ccsd
 # t3 as ijkabc
 
 # JCP, 94, 442.  Error in Eq (1), should be [ia] >= [jb] >= [kc]
-def kernel(mycc, eris, t1=None, t2=None, verbose=logger.NOTE):
+def kernel(mycc, eris, t1=None, t2=None, verbose=logger.NOTE, chkfile=None):
+    '''CCSD(T) correction
+
+    Kwargs:
+        chkfile : str
+            If given, the energy of each finished tile of the virtual triples
+            is saved in this file.  When the calculation is restarted with
+            the same chkfile (and the same t1, t2 amplitudes), the tiles
+            which have been computed are skipped.
+    '''
     cpu1 = cpu0 = (time.clock(), time.time())
     log = logger.new_logger(mycc, verbose)
     if t1 is None: t1 = mycc.t1
@@ -72,10 +82,10 @@ def kernel(mycc, eris, t1=None, t2=None, verbose=logger.NOTE):
         drv = _ccsd.libcc.CCsd_t_zcontract
     else:
         drv = _ccsd.libcc.CCsd_t_contract
-    et_sum = numpy.zeros(1, dtype=dtype)
-    def contract(a0, a1, b0, b1, cache):
+    def contract(task_id, a0, a1, b0, b1, cache):
         cache_row_a, cache_col_a, cache_row_b, cache_col_b = cache
-        drv(et_sum.ctypes.data_as(ctypes.c_void_p),
+        et = numpy.zeros(1, dtype=dtype)
+        drv(et.ctypes.data_as(ctypes.c_void_p),
             mo_energy.ctypes.data_as(ctypes.c_void_p),
             t1T.ctypes.data_as(ctypes.c_void_p),
             t2T.ctypes.data_as(ctypes.c_void_p),
@@ -93,6 +103,10 @@ def kernel(mycc, eris, t1=None, t2=None, verbose=logger.NOTE):
             cache_col_a.ctypes.data_as(ctypes.c_void_p),
             cache_row_b.ctypes.data_as(ctypes.c_void_p),
             cache_col_b.ctypes.data_as(ctypes.c_void_p))
+        et_tiles[task_id] = et[0]
+        tile_done[task_id] = True
+        if fchk is not None:
+            _dump_tile(fchk, task_id, et[0])
         cpu2[:] = log.timer_debug1('contract %d:%d,%d:%d'%(a0,a1,b0,b1), *cpu2)
 
     # The rest 20% memory for cache b
@@ -103,25 +117,64 @@ def kernel(mycc, eris, t1=None, t2=None, verbose=logger.NOTE):
     bufsize *= .8  #*.8 for [a0:a1]/[b0:b1] partition
     bufsize = max(8, bufsize)
     log.debug('max_memory %d MB (%d MB in use)', max_memory, mem_now)
-    with lib.call_in_background(contract, sync=not mycc.async_io) as async_contract:
-        for a0, a1 in reversed(list(lib.prange_tril(0, nvir, bufsize))):
-            cache_row_a = numpy.asarray(eris_vvop[a0:a1,:a1], order='C')
-            if a0 == 0:
-                cache_col_a = cache_row_a
-            else:
-                cache_col_a = numpy.asarray(eris_vvop[:a0,a0:a1], order='C')
-            async_contract(a0, a1, a0, a1, (cache_row_a,cache_col_a,
-                                            cache_row_a,cache_col_a))
 
+    # The a>=b>=c triples are divided into tiles [a0:a1,b0:b1].  The energy
+    # of each finished tile is saved in chkfile.  The tiles which have been
+    # computed in a previous (interrupted) run are skipped.
+    fingerprint = numpy.array([lib.finger(t1T), lib.finger(t2T)])
+    tasks = None
+    if chkfile:
+        tasks, et_tiles, tile_done = _load_tiles(chkfile, fingerprint)
+        if tasks is not None:
+            log.info('CCSD(T) restarts from %s. %d of %d tiles were computed',
+                     chkfile, tile_done.sum(), len(tasks))
+    if tasks is None:
+        tasks = []
+        for a0, a1 in reversed(list(lib.prange_tril(0, nvir, bufsize))):
+            tasks.append((a0, a1, a0, a1))
             for b0, b1 in lib.prange_tril(0, a0, bufsize/8):
-                cache_row_b = numpy.asarray(eris_vvop[b0:b1,:b1], order='C')
-                if b0 == 0:
-                    cache_col_b = cache_row_b
+                tasks.append((a0, a1, b0, b1))
+        tasks = numpy.asarray(tasks, dtype=int).reshape(-1,4)
+        et_tiles = numpy.zeros(len(tasks), dtype=dtype)
+        tile_done = numpy.zeros(len(tasks), dtype=bool)
+        if chkfile:
+            lib.chkfile.save(chkfile, 'ccsd_t', {'fingerprint': fingerprint,
+                                                 'tasks': tasks,
+                                                 'et_tiles': et_tiles,
+                                                 'tile_done': tile_done})
+    if chkfile:
+        fchk = h5py.File(chkfile, 'r+')
+    else:
+        fchk = None
+
+    def load_cache(p0, p1):
+        cache_row = numpy.asarray(eris_vvop[p0:p1,:p1], order='C')
+        if p0 == 0:
+            cache_col = cache_row
+        else:
+            cache_col = numpy.asarray(eris_vvop[:p0,p0:p1], order='C')
+        return cache_row, cache_col
+
+    try:
+        with lib.call_in_background(contract, sync=not mycc.async_io) as async_contract:
+            a_cached = None
+            for task_id, (a0, a1, b0, b1) in enumerate(tasks):
+                if tile_done[task_id]:
+                    continue
+                if a_cached != (a0, a1):
+                    cache_row_a, cache_col_a = load_cache(a0, a1)
+                    a_cached = (a0, a1)
+                if b0 == a0:
+                    cache_row_b, cache_col_b = cache_row_a, cache_col_a
                 else:
-                    cache_col_b = numpy.asarray(eris_vvop[:b0,b0:b1], order='C')
-                async_contract(a0, a1, b0, b1, (cache_row_a,cache_col_a,
-                                                cache_row_b,cache_col_b))
+                    cache_row_b, cache_col_b = load_cache(b0, b1)
+                async_contract(task_id, a0, a1, b0, b1,
+                               (cache_row_a,cache_col_a, cache_row_b,cache_col_b))
+    finally:
+        if fchk is not None:
+            fchk.close()
 
+    et_sum = et_tiles.sum(keepdims=True)
     t2 = restore_t2_inplace(t2T)
     et_sum *= 2
     if abs(et_sum[0].imag) > 1e-4:
@@ -132,6 +185,25 @@ def kernel(mycc, eris, t1=None, t2=None, verbose=logger.NOTE):
     log.note('CCSD(T) correction = %.15g', et)
     return et
 
+def _dump_tile(fchk, task_id, et):
+    '''Save the energy of a finished tile.  The tile is marked as finished
+    after its energy is written.'''
+    fchk['ccsd_t/et_tiles'][task_id] = et
+    fchk['ccsd_t/tile_done'][task_id] = True
+    fchk.flush()
+
+def _load_tiles(chkfile, fingerprint):
+    '''Load the tiles saved by a previous calculation'''
+    if not h5py.is_hdf5(chkfile):
+        return None, None, None
+    with h5py.File(chkfile, 'r') as f:
+        if 'ccsd_t' not in f:
+            return None, None, None
+        if abs(f['ccsd_t/fingerprint'][()] - fingerprint).max() > 1e-12:
+            return None, None, None
+        return (f['ccsd_t/tasks'][()], f['ccsd_t/et_tiles'][()],
+                f['ccsd_t/tile_done'][()])
+
 def _sort_eri(mycc, eris, nocc, nvir, vvop, log):
     cpu1 = (time.clock(), time.time())
     mol = mycc.mol
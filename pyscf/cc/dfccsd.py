@@ -16,6 +16,7 @@
 import time
 import ctypes
 import numpy
+import scipy.linalg
 from pyscf import lib
 from pyscf.lib import logger
 from pyscf.ao2mo import _ao2mo
@@ -27,6 +28,18 @@ from pyscf import __config__
 MEMORYMIN = getattr(__config__, 'cc_ccsd_memorymin', 2000)
 
 class RCCSD(ccsd.CCSD):
+    '''DF-CCSD
+
+    Attributes:
+        vvvv_lowrank_thresh : float or None
+            If specified, the vvvv integrals are approximated by a low-rank
+            factorization of the DF tensor (see :func:`_compress_vvL`).
+            Eigenvalues of the auxiliary metric smaller than this threshold
+            are discarded.  The error of vvvv (in 2-norm) is bounded by the
+            threshold.  Default is None (no compression).
+    '''
+    vvvv_lowrank_thresh = getattr(__config__, 'cc_dfccsd_RCCSD_vvvv_lowrank_thresh', None)
+
     def __init__(self, mf, frozen=0, mo_coeff=None, mo_occ=None):
         ccsd.CCSD.__init__(self, mf, frozen, mo_coeff, mo_occ)
         if getattr(mf, 'with_df', None):
@@ -34,7 +47,7 @@ class RCCSD(ccsd.CCSD):
         else:
             self.with_df = df.DF(mf.mol)
             self.with_df.auxbasis = df.make_auxbasis(mf.mol, mp2fit=True)
-        self._keys.update(['with_df'])
+        self._keys.update(['with_df', 'vvvv_lowrank_thresh'])
 
     def ao2mo(self, mo_coeff=None):
         return _make_df_eris(self, mo_coeff)
@@ -43,6 +56,10 @@ class RCCSD(ccsd.CCSD):
         assert(not self.direct)
         return ccsd.CCSD._add_vvvv(self, t1, t2, eris, out, with_ovvv, t2sym)
 
+    def nuc_grad_method(self):
+        from pyscf.df.grad import ccsd
+        return ccsd.Gradients(self)
+
 
 def _contract_vvvv_t2(mycc, mol, vvL, t2, out=None, verbose=None):
     '''Ht2 = numpy.einsum('ijcd,acdb->ijab', t2, vvvv)
@@ -113,7 +130,27 @@ def _contract_vvvv_t2(mycc, mol, vvL, t2, out=None, verbose=None):
 class _ChemistsERIs(ccsd._ChemistsERIs):
     def _contract_vvvv_t2(self, mycc, t2, direct=False, out=None, verbose=None):
         assert(not direct)
-        return _contract_vvvv_t2(mycc, self.mol, self.vvL, t2, out, verbose)
+        vvL = getattr(self, 'vvL_lowrank', None)
+        if vvL is None:
+            vvL = self.vvL
+        return _contract_vvvv_t2(mycc, self.mol, vvL, t2, out, verbose)
+
+def _compress_vvL(vvL, thresh, max_memory=MEMORYMIN):
+    '''Low-rank factorization of the vvvv integrals vvvv = vvL.vvL^T ~= X.X^T
+    with X = vvL.U
+
+    The eigenvectors U of the auxiliary metric M = vvL^T.vvL with eigenvalues
+    larger than thresh are returned.  The 2-norm of the error of vvvv is the
+    largest discarded eigenvalue.
+    '''
+    nvir_pair, naux = vvL.shape
+    blksize = int(max(ccsd.BLKMIN, max_memory*.5e6/8/naux))
+    metric = numpy.zeros((naux,naux))
+    for p0, p1 in lib.prange(0, nvir_pair, blksize):
+        v = _cp(vvL[p0:p1])
+        metric += lib.dot(v.T, v)
+    e, u = scipy.linalg.eigh(metric)
+    return u[:,e > thresh]
 
 def _make_df_eris(cc, mo_coeff=None):
     cput0 = (time.clock(), time.time())
@@ -153,6 +190,18 @@ def _make_df_eris(cc, mo_coeff=None):
         Lvv = lib.pack_tril(Lpq[:,nocc:,nocc:])
         eris.vvL[:,p0:p1] = Lvv.T
     Lpq = Lvv = None
+
+    if cc.vvvv_lowrank_thresh is not None:
+        max_memory = max(MEMORYMIN, cc.max_memory - lib.current_memory()[0])
+        u = _compress_vvL(eris.vvL, cc.vvvv_lowrank_thresh, max_memory)
+        rank = u.shape[1]
+        logger.info(cc, 'Low-rank vvvv: rank %d (naux = %d)', rank, naux)
+        eris.vvL_lowrank = eris.feri.create_dataset('vvL_lowrank', (nvir_pair,rank), 'f8')
+        blksize = int(max(ccsd.BLKMIN, max_memory*.5e6/8/naux))
+        for p0, p1 in lib.prange(0, nvir_pair, blksize):
+            eris.vvL_lowrank[p0:p1] = lib.dot(_cp(eris.vvL[p0:p1]), u)
+        u = None
+
     Loo = Loo.reshape(naux,nocc**2)
     Lvo = Lov.transpose(0,2,1).reshape(naux,nvir*nocc)
     Lov = Lov.reshape(naux,nocc*nvir)
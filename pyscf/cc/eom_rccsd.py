@@ -798,23 +798,11 @@ def eaccsd_star_contract(eom, eaccsd_evals, eaccsd_evecs, leaccsd_evecs, imds=No
         out = out + tmp
         return out
 
-    def _get_vvvv(eris):
-        if eris.vvvv is None and getattr(eris, 'vvL', None) is not None:  # DF eris
-            vvL = np.asarray(eris.vvL)
-            nvir = int(np.sqrt(eris.vvL.shape[0]*2))
-            return ao2mo.restore(1, lib.dot(vvL, vvL.T), nvir)
-        elif len(eris.vvvv.shape) == 2:  # DO not use .ndim here for h5py library
-                                         # backward compatbility
-            nvir = int(np.sqrt(eris.vvvv.shape[0]*2))
-            return ao2mo.restore(1, np.asarray(eris.vvvv), nvir)
-        else:
-            return eris.vvvv
-
     def contract_r2p(r1, r2, i0, i1, j0, j1, cache_ovvv_i, cache_ovvv_j, out=None):
         '''Create perturbed r2.'''
         if out is None:
             out = np.zeros((i1-i0,j1-j0) + (nvir,)*3, dtype=dtype)
-        tmp = np.einsum('becf,f->bce', _get_vvvv(eris), r1)
+        tmp = np.einsum('becf,f->bce', imd._get_vvvv(eris), r1)
         out += -lib.einsum('bce,ijae->ijabc', tmp, t2[i0:i1,j0:j1])
         tmp = np.einsum('mjce,e->mcj', eris.oovv[:,j0:j1], r1)
         out += lib.einsum('mcj,imab->ijabc', tmp, t2[i0:i1])
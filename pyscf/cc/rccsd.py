@@ -227,11 +227,11 @@ class RCCSD(ccsd.CCSD):
                                     verbose=self.verbose)
         return self.l1, self.l2
 
-    def ccsd_t(self, t1=None, t2=None, eris=None):
+    def ccsd_t(self, t1=None, t2=None, eris=None, chkfile=None):
 #?        # Note
 #?        assert(t1.dtype == np.double)
 #?        assert(t2.dtype == np.double)
-        return ccsd.CCSD.ccsd_t(self, t1, t2, eris)
+        return ccsd.CCSD.ccsd_t(self, t1, t2, eris, chkfile)
 
     def density_fit(self, auxbasis=None, with_df=None):
         raise NotImplementedError
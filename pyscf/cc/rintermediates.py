@@ -227,7 +227,11 @@ def Wovoo(t1, t2, eris):
 
 def _get_vvvv(eris):
     if eris.vvvv is None and getattr(eris, 'vvL', None) is not None:  # DF eris
-        vvL = np.asarray(eris.vvL)
+        # Use the low-rank factor of DF-CCSD (vvvv_lowrank_thresh) if available
+        vvL = getattr(eris, 'vvL_lowrank', None)
+        if vvL is None:
+            vvL = eris.vvL
+        vvL = np.asarray(vvL)
         nvir = int(np.sqrt(eris.vvL.shape[0]*2))
         return ao2mo.restore(1, lib.dot(vvL, vvL.T), nvir)
     elif len(eris.vvvv.shape) == 2:  # DO not use .ndim here for h5py library
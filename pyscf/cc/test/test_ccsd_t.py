@@ -14,7 +14,9 @@
 # limitations under the License.
 
 import unittest
+import tempfile
 import numpy
+import h5py
 from functools import reduce
 
 from pyscf import gto, scf, lib, symm
@@ -77,6 +79,19 @@ class KnownValues(unittest.TestCase):
         e = ccsd_t.kernel(mycc, eris, t1, t2)
         self.assertAlmostEqual(e, -45.96028705175308, 9)
 
+        # restart from the tiles of an interrupted calculation
+        ftmp = tempfile.NamedTemporaryFile(dir=lib.param.TMPDIR)
+        e = mycc.ccsd_t(t1, t2, eris, chkfile=ftmp.name)
+        self.assertAlmostEqual(e, -45.96028705175308, 9)
+        with h5py.File(ftmp.name, 'r+') as f:
+            self.assertTrue(len(f['ccsd_t/tasks']) > 1)
+            self.assertTrue(f['ccsd_t/tile_done'][()].all())
+            f['ccsd_t/tile_done'][1:] = False
+            f['ccsd_t/et_tiles'][1:] = 0
+        e = ccsd_t.kernel(mycc, eris, t1, t2, chkfile=ftmp.name)
+        self.assertAlmostEqual(e, -45.96028705175308, 9)
+        ftmp.close()
+
     def test_ccsd_t_symm(self):
         e3a = ccsd_t.kernel(mcc, mcc.ao2mo())
         self.assertAlmostEqual(e3a, -0.003060022611584471, 9)
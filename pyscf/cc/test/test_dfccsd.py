@@ -85,6 +85,18 @@ class KnownValues(unittest.TestCase):
         self.assertAlmostEqual(lib.finger(numpy.array(eris.ovvv)), 59.418747028576142, 12)
         self.assertAlmostEqual(lib.finger(numpy.array(eris.vvvv)), 43.562457227975969, 12)
 
+    def test_vvvv_lowrank(self):
+        mycc2 = dfccsd.RCCSD(mf)
+        mycc2.vvvv_lowrank_thresh = 1e-4
+        eris = mycc2.ao2mo()
+        self.assertTrue(eris.vvL_lowrank.shape[1] < eris.vvL.shape[1])
+        mycc2.kernel(eris=eris)
+        self.assertAlmostEqual(mycc2.e_corr, cc1.e_corr, 6)
+
+        e = mycc2.eaccsd(nroots=3)[0]
+        self.assertAlmostEqual(e[0], 0.1903885587959659, 4)
+        self.assertAlmostEqual(e[1], 0.2833972143749155, 4)
+        self.assertAlmostEqual(e[2], 0.5222497886685452, 4)
 
     def test_df_ipccsd(self):
         e,v = mycc.ipccsd(nroots=1)
@@ -73,6 +73,32 @@ class KnownValues(unittest.TestCase):
         self.assertAlmostEqual(mcc.ecc, -0.2133432312951, 8)
         self.assertAlmostEqual(abs(mcc.t2).sum(), 5.63970279799556984, 6)
 
+    def test_plan_eris(self):
+        mcc = cc.ccsd.CC(mf)
+        layout, costs = ccsd.plan_eris(mcc)
+        self.assertEqual(layout, 'incore')
+        self.assertEqual(sorted(costs.keys()), ['direct', 'incore', 'outcore'])
+        self.assertEqual(mcc.ao2mo().layout, 'incore')
+        mcc.max_memory = 1
+        self.assertEqual(ccsd.plan_eris(mcc)[0], 'outcore')
+        with lib.temporary_env(ccsd, PLAN_ERIS_IO_BANDWIDTH=1e-3):
+            self.assertEqual(ccsd.plan_eris(mcc)[0], 'outcore')
+            mcc.direct = True
+            mcc.plan_eris_layout = True
+            self.assertEqual(ccsd.plan_eris(mcc)[0], 'direct')
+            eris = mcc.ao2mo()
+            self.assertEqual(eris.layout, 'direct')
+            self.assertTrue(eris.vvvv is None)
+
+        mcc = cc.ccsd.CC(mf)
+        mcc.plan_eris_layout = True
+        mcc.max_memory = 1
+        with lib.temporary_env(ccsd, PLAN_ERIS_IO_BANDWIDTH=1e-3):
+            eris = mcc.ao2mo()
+        self.assertFalse(mcc.direct)
+        self.assertEqual(eris.layout, 'outcore')
+        self.assertTrue(eris.vvvv is not None)
+
     def test_ccsd_frozen(self):
         mcc = cc.ccsd.CC(mf, frozen=range(1))
         mcc.conv_tol = 1e-10
@@ -20,8 +20,10 @@
 J-metric density fitting
 '''
 
+import os
 import time
 import copy
+import hashlib
 import tempfile
 import numpy
 import h5py
@@ -71,9 +73,17 @@ class DF(lib.StreamObject):
         blockdim : int
             When reading DF integrals from disk the chunk size to load.  It is
             used to improve IO performance.
+        cderi_cache_dir : str
+            If cderi_cache_dir is specified, the DF integral tensor is stored
+            in this directory, in a file named after the hash of the orbital
+            basis, the auxiliary basis and the geometry.  DF objects of the
+            same molecule (even created in other processes) read the DF
+            integrals from this file instead of recomputing them.  This
+            attribute is ignored if _cderi_to_save is specified.
     '''
 
     blockdim = getattr(__config__, 'df_df_DF_blockdim', 240)
+    cderi_cache_dir = getattr(__config__, 'df_df_DF_cderi_cache_dir', None)
 
     # Store DF tensor in a format compatible to pyscf-1.1 - pyscf-1.6
     _compatible_format = getattr(__config__, 'df_df_DF_compatible_format', False)
@@ -120,6 +130,8 @@ class DF(lib.StreamObject):
             log.info('_cderi_to_save = %s', self._cderi_to_save)
         else:
             log.info('_cderi_to_save = %s', self._cderi_to_save.name)
+            if self.cderi_cache_dir:
+                log.info('cderi_cache_dir = %s', self.cderi_cache_dir)
         return self
 
     def build(self):
@@ -138,8 +150,11 @@ class DF(lib.StreamObject):
         max_memory = self.max_memory - lib.current_memory()[0]
         int3c = mol._add_suffix('int3c2e')
         int2c = mol._add_suffix('int2c2e')
-        if (nao_pair*naux*8/1e6 < .9*max_memory and
-            not isinstance(self._cderi_to_save, str)):
+        if self.cderi_cache_dir and not isinstance(self._cderi_to_save, str):
+            self._cderi = self._build_cderi_cache(int3c, int2c, max_memory)
+            log.timer_debug1('Generate density fitting integrals', *t0)
+        elif (nao_pair*naux*8/1e6 < .9*max_memory and
+              not isinstance(self._cderi_to_save, str)):
             self._cderi = incore.cholesky_eri(mol, int3c=int3c, int2c=int2c,
                                               auxmol=auxmol,
                                               max_memory=max_memory, verbose=log)
@@ -168,6 +183,45 @@ class DF(lib.StreamObject):
             log.timer_debug1('Generate density fitting integrals', *t0)
         return self
 
+    def _build_cderi_cache(self, int3c, int2c, max_memory):
+        '''Look up the DF integral tensor in cderi_cache_dir. The tensor is
+        computed and stored in the cache directory if it is not found.
+        Returns the filename of the cached DF integral tensor.
+        '''
+        log = logger.new_logger(self)
+        mol = self.mol
+        auxmol = self.auxmol
+        key = _cderi_cache_key(mol, auxmol, int3c, int2c,
+                               self._compatible_format)
+        cderi = os.path.join(self.cderi_cache_dir, key + '.h5')
+        if os.path.isfile(cderi):
+            log.info('Load DF integrals from cache %s', cderi)
+            return cderi
+
+        log.info('DF integrals not found in cache. Save DF integrals in %s',
+                 cderi)
+        if not os.path.isdir(self.cderi_cache_dir):
+            os.makedirs(self.cderi_cache_dir)
+        # Compute the integrals in a temporary file then move it to the cache.
+        # Other processes will not load an incomplete file.
+        ftmp = tempfile.NamedTemporaryFile(dir=self.cderi_cache_dir,
+                                           prefix=key, delete=False)
+        ftmp.close()
+        try:
+            if self._compatible_format:
+                outcore.cholesky_eri(mol, ftmp.name, dataname='j3c',
+                                     int3c=int3c, int2c=int2c, auxmol=auxmol,
+                                     max_memory=max_memory, verbose=log)
+            else:
+                outcore.cholesky_eri_b(mol, ftmp.name, dataname='j3c',
+                                       int3c=int3c, int2c=int2c, auxmol=auxmol,
+                                       max_memory=max_memory, verbose=log)
+            os.rename(ftmp.name, cderi)
+        finally:
+            if os.path.isfile(ftmp.name):
+                os.remove(ftmp.name)
+        return cderi
+
     def kernel(self, *args, **kwargs):
         return self.build(*args, **kwargs)
 
@@ -279,6 +333,18 @@ class DF(lib.StreamObject):
     get_mo_eri = ao2mo
 
 
+def _cderi_cache_key(mol, auxmol, int3c, int2c, compatible_format=False):
+    '''Hash key of the DF integral tensor, determined by the geometry, the
+    orbital basis and the auxiliary basis.'''
+    h = hashlib.sha1()
+    for m in (mol, auxmol):
+        h.update(numpy.asarray(m._atm, dtype=numpy.int32).tobytes())
+        h.update(numpy.asarray(m._bas, dtype=numpy.int32).tobytes())
+        h.update(numpy.asarray(m._env, dtype=numpy.double).tobytes())
+    h.update(('%s %s %s' % (int3c, int2c, compatible_format)).encode())
+    return h.hexdigest()
+
+
 class DF4C(DF):
     '''Relativistic 4-component'''
     def build(self):
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# Copyright 2014-2019 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Density-fitting CASSCF analytical nuclear gradients
+
+The 2-electron part of the gradients is computed with the 3-center tensors
+(pq|P) of the occupied (core + active) orbitals and the derivative integrals
+int3c2e_ip1, int3c2e_ip2 and int2c2e_ip1. The 4-index AO integrals (and their
+derivatives) are not needed.
+'''
+
+import time
+from functools import reduce
+import numpy
+import scipy.linalg
+from pyscf import lib
+from pyscf import df
+from pyscf.lib import logger
+from pyscf.grad import casscf as casscf_grad
+from pyscf.df.grad import rhf as df_rhf_grad
+
+
+def grad_elec(mc_grad, mo_coeff=None, ci=None, atmlst=None, verbose=None):
+    mc = mc_grad.base
+    if mo_coeff is None: mo_coeff = mc.mo_coeff
+    if ci is None: ci = mc.ci
+    if mc.frozen is not None:
+        raise NotImplementedError
+
+    time0 = time.clock(), time.time()
+    log = logger.new_logger(mc_grad, verbose)
+    mol = mc_grad.mol
+    auxmol = df.addons.make_auxmol(mol, mc.with_df.auxbasis)
+    ncore = mc.ncore
+    ncas = mc.ncas
+    nocc = ncore + ncas
+    nelecas = mc.nelecas
+    naux = auxmol.nao
+    max_memory = mc_grad.max_memory - lib.current_memory()[0]
+
+    mo_occ = mo_coeff[:,:nocc]
+    casdm1, casdm2 = mc.fcisolver.make_rdm12(ci, ncas, nelecas)
+
+    # (pq|P) and the fitting coefficients (P|Q)^{-1}(Q|pq) of occupied orbitals
+    Lpq = df_rhf_grad._int3c_mo(mol, auxmol, mo_occ, max_memory)
+    int2c = scipy.linalg.cho_factor(auxmol.intor('int2c2e', aosym='s1'))
+    cpq = scipy.linalg.cho_solve(int2c, Lpq.reshape(naux,-1))
+    cpq = cpq.reshape(naux,nocc,nocc)
+    int2c = None
+    time1 = log.timer_debug1('DF 3-center integrals', *time0)
+
+    dm_core = numpy.zeros((nocc,nocc))
+    dm_core[numpy.arange(ncore),numpy.arange(ncore)] = 2
+    dm_cas = numpy.zeros((nocc,nocc))
+    dm_cas[ncore:,ncore:] = casdm1
+    dm1 = dm_core + dm_cas
+    rhoj_c = numpy.einsum('pij,ij->p', cpq, dm_core)
+    rhoj_1 = numpy.einsum('pij,ij->p', cpq, dm1)
+
+# gfock = Generalized Fock, Adv. Chem. Phys., 69, 63
+    vj_c = numpy.einsum('pij,p->ij', Lpq, rhoj_c)
+    vj_a = numpy.einsum('pij,p->ij', Lpq, rhoj_1 - rhoj_c)
+    vk_c = lib.einsum('pik,pjk->ij', Lpq[:,:,:ncore], cpq[:,:,:ncore]) * 2
+    vk_a = lib.einsum('pik,pjl,kl->ij', Lpq[:,:,ncore:], cpq[:,:,ncore:], casdm1)
+    h1 = reduce(numpy.dot, (mo_occ.T, mc.get_hcore(), mo_occ))
+    vhf_c = vj_c - vk_c * .5
+    vhf_a = vj_a - vk_a * .5
+    aapa = lib.einsum('puv,piw->uviw', Lpq[:,ncore:,ncore:], cpq[:,:,ncore:])
+    gfock = (h1 + vhf_c + vhf_a) * 2
+    gfock[:,ncore:nocc] = numpy.dot(h1[:,ncore:] + vhf_c[:,ncore:], casdm1)
+    gfock[:,ncore:nocc] += numpy.einsum('uviw,vuwt->it', aapa, casdm2)
+    dme0 = reduce(numpy.dot, (mo_occ, (gfock+gfock.T)*.5, mo_occ.T))
+    aapa = vj_c = vj_a = vk_c = vk_a = vhf_c = vhf_a = h1 = gfock = None
+
+    # dE/d(pq|P) of the 2-electron energy
+    #   E = 1/2 J[D_c+D_a]*D_c + 1/2 J[D_c]*D_a - 1/4 K[D_c]*D_c - 1/2 K[D_c]*D_a
+    #     + 1/2 (tu|vw) casdm2_tuvw
+    dmo = numpy.einsum('ij,p->pij', dm_core, rhoj_1)
+    dmo += numpy.einsum('ij,p->pij', dm_cas, rhoj_c)
+    tmp = lib.einsum('ij,pjk->pik', dm_core, cpq)
+    dmo -= lib.einsum('pik,kl->pil', tmp, dm1) * .5
+    dmo -= lib.einsum('pik,kl->pil', tmp, dm_cas).transpose(0,2,1) * .5
+    tmp = None
+    dmo[:,ncore:,ncore:] += lib.einsum('tuvw,pvw->ptu', casdm2, cpq[:,ncore:,ncore:])
+    # dE/d(P|Q)
+    w = lib.dot(cpq.reshape(naux,-1), dmo.reshape(naux,-1).T) * -.5
+    time1 = log.timer_debug1('DF 2-electron intermediates', *time1)
+
+    if atmlst is None:
+        atmlst = range(mol.natm)
+    de = df_rhf_grad._grad_int3c2e(mol, auxmol, mo_occ, dmo, w, atmlst,
+                                   mc_grad.auxbasis_response, max_memory)
+    dmo = cpq = Lpq = None
+    time1 = log.timer_debug1('DF 2-electron gradients', *time1)
+
+    dm1 = reduce(numpy.dot, (mo_occ, dm1, mo_occ.T))
+    aoslices = mol.aoslice_by_atom()
+    hcore_deriv = mc_grad.hcore_generator(mol)
+    s1 = mc_grad.get_ovlp(mol)
+    for k, ia in enumerate(atmlst):
+        shl0, shl1, p0, p1 = aoslices[ia]
+        h1ao = hcore_deriv(ia)
+        de[k] += numpy.einsum('xij,ij->x', h1ao, dm1)
+        de[k] -= numpy.einsum('xij,ij->x', s1[:,p0:p1], dme0[p0:p1]) * 2
+
+    log.timer('DF-CASSCF nuclear gradients', *time0)
+    return de
+
+
+class Gradients(casscf_grad.Gradients):
+    '''Density-fitting CASSCF gradients'''
+    def __init__(self, mc):
+        # Whether to include the response of DF auxiliary basis when computing
+        # nuclear gradients of the 2-electron energy
+        self.auxbasis_response = True
+        casscf_grad.Gradients.__init__(self, mc)
+
+    grad_elec = grad_elec
+
+Grad = Gradients
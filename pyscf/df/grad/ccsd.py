@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+# Copyright 2014-2019 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Density-fitting RCCSD analytical nuclear gradients
+
+The 2-particle density matrix is contracted with the DF 3-center tensors and
+the derivative integrals int3c2e_ip1, int3c2e_ip2 and int2c2e_ip1 instead of
+the 4-index AO integrals int2e and int2e_ip1.
+'''
+
+import time
+from functools import reduce
+import numpy
+import scipy.linalg
+from pyscf import lib
+from pyscf import df
+from pyscf.lib import logger
+from pyscf.ao2mo.outcore import balance_partition
+from pyscf.cc import ccsd_rdm
+from pyscf.cc import dfccsd
+from pyscf.grad import ccsd as ccsd_grad
+from pyscf.grad import rhf as rhf_grad
+from pyscf.grad.mp2 import _shell_prange, _index_frozen_active
+from pyscf.df.grad import rhf as df_rhf_grad
+
+
+def grad_elec(cc_grad, t1=None, t2=None, l1=None, l2=None, eris=None, atmlst=None,
+              d1=None, d2=None, verbose=logger.INFO):
+    mycc = cc_grad.base
+    if getattr(mycc, 'vvvv_lowrank_thresh', None) is not None:
+        raise NotImplementedError('DF-CCSD gradients with the low-rank vvvv '
+                                  '(vvvv_lowrank_thresh)')
+    if eris is not None:
+        if abs(eris.fock - numpy.diag(eris.fock.diagonal())).max() > 1e-3:
+            raise RuntimeError('CCSD gradients does not support NHF (non-canonical HF)')
+
+    if t1 is None: t1 = mycc.t1
+    if t2 is None: t2 = mycc.t2
+    if l1 is None: l1 = mycc.l1
+    if l2 is None: l2 = mycc.l2
+
+    log = logger.new_logger(mycc, verbose)
+    time0 = time.clock(), time.time()
+
+    log.debug('Build ccsd rdm1 intermediates')
+    if d1 is None:
+        d1 = ccsd_rdm._gamma1_intermediates(mycc, t1, t2, l1, l2)
+    doo, dov, dvo, dvv = d1
+    time1 = log.timer_debug1('rdm1 intermediates', *time0)
+    log.debug('Build ccsd rdm2 intermediates')
+    fdm2 = lib.H5TmpFile()
+    if d2 is None:
+        d2 = ccsd_rdm._gamma2_outcore(mycc, t1, t2, l1, l2, fdm2, True)
+    time1 = log.timer_debug1('rdm2 intermediates', *time1)
+
+    mol = cc_grad.mol
+    mo_coeff = mycc.mo_coeff
+    mo_energy = mycc._scf.mo_energy
+    nao, nmo = mo_coeff.shape
+    nocc = numpy.count_nonzero(mycc.mo_occ > 0)
+    with_frozen = not (mycc.frozen is None or mycc.frozen == 0)
+    OA, VA, OF, VF = _index_frozen_active(mycc.get_frozen_mask(), mycc.mo_occ)
+
+    log.debug('symmetrized rdm2 and MO->AO transformation')
+# Roughly, dm2*2 is computed in _rdm2_mo2ao
+    mo_active = mo_coeff[:,numpy.hstack((OA,VA))]
+    ccsd_grad._rdm2_mo2ao(mycc, d2, mo_active, fdm2)  # transform the active orbitals
+    time1 = log.timer_debug1('MO->AO transformation', *time1)
+    hf_dm1 = mycc._scf.make_rdm1(mycc.mo_coeff, mycc.mo_occ)
+
+    if atmlst is None:
+        atmlst = range(mol.natm)
+    offsetdic = mol.offset_nr_by_atom()
+    diagidx = numpy.arange(nao)
+    diagidx = diagidx*(diagidx+1)//2 + diagidx
+
+# DF 3-center integrals dot 2pdm
+    auxmol = df.addons.make_auxmol(mol, mycc.with_df.auxbasis)
+    naux = auxmol.nao
+    max_memory = max(0, mycc.max_memory - lib.current_memory()[0])
+    # Lpq, cpq and dmo are held in fdm2 and processed in blocks of the
+    # auxiliary functions
+    _make_int3c_cpq(mol, auxmol, fdm2, max_memory)
+    Lpq = fdm2['Lpq']
+    cpq = fdm2['cpq']
+
+    # dE/d(ij|P) of the correlation part = dm2 dot (P|Q)^{-1}(Q|kl)
+    dmo = fdm2.create_dataset('dmo', (naux,nao,nao), 'f8')
+    max_memory = max(0, mycc.max_memory - lib.current_memory()[0])
+    blksize = max(1, int(max_memory*.5e6/8/(nao**3*2.5)))
+    auxblksize = _aux_blksize(mol, naux, max_memory*.4)
+    ip1 = 0
+    for b0, b1, nf in _shell_prange(mol, 0, mol.nbas, blksize):
+        ip0, ip1 = ip1, ip1 + nf
+        dm2buf = ccsd_grad._load_block_tril(fdm2['dm2'], ip0, ip1, nao)
+        dm2buf[:,:,diagidx] *= .5
+        for p0, p1 in lib.prange(0, naux, auxblksize):
+            dmo[p0:p1,ip0:ip1] = lib.einsum('ijx,px->pij', dm2buf, cpq[p0:p1])
+        dm2buf = None
+
+    Imat = numpy.zeros((nao,nao))
+    for p0, p1 in lib.prange(0, naux, auxblksize):
+        Lblk = lib.unpack_tril(Lpq[p0:p1])
+        Imat += lib.einsum('pki,pkj->ij', Lblk, dmo[p0:p1])
+        Lblk = None
+    # dE/d(P|Q)
+    w = _contract_cpq_dmo(cpq, dmo, auxblksize) * -.5
+    de = df_rhf_grad._grad_int3c2e(mol, auxmol, None, dmo, w, atmlst,
+                                   cc_grad.auxbasis_response, max_memory)
+    Lpq = cpq = dmo = w = None
+    time1 = log.timer_debug1('2e-part grad', *time1)
+
+    Imat = reduce(numpy.dot, (mo_coeff.T, Imat, mycc._scf.get_ovlp(), mo_coeff)) * -1
+
+    dm1mo = numpy.zeros((nmo,nmo))
+    if with_frozen:
+        dco = Imat[OF[:,None],OA] / (mo_energy[OF,None] - mo_energy[OA])
+        dfv = Imat[VF[:,None],VA] / (mo_energy[VF,None] - mo_energy[VA])
+        dm1mo[OA[:,None],OA] = doo + doo.T
+        dm1mo[OF[:,None],OA] = dco
+        dm1mo[OA[:,None],OF] = dco.T
+        dm1mo[VA[:,None],VA] = dvv + dvv.T
+        dm1mo[VF[:,None],VA] = dfv
+        dm1mo[VA[:,None],VF] = dfv.T
+    else:
+        dm1mo[:nocc,:nocc] = doo + doo.T
+        dm1mo[nocc:,nocc:] = dvv + dvv.T
+
+    dm1 = reduce(numpy.dot, (mo_coeff, dm1mo, mo_coeff.T))
+    vhf = mycc._scf.get_veff(mycc.mol, dm1) * 2
+    Xvo = reduce(numpy.dot, (mo_coeff[:,nocc:].T, vhf, mo_coeff[:,:nocc]))
+    Xvo+= Imat[:nocc,nocc:].T - Imat[nocc:,:nocc]
+
+    dm1mo += ccsd_grad._response_dm1(mycc, Xvo, eris)
+    time1 = log.timer_debug1('response_rdm1 intermediates', *time1)
+
+    Imat[nocc:,:nocc] = Imat[:nocc,nocc:].T
+    im1 = reduce(numpy.dot, (mo_coeff, Imat, mo_coeff.T))
+    time1 = log.timer_debug1('response_rdm1', *time1)
+
+    log.debug('h1 and JK1')
+    # Initialize hcore_deriv with the underlying SCF object because some
+    # extensions (e.g. QM/MM, solvent) modifies the SCF object only.
+    mf_grad = cc_grad.base._scf.nuc_grad_method()
+    hcore_deriv = mf_grad.hcore_generator(mol)
+    s1 = mf_grad.get_ovlp(mol)
+
+    zeta = lib.direct_sum('i+j->ij', mo_energy, mo_energy) * .5
+    zeta[nocc:,:nocc] = mo_energy[:nocc]
+    zeta[:nocc,nocc:] = mo_energy[:nocc].reshape(-1,1)
+    zeta = reduce(numpy.dot, (mo_coeff, zeta*dm1mo, mo_coeff.T))
+
+    dm1 = reduce(numpy.dot, (mo_coeff, dm1mo, mo_coeff.T))
+    p1 = numpy.dot(mo_coeff[:,:nocc], mo_coeff[:,:nocc].T)
+    vhf_s1occ = reduce(numpy.dot, (p1, mycc._scf.get_veff(mol, dm1+dm1.T), p1))
+    time1 = log.timer_debug1('h1 and JK1', *time1)
+
+    # Hartree-Fock part contribution
+    dm1p = hf_dm1 + dm1*2
+    dm1 += hf_dm1
+    zeta += rhf_grad.make_rdm1e(mo_energy, mo_coeff, mycc.mo_occ)
+    de += _grad_hf_jk(cc_grad, mol, hf_dm1, dm1p, atmlst)
+
+    for k, ia in enumerate(atmlst):
+        shl0, shl1, p0, p1 = offsetdic[ia]
+# s[1] dot I, note matrix im1 is not hermitian
+        de[k] += numpy.einsum('xij,ij->x', s1[:,p0:p1], im1[p0:p1])
+        de[k] += numpy.einsum('xji,ij->x', s1[:,p0:p1], im1[:,p0:p1])
+# h[1] \dot DM, contribute to f1
+        h1ao = hcore_deriv(ia)
+        de[k] += numpy.einsum('xij,ji->x', h1ao, dm1)
+# -s[1]*e \dot DM,  contribute to f1
+        de[k] -= numpy.einsum('xij,ij->x', s1[:,p0:p1], zeta[p0:p1]  )
+        de[k] -= numpy.einsum('xji,ij->x', s1[:,p0:p1], zeta[:,p0:p1])
+# -vhf[s_ij[1]],  contribute to f1, *2 for s1+s1.T
+        de[k] -= numpy.einsum('xij,ij->x', s1[:,p0:p1], vhf_s1occ[p0:p1]) * 2
+
+    log.timer('%s gradients' % mycc.__class__.__name__, *time0)
+    return de
+
+def _grad_hf_jk(cc_grad, mol, hf_dm1, dm1p, atmlst):
+    '''Gradients of the mean-field 2-electron energy
+    1/2 J[hf_dm1]*dm1p - 1/4 K[hf_dm1]*dm1p'''
+    mf = cc_grad.base._scf
+    if not getattr(mf, 'with_df', None):
+        # The reference is not density fitted
+        vj, vk = rhf_grad.get_jk(mol, (hf_dm1, dm1p))
+        vhf = vj - vk * .5
+        offsetdic = mol.offset_nr_by_atom()
+        de = numpy.zeros((len(atmlst),3))
+        for k, ia in enumerate(atmlst):
+            p0, p1 = offsetdic[ia][2:]
+            de[k] += numpy.einsum('xij,ij->x', vhf[0][:,p0:p1], dm1p[p0:p1])
+            de[k] += numpy.einsum('xij,ij->x', vhf[1][:,p0:p1], hf_dm1[p0:p1])
+        return de
+
+    auxmol = df.addons.make_auxmol(mol, mf.with_df.auxbasis)
+    naux = auxmol.nao
+    nao = mol.nao
+    max_memory = max(0, cc_grad.max_memory - lib.current_memory()[0])
+    fswap = lib.H5TmpFile()
+    _make_int3c_cpq(mol, auxmol, fswap, max_memory)
+    cpq = fswap['cpq']
+    auxblksize = _aux_blksize(mol, naux, max_memory*.5)
+
+    rhoj_hf = numpy.empty(naux)
+    rhoj_p = numpy.empty(naux)
+    for p0, p1 in lib.prange(0, naux, auxblksize):
+        cblk = lib.unpack_tril(cpq[p0:p1])
+        rhoj_hf[p0:p1] = numpy.einsum('pij,ji->p', cblk, hf_dm1)
+        rhoj_p[p0:p1] = numpy.einsum('pij,ji->p', cblk, dm1p)
+
+    dmo = fswap.create_dataset('dmo', (naux,nao,nao), 'f8')
+    for p0, p1 in lib.prange(0, naux, auxblksize):
+        cblk = lib.unpack_tril(cpq[p0:p1])
+        dblk = numpy.einsum('ij,p->pij', hf_dm1, rhoj_p[p0:p1] * .5)
+        dblk += numpy.einsum('ij,p->pij', dm1p, rhoj_hf[p0:p1] * .5)
+        tmp = lib.einsum('ij,pjk->pik', hf_dm1, cblk)
+        tmp = lib.einsum('pik,kl->pil', tmp, dm1p)
+        dblk -= tmp * .25
+        dblk -= tmp.transpose(0,2,1) * .25
+        dmo[p0:p1] = dblk
+        cblk = dblk = tmp = None
+    w = _contract_cpq_dmo(cpq, dmo, auxblksize) * -.5
+    return df_rhf_grad._grad_int3c2e(mol, auxmol, None, dmo, w, atmlst,
+                                     cc_grad.auxbasis_response, max_memory)
+
+def _aux_blksize(mol, naux, max_memory):
+    '''Number of auxiliary functions of a (naux,nao,nao) block'''
+    nao = mol.nao
+    return int(min(max(max_memory*1e6/8/(nao**2*3), 20), naux))
+
+def _make_int3c_cpq(mol, auxmol, h5file, max_memory=2000):
+    '''Save the 3-center integrals (P|ij) and the fitting coefficients
+    (P|Q)^{-1}(Q|ij) in h5file['Lpq'] and h5file['cpq'] with shape
+    (naux,nao*(nao+1)/2).
+    '''
+    nao = mol.nao
+    naux = auxmol.nao
+    nao_pair = nao * (nao+1) // 2
+    aux_loc = auxmol.ao_loc
+    get_int3c_s2 = df_rhf_grad._int3c_wrapper(mol, auxmol, 'int3c2e', 's2ij')
+    blksize = int(min(max(max_memory*.5e6/8 / (nao_pair*2), 20), naux, 240))
+    Lpq = h5file.create_dataset('Lpq', (naux,nao_pair), 'f8')
+    for shl0, shl1, nL in balance_partition(aux_loc, blksize):
+        int3c = get_int3c_s2((0, mol.nbas, 0, mol.nbas, shl0, shl1))  # (ij|P)
+        Lpq[aux_loc[shl0]:aux_loc[shl1]] = int3c.T
+        int3c = None
+
+    int2c = scipy.linalg.cho_factor(auxmol.intor('int2c2e', aosym='s1'))
+    cpq = h5file.create_dataset('cpq', (naux,nao_pair), 'f8')
+    blksize = max(1, int(max_memory*.5e6/8 / (naux*2)))
+    for p0, p1 in lib.prange(0, nao_pair, blksize):
+        cpq[:,p0:p1] = scipy.linalg.cho_solve(int2c, Lpq[:,p0:p1])
+
+def _contract_cpq_dmo(cpq, dmo, blksize):
+    '''w[P,Q] = \sum_{ij} cpq[P,ij] dmo[Q,ij] for cpq in lower triangular
+    storage and dmo in square storage'''
+    naux = dmo.shape[0]
+    w = numpy.empty((naux,naux))
+    for p0, p1 in lib.prange(0, naux, blksize):
+        cblk = lib.unpack_tril(cpq[p0:p1]).reshape(p1-p0,-1)
+        for q0, q1 in lib.prange(0, naux, blksize):
+            w[p0:p1,q0:q1] = lib.dot(cblk, dmo[q0:q1].reshape(q1-q0,-1).T)
+        cblk = None
+    return w
+
+
+class Gradients(ccsd_grad.Gradients):
+    '''Density-fitting RCCSD gradients'''
+    def __init__(self, mycc):
+        # Whether to include the response of DF auxiliary basis when computing
+        # nuclear gradients of the 2-electron energy
+        self.auxbasis_response = True
+        ccsd_grad.Gradients.__init__(self, mycc)
+
+    grad_elec = grad_elec
+
+Grad = Gradients
+
+dfccsd.RCCSD.Gradients = lib.class_as_method(Gradients)
@@ -228,6 +228,94 @@ def get_jk(mf_grad, mol=None, dm=None, hermi=0, with_j=True, with_k=True):
         vk = -vk.reshape(out_shape)
     return vj, vk
 
+def _int3c_mo(mol, auxmol, mo_coeff, max_memory=2000):
+    '''3-center integrals (P|pq) in the MO basis, shape (naux,nmo,nmo).
+    AO integrals (P|ij) are returned if mo_coeff is None.
+    '''
+    nao = mol.nao
+    nmo = nao if mo_coeff is None else mo_coeff.shape[1]
+    naux = auxmol.nao
+    get_int3c_s1 = _int3c_wrapper(mol, auxmol, 'int3c2e', 's1')
+    blksize = int(min(max(max_memory * .5e6/8 / (nao**2*2), 20), naux, 240))
+    ao_ranges = balance_partition(auxmol.ao_loc, blksize)
+    aux_loc = auxmol.ao_loc
+    Lpq = numpy.empty((naux,nmo,nmo))
+    for shl0, shl1, nL in ao_ranges:
+        int3c = get_int3c_s1((0, mol.nbas, 0, mol.nbas, shl0, shl1))  # (i,j|P)
+        p0, p1 = aux_loc[shl0], aux_loc[shl1]
+        if mo_coeff is None:
+            Lpq[p0:p1] = int3c.transpose(2,0,1)
+        else:
+            tmp = lib.einsum('ijp,jq->piq', int3c, mo_coeff)
+            Lpq[p0:p1] = lib.einsum('piq,ik->pkq', tmp, mo_coeff)
+        int3c = tmp = None
+    return Lpq
+
+def _grad_int3c2e(mol, auxmol, mo_coeff, dmo, w, atmlst=None,
+                  auxbasis_response=True, max_memory=2000):
+    '''Contract the DF derivative integrals with the derivatives of a
+    density-fitted energy E[(pq|P), (P|Q)] w.r.t. the integrals.
+
+    Args:
+        mo_coeff : 2D array
+            Orbitals of the 3-center tensor (pq|P). None for AO basis.
+        dmo : 3D array (naux,nmo,nmo)
+            dE/d(pq|P) in the MO basis
+        w : 2D array (naux,naux)
+            dE/d(P|Q)
+
+    Returns:
+        Nuclear gradients of E for the atoms in atmlst
+    '''
+    if atmlst is None:
+        atmlst = range(mol.natm)
+    nao = mol.nao
+    naux = auxmol.nao
+    nbas = mol.nbas
+    aux_loc = auxmol.ao_loc
+    aoslices = mol.aoslice_by_atom()
+    auxslices = auxmol.aoslice_by_atom()
+    get_int3c_ip1 = _int3c_wrapper(mol, auxmol, 'int3c2e_ip1', 's1')
+    get_int3c_ip2 = _int3c_wrapper(mol, auxmol, 'int3c2e_ip2', 's1')
+
+    blksize = int(min(max(max_memory * .5e6/8 / (nao**2*7), 20), naux, 240))
+    ao_ranges = balance_partition(aux_loc, blksize)
+
+    e1ao = numpy.zeros((3,nao))
+    e1aux = numpy.zeros((3,naux))
+    for shl0, shl1, nL in ao_ranges:
+        p0, p1 = aux_loc[shl0], aux_loc[shl1]
+        if mo_coeff is None:
+            d3 = dmo[p0:p1].transpose(1,2,0)
+        else:
+            d3 = lib.einsum('pkl,jl->pkj', dmo[p0:p1], mo_coeff)
+            d3 = lib.einsum('pkj,ik->ijp', d3, mo_coeff)
+        d3 = (d3 + d3.transpose(1,0,2)) * .5
+        # (d/dX i,j|P)
+        int3c = get_int3c_ip1((0, nbas, 0, nbas, shl0, shl1))
+        e1ao += numpy.einsum('xijp,ijp->xi', int3c, d3) * 2
+        int3c = None
+        if auxbasis_response:
+            # (i,j|d/dX P)
+            int3c = get_int3c_ip2((0, nbas, 0, nbas, shl0, shl1))
+            e1aux[:,p0:p1] = numpy.einsum('xijp,ijp->xp', int3c, d3)
+            int3c = None
+        d3 = None
+
+    if auxbasis_response:
+        # (d/dX P|Q)
+        int2c_e1 = auxmol.intor('int2c2e_ip1')
+        e1aux += numpy.einsum('xpq,pq->xp', int2c_e1, w+w.T)
+
+    de = numpy.zeros((len(atmlst),3))
+    for k, ia in enumerate(atmlst):
+        p0, p1 = aoslices[ia,2:]
+        de[k] -= e1ao[:,p0:p1].sum(axis=1)
+        if auxbasis_response:
+            p0, p1 = auxslices[ia,2:]
+            de[k] -= e1aux[:,p0:p1].sum(axis=1)
+    return de
+
 def _int3c_wrapper(mol, auxmol, intor, aosym):
     nbas = mol.nbas
     pmol = mol + auxmol
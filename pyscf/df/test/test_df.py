@@ -85,6 +85,30 @@ class KnownValues(unittest.TestCase):
         eri1 = dfobj.get_eri()
         self.assertAlmostEqual(abs(eri0-eri1).max(), 0, 9)
 
+    def test_cderi_cache_dir(self):
+        cache_dir = tempfile.mkdtemp()
+        dfobj = df.DF(mol)
+        dfobj.cderi_cache_dir = cache_dir
+        eri0 = dfobj.get_eri()
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        cderi = dfobj._cderi
+        self.assertEqual(os.path.dirname(cderi), cache_dir)
+
+        dfobj = df.DF(mol)
+        dfobj.cderi_cache_dir = cache_dir
+        dfobj.build()
+        self.assertEqual(dfobj._cderi, cderi)
+        self.assertAlmostEqual(abs(dfobj.get_eri()-eri0).max(), 0, 12)
+
+        dfobj = df.DF(mol, auxbasis='weigend')
+        dfobj.cderi_cache_dir = cache_dir
+        dfobj.build()
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+        self.assertTrue(dfobj._cderi != cderi)
+        for f in os.listdir(cache_dir):
+            os.remove(os.path.join(cache_dir, f))
+        os.rmdir(cache_dir)
+
     def test_init_denisty_fit(self):
         from pyscf.df import df_jk
         from pyscf import cc
@@ -50,6 +50,47 @@ class KnownValues(unittest.TestCase):
         g1 = mol.UKS.density_fit().run(xc='b3lyp').nuc_grad_method().kernel()
         self.assertAlmostEqual(abs(gref - g1).max(), 0, 4)
 
+    def test_casscf_grad(self):
+        from pyscf import mcscf
+        from pyscf.df.grad import casscf as casscf_grad
+        mf = scf.RHF(mol).density_fit().run()
+        mc = mcscf.CASSCF(mf, 4, 4).density_fit()
+        mc.conv_tol = 1e-10
+        mc_grad = mc.run().nuc_grad_method()
+        self.assertTrue(isinstance(mc_grad, casscf_grad.Gradients))
+        g1 = mc_grad.kernel()
+        self.assertAlmostEqual(lib.finger(g1), -0.035485636036, 6)
+
+        mcs = mc.as_scanner()
+        e1 = mcs('O 0 0 0.001; H 0 -.757 .587; H 0 .757 .587')
+        e2 = mcs('O 0 0 -.001; H 0 -.757 .587; H 0 .757 .587')
+        self.assertAlmostEqual(g1[0,2], (e1-e2)/0.002*lib.param.BOHR, 5)
+
+        mycc.vvvv_lowrank_thresh = 1e-4
+        self.assertRaises(NotImplementedError, mycc.nuc_grad_method().grad_elec)
+
+        gref = mcscf.CASSCF(scf.RHF(mol).run(), 4, 4).run().nuc_grad_method().kernel()
+        self.assertAlmostEqual(abs(gref - g1).max(), 0, 4)
+
+    def test_ccsd_grad(self):
+        from pyscf import cc
+        from pyscf.df.grad import ccsd as ccsd_grad
+        mf = scf.RHF(mol).density_fit().run(conv_tol=1e-12)
+        mycc = cc.CCSD(mf)
+        mycc.conv_tol = 1e-10
+        cc_grad = mycc.run().nuc_grad_method()
+        self.assertTrue(isinstance(cc_grad, ccsd_grad.Gradients))
+        g1 = cc_grad.kernel()
+        self.assertAlmostEqual(lib.finger(g1), -0.036992999910, 6)
+
+        ccs = mycc.as_scanner()
+        e1 = ccs('O 0 0 0.001; H 0 -.757 .587; H 0 .757 .587')
+        e2 = ccs('O 0 0 -.001; H 0 -.757 .587; H 0 .757 .587')
+        self.assertAlmostEqual(g1[0,2], (e1-e2)/0.002*lib.param.BOHR, 5)
+
+        mycc.vvvv_lowrank_thresh = 1e-4
+        self.assertRaises(NotImplementedError, mycc.nuc_grad_method().grad_elec)
+
 if __name__ == "__main__":
     print("Full Tests for df.grad")
     unittest.main()
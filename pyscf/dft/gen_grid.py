@@ -35,6 +35,11 @@ from pyscf import __config__
 
 libdft = lib.load_library('libdft')
 BLKSIZE = 128  # needs to be the same to lib/gto/grid_ao_drv.c
+EXPCUTOFF = 50  # needs to be the same to lib/gto/grid_ao_drv.h
+# Size of the boxes to group the spatially sorted grids
+GROUP_BOX_SIZE = getattr(__config__, 'dft_gen_grid_GROUP_BOX_SIZE', 1.2)
+# Number of sorted grids to be partitioned together
+PARTITION_BLKSIZE = getattr(__config__, 'dft_gen_grid_PARTITION_BLKSIZE', 2048)
 
 # ~= (L+1)**2/3
 LEBEDEV_ORDER = {
@@ -277,10 +282,18 @@ def gen_atomic_grids(mol, atom_grid={}, radi_method=radi.gauss_chebyshev,
 
 def gen_partition(mol, atom_grids_tab,
                   radii_adjust=None, atomic_radii=radi.BRAGG_RADII,
-                  becke_scheme=original_becke):
+                  becke_scheme=original_becke, sort_grids=False):
     '''Generate the mesh grid coordinates and weights for DFT numerical integration.
     We can change radii_adjust, becke_scheme functions to generate different meshgrid.
 
+    Kwargs:
+        sort_grids : bool
+            Whether to sort the grids spatially (see :func:`arg_group_grids`).
+            The sorted grids are partitioned in compact batches.  For the
+            Stratmann scheme, the atoms which have no contribution to the
+            partition of a batch are excluded from the Becke weights of that
+            batch.
+
     Returns:
         grid_coord and grid_weight arrays.  grid_coord array has shape (N,3);
         weight 1D array has N elements.
@@ -296,40 +309,61 @@ def gen_partition(mol, atom_grids_tab,
          radii_adjust is radi.becke_atomic_radii_adjust or
          f_radii_adjust is None)):
         if f_radii_adjust is None:
-            p_radii_table = lib.c_null_ptr()
+            f_radii_table = None
         else:
             f_radii_table = numpy.asarray([f_radii_adjust(i, j, 0)
                                            for i in range(mol.natm)
                                            for j in range(mol.natm)])
-            p_radii_table = f_radii_table.ctypes.data_as(ctypes.c_void_p)
-        def gen_grid_partition(coords):
+        def gen_grid_partition(coords, atm_idx=None):
             coords = numpy.asarray(coords, order='F')
             ngrids = coords.shape[0]
-            pbecke = numpy.empty((mol.natm,ngrids))
+            if atm_idx is None:
+                sub_coords = atm_coords
+                sub_table = f_radii_table
+            else:
+                sub_coords = numpy.asarray(atm_coords[atm_idx], order='C')
+                if f_radii_table is not None:
+                    sub_table = f_radii_table.reshape(mol.natm,mol.natm)
+                    sub_table = numpy.asarray(sub_table[atm_idx[:,None],atm_idx],
+                                              order='C')
+            natm = sub_coords.shape[0]
+            if f_radii_table is None:
+                p_radii_table = lib.c_null_ptr()
+            else:
+                p_radii_table = sub_table.ctypes.data_as(ctypes.c_void_p)
+            pbecke = numpy.empty((natm,ngrids))
             libdft.VXCgen_grid(pbecke.ctypes.data_as(ctypes.c_void_p),
                                coords.ctypes.data_as(ctypes.c_void_p),
-                               atm_coords.ctypes.data_as(ctypes.c_void_p),
+                               sub_coords.ctypes.data_as(ctypes.c_void_p),
                                p_radii_table,
-                               ctypes.c_int(mol.natm), ctypes.c_int(ngrids))
+                               ctypes.c_int(natm), ctypes.c_int(ngrids))
             return pbecke
     else:
-        def gen_grid_partition(coords):
+        def gen_grid_partition(coords, atm_idx=None):
+            if atm_idx is None:
+                atm_idx = numpy.arange(mol.natm)
+            natm = len(atm_idx)
             ngrids = coords.shape[0]
-            grid_dist = numpy.empty((mol.natm,ngrids))
-            for ia in range(mol.natm):
+            grid_dist = numpy.empty((natm,ngrids))
+            for i, ia in enumerate(atm_idx):
                 dc = coords - atm_coords[ia]
-                grid_dist[ia] = numpy.sqrt(numpy.einsum('ij,ij->i',dc,dc))
-            pbecke = numpy.ones((mol.natm,ngrids))
-            for i in range(mol.natm):
+                grid_dist[i] = numpy.sqrt(numpy.einsum('ij,ij->i',dc,dc))
+            pbecke = numpy.ones((natm,ngrids))
+            for i in range(natm):
                 for j in range(i):
-                    g = 1/atm_dist[i,j] * (grid_dist[i]-grid_dist[j])
+                    ia, ja = atm_idx[i], atm_idx[j]
+                    g = 1/atm_dist[ia,ja] * (grid_dist[i]-grid_dist[j])
                     if f_radii_adjust is not None:
-                        g = f_radii_adjust(i, j, g)
+                        g = f_radii_adjust(ia, ja, g)
                     g = becke_scheme(g)
                     pbecke[i] *= .5 * (1-g)
                     pbecke[j] *= .5 * (1+g)
             return pbecke
 
+    if sort_grids:
+        return _sorted_partition(mol, atom_grids_tab, gen_grid_partition,
+                                 f_radii_adjust, becke_scheme)
+
     coords_all = []
     weights_all = []
     for ia in range(mol.natm):
@@ -341,6 +375,111 @@ def gen_partition(mol, atom_grids_tab,
         weights_all.append(weights)
     return numpy.vstack(coords_all), numpy.hstack(weights_all)
 
+def _sorted_partition(mol, atom_grids_tab, gen_grid_partition,
+                      f_radii_adjust=None, becke_scheme=original_becke):
+    '''Becke partition for spatially sorted grids.
+
+    Grids are processed in batches of PARTITION_BLKSIZE points.  In the
+    Stratmann scheme, the cell function s(nu) is exactly 0 or 1 when |nu| >= a.
+    Removing atom B from the partition of point r does not change any weight
+    if |r-R_B| >= ratio**2 * |r-R_A|, where A is the atom nearest to r and
+    ratio is the distance ratio at which the cell function saturates.  The
+    inequality is checked against the bounding box of each batch.
+    '''
+    atm_coords = numpy.asarray(mol.atom_coords() , order='C')
+    coords_all = []
+    vol_all = []
+    atm_id_all = []
+    for ia in range(mol.natm):
+        coords, vol = atom_grids_tab[mol.atom_symbol(ia)]
+        coords_all.append(coords + atm_coords[ia])
+        vol_all.append(vol)
+        atm_id_all.append(numpy.repeat(ia, vol.size))
+    coords_all = numpy.vstack(coords_all)
+    vol_all = numpy.hstack(vol_all)
+    atm_id_all = numpy.hstack(atm_id_all)
+
+    idx = arg_group_grids(mol, coords_all)
+    coords_all = numpy.asarray(coords_all[idx], order='C')
+    vol_all = vol_all[idx]
+    atm_id_all = atm_id_all[idx]
+
+    ratio2 = None
+    if becke_scheme is stratmann and mol.natm > 1:
+        amax = 0
+        if f_radii_adjust is not None:
+            amax = max(abs(f_radii_adjust(i, j, 0))
+                       for i in range(mol.natm) for j in range(mol.natm))
+        # s(nu) saturates for mu <= mu0, mu0 + amax*(1-mu0**2) = -a where
+        # a = .64 for the Stratmann scheme
+        a = .64
+        if amax < 1e-8:
+            mu0 = -a
+        else:
+            mu0 = (1 - numpy.sqrt(1 + 4*amax*(amax+a))) / (2*amax)
+        ratio = (1 - mu0) / (1 + mu0)
+        ratio2 = ratio**2 * (1 + 1e-8)
+
+    ngrids = vol_all.size
+    weights_all = numpy.empty(ngrids)
+    atm_loc = numpy.empty(mol.natm, dtype=int)
+    nskip = 0
+    for p0, p1 in prange(0, ngrids, PARTITION_BLKSIZE):
+        coords = coords_all[p0:p1]
+        if ratio2 is None:
+            atm_idx = None
+            loc = atm_id_all[p0:p1]
+        else:
+            lo = coords.min(axis=0)
+            hi = coords.max(axis=0)
+            h = numpy.linalg.norm(hi - lo) * .5
+            d = numpy.linalg.norm(atm_coords - (hi + lo)*.5, axis=1)
+            atm_idx = numpy.where(d - h < ratio2 * (d.min() + h))[0]
+            nskip += mol.natm - atm_idx.size
+            atm_loc[:] = -1
+            atm_loc[atm_idx] = numpy.arange(atm_idx.size)
+            loc = atm_loc[atm_id_all[p0:p1]]
+        pbecke = gen_grid_partition(coords, atm_idx)
+        # Weights are 0 if the parent atom does not contribute to the batch
+        mask = loc >= 0
+        weights = numpy.zeros(p1-p0)
+        weights[mask] = (pbecke[loc[mask],numpy.arange(p1-p0)[mask]] /
+                         pbecke[:,mask].sum(axis=0))
+        weights_all[p0:p1] = vol_all[p0:p1] * weights
+    if ratio2 is not None:
+        nbatch = (ngrids + PARTITION_BLKSIZE - 1) // PARTITION_BLKSIZE
+        logger.debug(mol, 'Becke partition: %.1f of %d atoms skipped per batch',
+                     float(nskip)/max(nbatch, 1), mol.natm)
+    return coords_all, weights_all
+
+def arg_group_grids(mol, coords, box_size=GROUP_BOX_SIZE):
+    '''Partition the entire space into small boxes according to the input
+    box_size.  Group the grids against these boxes.  The boxes are traversed
+    along the Z-order (Morton) curve so that grids of neighbouring boxes are
+    close in the returned order.
+
+    Returns:
+        The indices which sort the grids.
+    '''
+    coords = numpy.asarray(coords)
+    if coords.shape[0] == 0:
+        return numpy.zeros(0, dtype=int)
+    lo = coords.min(axis=0)
+    boxes = ((coords - lo) * (1./box_size)).astype(numpy.uint64)
+    # 21 bits for each direction
+    boxes = numpy.minimum(boxes, numpy.uint64((1<<21) - 1))
+    def spread_bits(x):
+        x = (x | x << numpy.uint64(32)) & numpy.uint64(0x1f00000000ffff)
+        x = (x | x << numpy.uint64(16)) & numpy.uint64(0x1f0000ff0000ff)
+        x = (x | x << numpy.uint64(8)) & numpy.uint64(0x100f00f00f00f00f)
+        x = (x | x << numpy.uint64(4)) & numpy.uint64(0x10c30c30c30c30c3)
+        x = (x | x << numpy.uint64(2)) & numpy.uint64(0x1249249249249249)
+        return x
+    box_id = (spread_bits(boxes[:,0]) |
+              spread_bits(boxes[:,1]) << numpy.uint64(1) |
+              spread_bits(boxes[:,2]) << numpy.uint64(2))
+    return numpy.argsort(box_id, kind='mergesort')
+
 def make_mask(mol, coords, relativity=0, shls_slice=None, verbose=None):
     '''Mask to indicate whether a shell is zero on grid
 
@@ -383,6 +522,49 @@ def make_mask(mol, coords, relativity=0, shls_slice=None, verbose=None):
     return non0tab
 
 
+def _make_mask_by_box(mol, coords, shls_slice=None):
+    '''Screen the shells against the bounding box of each block of grids.
+
+    A shell is marked nonzero in a block if any point of the bounding box is
+    within the radius where the shell is above the cutoff of :func:`make_mask`.
+    The mask is a superset of the one produced by :func:`make_mask`.  It is
+    cheap to compute and effective when the grids are spatially sorted.
+    '''
+    coords = numpy.asarray(coords)
+    ngrids = len(coords)
+    if shls_slice is None:
+        shls_slice = (0, mol.nbas)
+    sh0, sh1 = shls_slice
+    nbas = sh1 - sh0
+    nblk = (ngrids+BLKSIZE-1)//BLKSIZE
+
+    # Square of the radius beyond which all primitive functions of a shell
+    # satisfy exp(-e*r^2)*|c| < exp(-EXPCUTOFF)
+    rcut2 = numpy.empty(nbas)
+    for i, ib in enumerate(range(sh0, sh1)):
+        es = mol.bas_exp(ib)
+        cs = abs(mol._libcint_ctr_coeff(ib)).max(axis=1)
+        with numpy.errstate(divide='ignore'):
+            rcut2[i] = ((EXPCUTOFF + numpy.log(cs)) / es).max()
+    bas_atom = mol._bas[sh0:sh1,gto.ATOM_OF]
+    atm_coords = mol.atom_coords()
+
+    pad = nblk * BLKSIZE - ngrids
+    if pad > 0:
+        coords = numpy.vstack((coords, numpy.repeat(coords[-1:], pad, axis=0)))
+    coords = coords.reshape(nblk,BLKSIZE,3)
+    lo = coords.min(axis=1)
+    hi = coords.max(axis=1)
+
+    non0tab = numpy.empty((nblk,nbas), dtype=numpy.uint8)
+    blksize = max(1, int(4e6 / max(1, mol.natm)))
+    for b0, b1 in prange(0, nblk, blksize):
+        dr = numpy.maximum(lo[b0:b1,None] - atm_coords, 0)
+        dr+= numpy.maximum(atm_coords - hi[b0:b1,None], 0)
+        dr2 = numpy.einsum('bak,bak->ba', dr, dr)
+        non0tab[b0:b1] = dr2[:,bas_atom] < rcut2
+    return non0tab
+
 
 class Grids(lib.StreamObject):
     '''DFT mesh grids
@@ -436,6 +618,11 @@ class Grids(lib.StreamObject):
             Eg, grids.atom_grid = {'H': (20,110)} will generate 20 radial
             grids and 110 angular grids for H atom.
 
+        sort_grids : bool
+            Whether to sort the grids spatially.  Sorted grids lead to sparse
+            non0tab masks and allow to skip the distant atoms in the Becke
+            partition of Stratmann scheme.  See also :func:`arg_group_grids`.
+
         Examples:
 
         >>> mol = gto.M(atom='H 0 0 0; H 0 0 1.1')
@@ -487,6 +674,8 @@ class Grids(lib.StreamObject):
 
         self.level = getattr(__config__, 'dft_gen_grid_Grids_level', 3)
 
+        self.sort_grids = getattr(__config__, 'dft_gen_grid_Grids_sort_grids', False)
+
 ##################################################
 # don't modify the following attributes, they are not input options
         self.coords  = None
@@ -499,7 +688,7 @@ class Grids(lib.StreamObject):
 
     def __setattr__(self, key, val):
         if key in ('atom_grid', 'atomic_radii', 'radii_adjust', 'radi_method',
-                   'becke_scheme', 'prune', 'level'):
+                   'becke_scheme', 'prune', 'level', 'sort_grids'):
             self.reset()
         super(Grids, self).__setattr__(key, val)
 
@@ -509,6 +698,8 @@ class Grids(lib.StreamObject):
         logger.info(self, 'pruning grids: %s', self.prune)
         logger.info(self, 'grids dens level: %d', self.level)
         logger.info(self, 'symmetrized grids: %s', self.symmetry)
+        if self.sort_grids:
+            logger.info(self, 'sort grids: %s', self.sort_grids)
         if self.radii_adjust is not None:
             logger.info(self, 'atomic radii adjust function: %s',
                         self.radii_adjust)
@@ -527,7 +718,7 @@ class Grids(lib.StreamObject):
         self.coords, self.weights = \
                 self.gen_partition(mol, atom_grids_tab,
                                    self.radii_adjust, self.atomic_radii,
-                                   self.becke_scheme)
+                                   self.becke_scheme, self.sort_grids)
         if with_non0tab:
             self.non0tab = self.make_mask(mol, self.coords)
         else:
@@ -561,16 +752,19 @@ class Grids(lib.StreamObject):
     @lib.with_doc(gen_partition.__doc__)
     def gen_partition(self, mol, atom_grids_tab,
                       radii_adjust=None, atomic_radii=radi.BRAGG_RADII,
-                      becke_scheme=original_becke):
+                      becke_scheme=original_becke, sort_grids=None):
         ''' See gen_grid.gen_partition function'''
+        if sort_grids is None: sort_grids = self.sort_grids
         return gen_partition(mol, atom_grids_tab, radii_adjust, atomic_radii,
-                             becke_scheme)
+                             becke_scheme, sort_grids)
 
     @lib.with_doc(make_mask.__doc__)
     def make_mask(self, mol=None, coords=None, relativity=0, shls_slice=None,
                   verbose=None):
         if mol is None: mol = self.mol
         if coords is None: coords = self.coords
+        if self.sort_grids:
+            return _make_mask_by_box(mol, coords, shls_slice)
         return make_mask(mol, coords, relativity, shls_slice, verbose)
 
 
@@ -18,6 +18,7 @@
 
 import warnings
 import ctypes
+import collections
 import numpy
 import scipy.linalg
 from pyscf import lib
@@ -43,6 +44,10 @@ OCCDROP = getattr(__config__, 'dft_numint_OCCDROP', 1e-12)
 # If the number of AOs in the system is less than this value, all tensors are
 # treated as dense quantities and contracted by dgemm directly.
 SWITCH_SIZE = getattr(__config__, 'dft_numint_SWITCH_SIZE', 800)
+# For large systems, if the fraction of AOs which are not screened on a batch
+# of grids is smaller than this value, only these AOs are gathered and
+# contracted with dense matrix multiplication.
+SPARSE_AO_FRACTION = getattr(__config__, 'dft_numint_SPARSE_AO_FRACTION', .5)
 
 def eval_ao(mol, coords, deriv=0, shls_slice=None,
             non0tab=None, out=None, verbose=None):
@@ -163,6 +168,14 @@ def eval_rho(mol, ao, dm, non0tab=None, xctype='LDA', hermi=0, verbose=None):
 
     shls_slice = (0, mol.nbas)
     ao_loc = mol.ao_loc_nr()
+    if nao >= SWITCH_SIZE:
+        ao_idx = _sparse_ao_index(non0tab, ngrids, shls_slice, ao_loc, nao)
+        if ao_idx is not None:
+            # Only the AOs which are not screened on these grids contribute
+            ao = _take_ao(ao, ao_idx)
+            dm = dm[ao_idx[:,None],ao_idx]
+            non0tab = shls_slice = ao_loc = None
+
     if xctype == 'LDA' or xctype == 'HF':
         c0 = _dot_ao_dm(mol, ao, dm, non0tab, shls_slice, ao_loc)
         #:rho = numpy.einsum('pi,pi->p', ao, c0)
@@ -537,12 +550,44 @@ def eval_mat(mol, ao, weight, rho, vxc,
     return mat + mat.T.conj()
 
 
+def _sparse_ao_index(non0tab, ngrids, shls_slice, ao_loc, nao):
+    '''Indices of the AOs which are not screened out on any of the ngrids
+    grids.  Returns None if the fraction of these AOs is larger than
+    SPARSE_AO_FRACTION.
+    '''
+    if non0tab is None or shls_slice is None or ao_loc is None:
+        return None
+    sh0, sh1 = shls_slice
+    if ao_loc[sh1] - ao_loc[sh0] != nao:
+        return None
+    nblk = (ngrids+BLKSIZE-1) // BLKSIZE
+    shl_mask = non0tab[:nblk,sh0:sh1].any(axis=0)
+    ao_mask = numpy.repeat(shl_mask, ao_loc[sh0+1:sh1+1]-ao_loc[sh0:sh1])
+    if ao_mask.sum() > nao * SPARSE_AO_FRACTION:
+        return None
+    return numpy.where(ao_mask)[0]
+
+def _take_ao(ao, ao_idx):
+    '''ao[...,ao_idx] in the same memory layout as the output of eval_ao'''
+    return ao.swapaxes(-1,-2)[...,ao_idx,:].swapaxes(-1,-2)
+
 def _dot_ao_ao(mol, ao1, ao2, non0tab, shls_slice, ao_loc, hermi=0):
     '''return numpy.dot(ao1.T, ao2)'''
     ngrids, nao = ao1.shape
     if nao < SWITCH_SIZE:
         return lib.dot(ao1.T.conj(), ao2)
 
+    ao_idx = _sparse_ao_index(non0tab, ngrids, shls_slice, ao_loc, nao)
+    if ao_idx is not None:
+        # Block-sparse contraction on the AOs which are not screened
+        dtype = numpy.result_type(ao1, ao2)
+        vv = numpy.zeros((nao,nao), dtype=dtype)
+        if ao_idx.size > 0:
+            ao1 = _take_ao(ao1, ao_idx)
+            ao2 = _take_ao(ao2, ao_idx)
+            vv[ao_idx[:,None],ao_idx] = lib.dot(ao1.T.conj(), ao2)
+        return vv
+
     if not ao1.flags.f_contiguous:
         ao1 = lib.transpose(ao1)
     if not ao2.flags.f_contiguous:
@@ -576,6 +621,18 @@ def _dot_ao_dm(mol, ao, dm, non0tab, shls_slice, ao_loc, out=None):
     if nao < SWITCH_SIZE:
         return lib.dot(dm.T, ao.T).T
 
+    ao_idx = _sparse_ao_index(non0tab, ngrids, shls_slice, ao_loc, nao)
+    if ao_idx is not None:
+        # Block-sparse contraction on the AOs which are not screened
+        dtype = numpy.result_type(ao, dm)
+        vm = numpy.ndarray((ngrids,dm.shape[1]), dtype=dtype, order='F', buffer=out)
+        if ao_idx.size > 0:
+            ao = _take_ao(ao, ao_idx)
+            vm[:] = lib.dot(dm[ao_idx].T, ao.T).T
+        else:
+            vm[:] = 0
+        return vm
+
     if not ao.flags.f_contiguous:
         ao = lib.transpose(ao)
     if ao.dtype == dm.dtype == numpy.double:
@@ -1848,11 +1905,109 @@ def get_rho(ni, mol, dm, grids, max_memory=2000):
     return rho
 
 
+class _AOCache(object):
+    '''AO values on grids which are reused by NumInt.block_loop.
+
+    For each sub-block of BLKSIZE grids, only the AOs which are not screened
+    out by non0tab are stored.  The AO values are held in memory up to
+    max_memory (in MB).  When the memory is exhausted, the least recently
+    used blocks of other derivative orders are evicted.  The blocks which do
+    not fit in memory are saved in a temporary HDF5 file if spill is enabled.
+    '''
+    def __init__(self, mol, grids, non0tab, max_memory, spill=False):
+        self._key = (mol._atm, mol._bas, mol._env, grids.coords, non0tab)
+        self.max_memory = max_memory
+        self.spill = spill
+        self.blksize = {}
+        self.mem_used = 0
+        self._data = collections.OrderedDict()
+        self._fspill = None
+
+    def match(self, mol, grids, non0tab):
+        key = (mol._atm, mol._bas, mol._env, grids.coords, non0tab)
+        return all(x is y for x, y in zip(self._key, key))
+
+    def load(self, key, out):
+        '''Write the cached AO values to out (an array of shape
+        (comp,nao,ngrids)). Return None if the AO values are not cached.'''
+        if key in self._data:
+            mask, ao = self._data.pop(key)
+            self._data[key] = (mask, ao)  # move to the end (most recently used)
+        elif self._fspill is not None and str(key) in self._fspill:
+            dat = self._fspill[str(key)]
+            mask = dat.attrs['mask'] if 'mask' in dat.attrs else None
+            ao = dat[()]
+        else:
+            return None
+
+        if mask is None:
+            out[:] = ao.reshape(out.shape)
+        else:
+            comp, nao, ngrids = out.shape
+            out[:] = 0
+            p1 = 0
+            for ib, ip0 in enumerate(range(0, ngrids, BLKSIZE)):
+                ip1 = min(ip0+BLKSIZE, ngrids)
+                p0, p1 = p1, p1 + comp * mask[ib].sum() * (ip1-ip0)
+                out[:,mask[ib],ip0:ip1] = ao[p0:p1].reshape(comp,-1,ip1-ip0)
+        return out
+
+    def save(self, key, ao, non0tab, ao_loc):
+        '''Cache the AO values. ao is an array of shape (comp,nao,ngrids)'''
+        comp, nao, ngrids = ao.shape
+        nblk = (ngrids+BLKSIZE-1) // BLKSIZE
+        mask = numpy.repeat(non0tab[:nblk].astype(bool), ao_loc[1:]-ao_loc[:-1],
+                            axis=1)
+        if mask.all():
+            mask = None
+            ao = ao.ravel().copy()
+        else:
+            ao = numpy.hstack([ao[:,mask[ib],ip0:ip0+BLKSIZE].ravel()
+                               for ib, ip0 in enumerate(range(0, ngrids, BLKSIZE))])
+
+        deriv = key[0]
+        max_bytes = self.max_memory * 1e6
+        if self.mem_used + ao.nbytes > max_bytes:
+            # Evict the AO values of other derivative orders.  Evicting the
+            # blocks of the same order does not help since all blocks are
+            # visited in a cyclic order in block_loop.
+            for k in [k for k in self._data if k[0] != deriv]:
+                self.mem_used -= self._data.pop(k)[1].nbytes
+                if self.mem_used + ao.nbytes <= max_bytes:
+                    break
+
+        if self.mem_used + ao.nbytes <= max_bytes:
+            self._data[key] = (mask, ao)
+            self.mem_used += ao.nbytes
+        elif self.spill:
+            if self._fspill is None:
+                self._fspill = lib.H5TmpFile()
+            self._fspill[str(key)] = ao
+            if mask is not None:
+                self._fspill[str(key)].attrs['mask'] = mask
+
+
 class NumInt(object):
+    '''
+    Attributes for AO cache:
+        ao_cache_memory : float
+            Memory (in MB) to cache the AO values evaluated in block_loop. The
+            cached AO values are reused in the next calls to block_loop with
+            the same grids (e.g. in the next SCF iteration, or in the response
+            functions nr_rks_fxc, cache_xc_kernel). Default is 0, which
+            disables the cache.
+        ao_cache_spill : bool
+            Whether to save the AO values which do not fit in ao_cache_memory
+            in a temporary HDF5 file.
+    '''
     libxc = libxc
 
+    ao_cache_memory = getattr(__config__, 'dft_numint_NumInt_ao_cache_memory', 0)
+    ao_cache_spill = getattr(__config__, 'dft_numint_NumInt_ao_cache_spill', False)
+
     def __init__(self):
         self.omega = None  # RSH paramter
+        self._ao_cache = None
 
     @lib.with_doc(nr_vxc.__doc__)
     def nr_vxc(self, mol, grids, xc_code, dms, spin=0, relativity=0, hermi=0,
@@ -1910,15 +2065,29 @@ class NumInt(object):
             nao = mol.nao
         ngrids = grids.coords.shape[0]
         comp = (deriv+1)*(deriv+2)*(deriv+3)//6
-# NOTE to index grids.non0tab, the blksize needs to be the integer multiplier of BLKSIZE
-        if blksize is None:
-            blksize = int(max_memory*1e6/(comp*2*nao*8*BLKSIZE))*BLKSIZE
-            blksize = max(BLKSIZE, min(blksize, ngrids, BLKSIZE*1200))
         if non0tab is None:
             non0tab = grids.non0tab
         if non0tab is None:
             non0tab = numpy.ones(((ngrids+BLKSIZE-1)//BLKSIZE,mol.nbas),
                                  dtype=numpy.uint8)
+        if self.ao_cache_memory > 0 and nao == mol.nao:
+            ao_cache = self._ao_cache
+            if ao_cache is None or not ao_cache.match(mol, grids, non0tab):
+                ao_cache = self._ao_cache = _AOCache(
+                    mol, grids, non0tab, self.ao_cache_memory, self.ao_cache_spill)
+            # The cached blocks can only be reused with the same block size
+            if blksize is None:
+                blksize = ao_cache.blksize.get(deriv)
+            ao_loc = mol.ao_loc_nr()
+        else:
+            ao_cache = None
+# NOTE to index grids.non0tab, the blksize needs to be the integer multiplier of BLKSIZE
+        if blksize is None:
+            blksize = int(max_memory*1e6/(comp*2*nao*8*BLKSIZE))*BLKSIZE
+            blksize = max(BLKSIZE, min(blksize, ngrids, BLKSIZE*1200))
+            if ao_cache is not None:
+                ao_cache.blksize[deriv] = blksize
+
         if buf is None:
             buf = numpy.empty((comp,blksize,nao))
         for ip0 in range(0, ngrids, blksize):
@@ -1926,9 +2095,25 @@ class NumInt(object):
             coords = grids.coords[ip0:ip1]
             weight = grids.weights[ip0:ip1]
             non0 = non0tab[ip0//BLKSIZE:]
-            ao = self.eval_ao(mol, coords, deriv=deriv, non0tab=non0, out=buf)
+            if ao_cache is None:
+                ao = self.eval_ao(mol, coords, deriv=deriv, non0tab=non0, out=buf)
+            else:
+                key = (deriv, ip0, ip1)
+                # Same memory layout as the output of eval_ao
+                ao_buf = numpy.ndarray((comp,nao,ip1-ip0), buffer=buf)
+                if ao_cache.load(key, ao_buf) is None:
+                    self.eval_ao(mol, coords, deriv=deriv, non0tab=non0, out=buf)
+                    ao_cache.save(key, ao_buf, non0, ao_loc)
+                ao = ao_buf.transpose(0,2,1)
+                if deriv == 0:
+                    ao = ao[0]
             yield ao, non0, weight, coords
 
+    def reset_ao_cache(self):
+        '''Release the AO values cached by block_loop'''
+        self._ao_cache = None
+        return self
+
     def _gen_rho_evaluator(self, mol, dms, hermi=0):
         if getattr(dms, 'mo_coeff', None) is not None:
 #TODO: test whether dm.mo_coeff matching dm
@@ -132,6 +132,26 @@ class KnownValues(unittest.TestCase):
         g.atom_grid = {"H": (10, 110), "O": (10, 110),}
         self.assertTrue(g.weights is None)
 
+    def test_sort_grids(self):
+        mol = gto.M(atom=[['H', (0, 0, i*1.5)] for i in range(16)],
+                    unit='B', basis='6-31g', spin=None)
+        for scheme in (gen_grid.original_becke, gen_grid.stratmann):
+            g0 = gen_grid.Grids(mol)
+            g0.atom_grid = (20, 50)
+            g0.becke_scheme = scheme
+            g0.build()
+            g1 = gen_grid.Grids(mol)
+            g1.atom_grid = (20, 50)
+            g1.becke_scheme = scheme
+            g1.sort_grids = True
+            g1.build(with_non0tab=True)
+            idx = gen_grid.arg_group_grids(mol, g0.coords)
+            self.assertAlmostEqual(abs(g0.coords[idx] - g1.coords).max(), 0, 12)
+            self.assertAlmostEqual(abs(g0.weights[idx] - g1.weights).max(), 0, 12)
+
+            non0 = gen_grid.make_mask(mol, g1.coords)
+            self.assertTrue(numpy.all(non0 <= g1.non0tab))
+
 
 if __name__ == "__main__":
     print("Test Grids")
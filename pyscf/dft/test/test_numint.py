@@ -234,6 +234,60 @@ class KnownValues(unittest.TestCase):
         v = mf._numint.nr_vxc(mol, mf.grids, '', dms, spin=1)[2]
         self.assertAlmostEqual(abs(v).max(), 0, 9)
 
+    def test_sparse_ao_contraction(self):
+        numpy.random.seed(10)
+        nao = h4.nao_nr()
+        dm = numpy.random.random((nao,nao))
+        dm = dm + dm.T
+        ni = dft.numint.NumInt()
+        grids = mf_h4.grids
+        shls_slice = (0, h4.nbas)
+        ao_loc = h4.ao_loc_nr()
+        mask = grids.non0tab[:2]
+        ao = ni.eval_ao(h4, grids.coords[:256], deriv=2, non0tab=mask)
+        self.assertTrue(dft.numint._sparse_ao_index(
+            mask, 256, shls_slice, ao_loc, nao) is not None)
+        rho1 = ni.eval_rho(h4, ao, dm, mask, xctype='MGGA')
+        vm1 = dft.numint._dot_ao_dm(h4, ao[0], dm, mask, shls_slice, ao_loc)
+        vv1 = dft.numint._dot_ao_ao(h4, ao[0], ao[1], mask, shls_slice, ao_loc)
+        v1 = ni.nr_vxc(h4, grids, 'b88,', dm)[2]
+
+        # Dense contraction
+        with lib.temporary_env(dft.numint, SPARSE_AO_FRACTION=0):
+            rho0 = ni.eval_rho(h4, ao, dm, mask, xctype='MGGA')
+            vm0 = dft.numint._dot_ao_dm(h4, ao[0], dm, mask, shls_slice, ao_loc)
+            vv0 = dft.numint._dot_ao_ao(h4, ao[0], ao[1], mask, shls_slice, ao_loc)
+            v0 = ni.nr_vxc(h4, grids, 'b88,', dm)[2]
+        self.assertAlmostEqual(abs(rho1-rho0).max(), 0, 12)
+        self.assertAlmostEqual(abs(vm1-vm0).max(), 0, 12)
+        self.assertAlmostEqual(abs(vv1-vv0).max(), 0, 12)
+        self.assertAlmostEqual(abs(v1-v0).max(), 0, 12)
+
+    def test_ao_cache(self):
+        numpy.random.seed(10)
+        nao = h4.nao_nr()
+        dms = numpy.random.random((2,nao,nao))
+        ni = dft.numint.NumInt()
+        v0 = ni.nr_vxc(h4, mf_h4.grids, 'B88,', dms, spin=1)[2]
+
+        ni.ao_cache_memory = 2000
+        v1 = ni.nr_vxc(h4, mf_h4.grids, 'B88,', dms, spin=1)[2]
+        self.assertTrue(ni._ao_cache.mem_used > 0)
+        # The AO values of screened shells are not cached
+        ngrids = mf_h4.grids.weights.size
+        self.assertTrue(ni._ao_cache.mem_used < 4*ngrids*nao*8)
+        v2 = ni.nr_vxc(h4, mf_h4.grids, 'B88,', dms, spin=1)[2]
+        self.assertAlmostEqual(abs(v1-v0).max(), 0, 12)
+        self.assertAlmostEqual(abs(v2-v0).max(), 0, 12)
+
+        ni.ao_cache_memory = 1e-3
+        ni.ao_cache_spill = True
+        ni.reset_ao_cache()
+        v1 = ni.nr_vxc(h4, mf_h4.grids, 'B88,', dms, spin=1)[2]
+        v2 = ni.nr_vxc(h4, mf_h4.grids, 'B88,', dms, spin=1)[2]
+        self.assertTrue(ni._ao_cache._fspill is not None)
+        self.assertAlmostEqual(abs(v2-v0).max(), 0, 12)
+
     def test_rks_fxc(self):
         numpy.random.seed(10)
         nao = mol1.nao_nr()
@@ -99,6 +99,20 @@ def contract_2e(eri, fcivec, norb, nelec, link_index=None):
 # no *.5 because FCIcontract_2e_spin0 only compute half of the contraction
     return lib.transpose_sum(ci1, inplace=True).reshape(fcivec.shape)
 
+def contract_2e_mp(eri, fcivec, norb, nelec, link_index=None, nproc=None,
+                   max_memory=2000):
+    '''Same to :func:`contract_2e` but the strings are distributed over
+    multiple processes.  See :func:`direct_spin1.contract_2e_mp`.
+    '''
+    if link_index is not None:
+        link_index = (link_index, link_index)
+    ci1 = direct_spin1.contract_2e_mp(eri, fcivec, norb, nelec, link_index,
+                                      nproc, max_memory)
+    na = int(numpy.sqrt(ci1.size))
+    ci1 = lib.transpose_sum(ci1.reshape(na,na), inplace=True)
+    ci1 *= .5
+    return ci1.reshape(fcivec.shape)
+
 absorb_h1e = direct_spin1.absorb_h1e
 
 @lib.with_doc(direct_spin1.make_hdiag.__doc__)
@@ -350,6 +364,9 @@ class FCISolver(direct_spin1.FCISolver):
         return contract_1e(f1e, fcivec, norb, nelec, link_index, **kwargs)
 
     def contract_2e(self, eri, fcivec, norb, nelec, link_index=None, **kwargs):
+        if self.nproc > 1:
+            return contract_2e_mp(eri, fcivec, norb, nelec, link_index,
+                                  self.nproc, self.max_memory)
         return contract_2e(eri, fcivec, norb, nelec, link_index, **kwargs)
 
     def get_init_guess(self, norb, nelec, nroots, hdiag):
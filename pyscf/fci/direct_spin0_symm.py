@@ -106,6 +106,21 @@ def contract_2e(eri, fcivec, norb, nelec, link_index=None, orbsym=None, wfnsym=0
             lib.takebak_2d(ci1new, ci1[ir], aidx[ir], aidx[wfnsym^ir])
     return lib.transpose_sum(ci1new, inplace=True).reshape(fcivec_shape)
 
+def contract_2e_mp(eri, fcivec, norb, nelec, link_index=None, orbsym=None,
+                   wfnsym=0, nproc=None, max_memory=2000):
+    '''Same to :func:`contract_2e` but the strings are distributed over
+    multiple processes.  See :func:`direct_spin1_symm.contract_2e_mp`.
+    '''
+    if link_index is not None:
+        link_index = (link_index, link_index)
+    ci1 = direct_spin1_symm.contract_2e_mp(eri, fcivec, norb, nelec,
+                                           link_index, orbsym, wfnsym,
+                                           nproc, max_memory)
+    na = int(numpy.sqrt(ci1.size))
+    ci1 = lib.transpose_sum(ci1.reshape(na,na), inplace=True)
+    ci1 *= .5
+    return ci1.reshape(fcivec.shape)
+
 
 def kernel(h1e, eri, norb, nelec, ci0=None, level_shift=1e-3, tol=1e-10,
            lindep=1e-14, max_cycle=50, max_space=12, nroots=1,
@@ -229,6 +244,9 @@ class FCISolver(direct_spin0.FCISolver):
         if wfnsym is None: wfnsym = self.wfnsym
         wfnsym = direct_spin1_symm._id_wfnsym(self, norb, nelec, orbsym,
                                               wfnsym)
+        if self.nproc > 1:
+            return contract_2e_mp(eri, fcivec, norb, nelec, link_index,
+                                  orbsym, wfnsym, self.nproc, self.max_memory)
         return contract_2e(eri, fcivec, norb, nelec, link_index, orbsym, wfnsym, **kwargs)
 
     def get_init_guess(self, norb, nelec, nroots, hdiag):
@@ -140,6 +140,130 @@ def contract_2e(eri, fcivec, norb, nelec, link_index=None):
                                 link_indexb.ctypes.data_as(ctypes.c_void_p))
     return ci1
 
+def contract_2e_partial(eri, fcivec, norb, nelec, link_index=None,
+                        stra_start=0, stra_end=None, max_memory=2000):
+    '''Rows [stra_start:stra_end] of the sigma vector of :func:`contract_2e`.
+
+    The sigma vector is decomposed into the alpha-alpha, beta-beta and
+    alpha-beta parts.  All parts are evaluated by gathering the input CI
+    vector through the link tables of the output strings.  The rows of sigma
+    vector can thus be computed independently from the full input fcivec.
+    This function can be used by MPI programs, e.g. each process computes
+    its slice of alpha strings and the slices are assembled with allgather.
+
+    Returns:
+        2D array of shape (stra_end-stra_start, num_beta_strings)
+    '''
+    eri = ao2mo.restore(4, eri, norb)
+    link_indexa, link_indexb = _unpack(norb, nelec, link_index)
+    na = link_indexa.shape[0]
+    nb = link_indexb.shape[0]
+    fcivec = numpy.asarray(fcivec).reshape(na,nb)
+    if stra_end is None:
+        stra_end = na
+
+    ci1 = _contract_2e_ss(eri, fcivec, link_indexa, stra_start, stra_end,
+                          max_memory)
+    ci1 += _contract_2e_ab(eri, fcivec, link_indexa, link_indexb,
+                           stra_start, stra_end, max_memory)
+    # beta-beta, for all beta strings of the alpha slice
+    ci1 += _contract_2e_ss(eri, fcivec[stra_start:stra_end].T, link_indexb,
+                           0, nb, max_memory).T
+    return ci1
+
+def _make_h_ss(eri, link_index, r0, r1):
+    '''Same-spin Hamiltonian (sparse) of rows r0:r1,
+    H[I,J] = sum_K <I|E_pq|K> eri[pq,rs] <K|E_rs|J>'''
+    import scipy.sparse
+    nstr = link_index.shape[0]
+    tab1 = link_index[r0:r1]
+    tab2 = link_index[tab1[:,:,2]]
+    val = tab1[:,:,3,None] * tab2[:,:,:,3]
+    val = val * eri[tab1[:,:,0,None], tab2[:,:,:,0]]
+    rows = numpy.repeat(numpy.arange(r1-r0), tab2[0].size//4)
+    h = scipy.sparse.coo_matrix((val.ravel(), (rows, tab2[:,:,:,2].ravel())),
+                                shape=(r1-r0,nstr))
+    return h.tocsr()
+
+def _contract_2e_ss(eri, fcivec, link_index, r0, r1, max_memory=2000):
+    '''Rows r0:r1 of the same-spin part of the sigma vector.  The first
+    dimension of fcivec is indexed by the strings of link_index.  The
+    Hamiltonian is generated for the rows r0:r1 only.'''
+    nlink = link_index.shape[1]
+    ci1 = numpy.empty((r1-r0, fcivec.shape[1]))
+    blksize = max(1, int(max_memory*.5 / (nlink**2*3*8e-6)))
+    for p0, p1 in lib.prange(r0, r1, blksize):
+        h_ss = _make_h_ss(eri, link_index, p0, p1)
+        ci1[p0-r0:p1-r0] = h_ss.dot(fcivec)
+    return ci1
+
+def _contract_2e_ab(eri, fcivec, link_indexa, link_indexb, i0, i1,
+                    max_memory=2000):
+    '''Rows i0:i1 (alpha strings) of the alpha-beta part of the sigma
+    vector'''
+    npair = eri.shape[0]
+    nb, nlinkb = link_indexb.shape[:2]
+    tb = link_indexb[:,:,0]
+    strb = link_indexb[:,:,2]
+    signb = link_indexb[:,:,3]
+    ci1 = numpy.empty((i1-i0, nb))
+    mem_row = (npair*nb*2 + nb*nlinkb) * 8e-6
+    blksize = max(1, int(max_memory*.5/mem_row))
+    for p0, p1 in lib.prange(i0, i1, blksize):
+        # The factor 2 is due to E^a_pq E^b_rs and E^b_pq E^a_rs
+        taba = link_indexa[p0:p1]
+        t1 = numpy.zeros((npair,p1-p0,nb))
+        t1[taba[:,:,0], numpy.arange(p1-p0)[:,None]] = \
+                taba[:,:,3,None] * fcivec[taba[:,:,2]]
+        g = numpy.dot(eri, t1.reshape(npair,-1)).reshape(npair,p1-p0,nb)
+        t1 = None
+        g = g.transpose(1,0,2)[:,tb,strb]
+        ci1[p0-i0:p1-i0] = numpy.einsum('ibl,bl->ib', g, signb) * 2
+        g = None
+    return ci1
+
+def contract_2e_mp(eri, fcivec, norb, nelec, link_index=None, nproc=None,
+                   max_memory=2000):
+    '''Same to :func:`contract_2e` but the strings are distributed over
+    multiple processes.  Each process computes the alpha-alpha and
+    alpha-beta parts for a slice of alpha strings, and the beta-beta part for
+    a slice of beta strings.  The same-spin Hamiltonian is thus generated
+    only once for each string.  The input CI vector is shared by the
+    processes in memory.
+
+    Kwargs:
+        nproc : int
+            Number of processes.  Default is lib.num_threads().  For
+            nproc=1, the C implementation :func:`contract_2e` is called.
+    '''
+    link_indexa, link_indexb = _unpack(norb, nelec, link_index)
+    na = link_indexa.shape[0]
+    nb = link_indexb.shape[0]
+    fcivec = numpy.asarray(fcivec, order='C')
+    assert(fcivec.size == na*nb)
+    if nproc is None:
+        nproc = lib.num_threads()
+    nproc = max(1, min(nproc, na))
+    if nproc == 1:
+        return contract_2e(eri, fcivec, norb, nelec, (link_indexa, link_indexb))
+
+    eri = ao2mo.restore(4, eri, norb)
+    ci0 = fcivec.reshape(na,nb)
+    mem_now = max_memory / nproc
+    def sigma_slice(i0, i1, j0, j1):
+        ci1 = _contract_2e_ss(eri, ci0, link_indexa, i0, i1, mem_now)
+        ci1 += _contract_2e_ab(eri, ci0, link_indexa, link_indexb,
+                               i0, i1, mem_now)
+        ci1T = _contract_2e_ss(eri, ci0.T, link_indexb, j0, j1, mem_now)
+        return ci1, ci1T
+
+    slices = [(na*k//nproc, na*(k+1)//nproc, nb*k//nproc, nb*(k+1)//nproc)
+              for k in range(nproc)]
+    out = lib.map_in_processes(sigma_slice, slices, nproc)
+    ci1 = numpy.vstack([x[0] for x in out])
+    ci1 += numpy.vstack([x[1] for x in out]).T
+    return ci1.reshape(fcivec.shape)
+
 def make_hdiag(h1e, eri, norb, nelec):
     '''Diagonal Hamiltonian for Davidson preconditioner
     '''
@@ -611,6 +735,10 @@ class FCISolver(lib.StreamObject):
         wfnsym : str or int
             Symmetry of wavefunction.  It is used only in direct_spin1_symm
             and direct_spin0_symm solver.
+        nproc : int
+            Number of processes to compute the sigma vector (see
+            :func:`contract_2e_mp`).  The alpha strings are distributed over
+            the processes.  Default is 1, the OpenMP-threaded kernel.
 
     Saved results
 
@@ -652,6 +780,7 @@ class FCISolver(lib.StreamObject):
     pspace_size = getattr(__config__, 'fci_direct_spin1_FCI_pspace_size', 400)
     threads = getattr(__config__, 'fci_direct_spin1_FCI_threads', None)
     lessio = getattr(__config__, 'fci_direct_spin1_FCI_lessio', False)
+    nproc = getattr(__config__, 'fci_direct_spin1_FCI_nproc', 1)
 
     def __init__(self, mol=None):
         if mol is None:
@@ -678,7 +807,7 @@ class FCISolver(lib.StreamObject):
 
         keys = set(('max_cycle', 'max_space', 'conv_tol', 'lindep',
                     'level_shift', 'davidson_only', 'pspace_size', 'threads',
-                    'lessio'))
+                    'lessio', 'nproc'))
         self._keys = set(self.__dict__.keys()).union(keys)
 
     @property
@@ -705,6 +834,8 @@ class FCISolver(lib.StreamObject):
         log.info('nroots = %d', self.nroots)
         log.info('pspace_size = %d', self.pspace_size)
         log.info('spin = %s', self.spin)
+        if self.nproc > 1:
+            log.info('nproc = %d', self.nproc)
         return self
 
     @lib.with_doc(absorb_h1e.__doc__)
@@ -730,6 +861,9 @@ class FCISolver(lib.StreamObject):
     @lib.with_doc(contract_2e.__doc__)
     def contract_2e(self, eri, fcivec, norb, nelec, link_index=None, **kwargs):
         nelec = _unpack_nelec(nelec, self.spin)
+        if self.nproc > 1:
+            return contract_2e_mp(eri, fcivec, norb, nelec, link_index,
+                                  self.nproc, self.max_memory)
         return contract_2e(eri, fcivec, norb, nelec, link_index, **kwargs)
 
     def eig(self, op, x0=None, precond=None, **kwargs):
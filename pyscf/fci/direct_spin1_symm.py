@@ -131,6 +131,32 @@ def contract_2e(eri, fcivec, norb, nelec, link_index=None, orbsym=None, wfnsym=0
             lib.takebak_2d(ci1new, lib.transpose(ci1[ir]), aidx[wfnsym^ir], bidx[ir])
     return ci1new.reshape(fcivec_shape)
 
+def contract_2e_mp(eri, fcivec, norb, nelec, link_index=None, orbsym=None,
+                   wfnsym=0, nproc=None, max_memory=2000):
+    '''Same to :func:`contract_2e` but the strings are distributed over
+    multiple processes (see :func:`direct_spin1.contract_2e_mp`).  The
+    components of fcivec and sigma vector which do not belong to the irrep
+    wfnsym are discarded.
+    '''
+    if orbsym is None:
+        return direct_spin1.contract_2e_mp(eri, fcivec, norb, nelec,
+                                           link_index, nproc, max_memory)
+
+    neleca, nelecb = _unpack_nelec(nelec)
+    strsa = cistring.gen_strings4orblist(range(norb), neleca)
+    airreps = birreps = _gen_strs_irrep(strsa, orbsym)
+    if neleca != nelecb:
+        strsb = cistring.gen_strings4orblist(range(norb), nelecb)
+        birreps = _gen_strs_irrep(strsb, orbsym)
+    mask = (airreps[:,None] ^ birreps) == wfnsym
+
+    ci0 = numpy.zeros(mask.shape)
+    ci0[mask] = numpy.asarray(fcivec).reshape(mask.shape)[mask]
+    ci1 = direct_spin1.contract_2e_mp(eri, ci0, norb, nelec, link_index,
+                                      nproc, max_memory)
+    ci1[~mask] = 0
+    return ci1.reshape(fcivec.shape)
+
 
 def kernel(h1e, eri, norb, nelec, ci0=None, level_shift=1e-3, tol=1e-10,
            lindep=1e-14, max_cycle=50, max_space=12, nroots=1,
@@ -317,6 +343,9 @@ class FCISolver(direct_spin1.FCISolver):
         if wfnsym is None: wfnsym = self.wfnsym
         wfnsym = _id_wfnsym(self, norb, nelec, orbsym, wfnsym)
         nelec = _unpack_nelec(nelec, self.spin)
+        if self.nproc > 1:
+            return contract_2e_mp(eri, fcivec, norb, nelec, link_index,
+                                  orbsym, wfnsym, self.nproc, self.max_memory)
         return contract_2e(eri, fcivec, norb, nelec, link_index, orbsym, wfnsym, **kwargs)
 
     def get_init_guess(self, norb, nelec, nroots, hdiag):
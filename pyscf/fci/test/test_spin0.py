@@ -71,6 +71,15 @@ class KnownValues(unittest.TestCase):
         self.assertTrue(numpy.allclose(ci1ref, ci1))
         self.assertAlmostEqual(numpy.linalg.norm(ci1), 15.076640155228787, 7)
 
+    def test_contract_2e_mp(self):
+        ci1ref = fci.direct_spin0.contract_2e(g2e, ci0, norb, nelec)
+        ci1 = fci.direct_spin0.contract_2e_mp(g2e, ci0, norb, nelec, nproc=2)
+        self.assertAlmostEqual(abs(ci1 - ci1ref).max(), 0, 9)
+        sol = fci.direct_spin0.FCI(mol)
+        sol.nproc = 2
+        e, c = sol.kernel(h1e, g2e, norb, nelec)
+        self.assertAlmostEqual(e, -9.1491239851241737, 8)
+
     def test_kernel(self):
         e, c = fci.direct_spin0.kernel(h1e, g2e, norb, nelec)
         self.assertAlmostEqual(e, -9.1491239851241737, 8)
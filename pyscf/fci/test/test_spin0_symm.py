@@ -67,6 +67,20 @@ class KnownValues(unittest.TestCase):
         ci1 = cis.contract_2e(g2e, ci1, norb, nelec, wfnsym=3)
         self.assertAlmostEqual(numpy.linalg.norm(ci1), 81.010497935954916, 9)
 
+    def test_contract_2e_mp(self):
+        ci1 = fci.addons.symmetrize_wfn(ci0, norb, nelec, orbsym, wfnsym=1)
+        ci1ref = cis.contract_2e(g2e, ci1, norb, nelec, wfnsym=1)
+        ci1 = fci.direct_spin0_symm.contract_2e_mp(g2e, ci1, norb, nelec,
+                                                   orbsym=orbsym, wfnsym=1,
+                                                   nproc=2)
+        self.assertAlmostEqual(abs(ci1 - ci1ref).max(), 0, 9)
+
+        sol = fci.direct_spin0_symm.FCISolver(mol)
+        sol.orbsym = orbsym
+        sol.nproc = 2
+        e, c = sol.kernel(h1e, g2e, norb, nelec)
+        self.assertAlmostEqual(e, -84.200905534209554, 8)
+
     def test_kernel(self):
         e, c = fci.direct_spin0_symm.kernel(h1e, g2e, norb, nelec, orbsym=orbsym)
         self.assertAlmostEqual(e, -84.200905534209554, 8)
@@ -89,6 +89,20 @@ class KnownValues(unittest.TestCase):
         e, c = sol.kernel(h1e, g2e, norb, neleci)
         self.assertAlmostEqual(e, -8.7498253981782, 8)
 
+    def test_contract_2e_mp(self):
+        ci1ref = fci.direct_spin1.contract_2e(g2e, ci2, norb, neleci)
+        ci1 = fci.direct_spin1.contract_2e_partial(g2e, ci2, norb, neleci,
+                                                   stra_start=3, stra_end=11)
+        self.assertAlmostEqual(abs(ci1 - ci1ref[3:11]).max(), 0, 9)
+        ci1 = fci.direct_spin1.contract_2e_mp(g2e, ci2, norb, neleci, nproc=3)
+        self.assertAlmostEqual(abs(ci1 - ci1ref).max(), 0, 9)
+
+        sol = fci.direct_spin1.FCI(mol)
+        sol.nproc = 2
+        sol.davidson_only = True
+        e, c = sol.kernel(h1e, g2e, norb, nelec)
+        self.assertAlmostEqual(e, -8.9347029192929, 8)
+
     def test_hdiag(self):
         hdiagref = fci.direct_spin0.make_hdiag(h1e, g2e, norb, mol.nelectron)
         hdiag = fci.direct_spin1.make_hdiag(h1e, g2e, norb, nelec)
@@ -30,6 +30,7 @@ from pyscf.lib import logger
 from pyscf.scf import _vhf
 from pyscf.scf import cphf
 from pyscf.scf import _response_functions
+from pyscf import __config__
 
 
 # import pyscf.grad.rhf to activate nuc_grad_method method
@@ -125,64 +126,80 @@ def _partial_hess_ejk(hessobj, mo_energy=None, mo_coeff=None, mo_occ=None,
     hcore_deriv = hessobj.hcore_generator(mol)
     s1aa, s1ab, s1a = get_ovlp(mol)
 
-    vj1_diag, vk1_diag = \
-            _get_jk(mol, 'int2e_ipip1', 9, 's2kl',
-                    ['lk->s1ij', dm0,   # vj1
-                     'jk->s1il', dm0],  # vk1
-                    vhfopt=_make_vhfopt(mol, dm0, 'ipip1', 'int2e_ipip1ipip2'))
-    vj1_diag = vj1_diag.reshape(3,3,nao,nao)
-    vk1_diag = vk1_diag.reshape(3,3,nao,nao)
-    t1 = log.timer_debug1('contracting int2e_ipip1', *t1)
-
+    ipip1_opt = _make_vhfopt(mol, dm0, 'ipip1', 'int2e_ipip1ipip2')
     ip1ip2_opt = _make_vhfopt(mol, dm0, 'ip1ip2', 'int2e_ip1ip2')
     ipvip1_opt = _make_vhfopt(mol, dm0, 'ipvip1', 'int2e_ipvip1ipvip2')
     aoslices = mol.aoslice_by_atom()
-    e1 = numpy.zeros((mol.natm,mol.natm,3,3))
-    ej = numpy.zeros((mol.natm,mol.natm,3,3))
-    ek = numpy.zeros((mol.natm,mol.natm,3,3))
-    for i0, ia in enumerate(atmlst):
+
+    # The integral derivatives of each pair of atoms (ia, ja), ja <= ia, are
+    # an independent task which produces the block (ia, ja) of the hessian.
+    def hess_atom_pair(i0, j0):
+        t1 = (time.clock(), time.time())
+        ia = atmlst[i0]
+        ja = atmlst[j0]
         shl0, shl1, p0, p1 = aoslices[ia]
-        shls_slice = (shl0, shl1) + (0, mol.nbas)*3
+        qshl0, qshl1, q0, q1 = aoslices[ja]
+        e1 = numpy.zeros((3,3))
+        ej = numpy.zeros((3,3))
+        ek = numpy.zeros((3,3))
+
+        if i0 == j0:
+            shls_slice = (shl0, shl1) + (0, mol.nbas)*3
+            vj1_diag, vk1_diag = \
+                    _get_jk(mol, 'int2e_ipip1', 9, 's2kl',
+                            ['lk->s1ij', dm0,   # vj1
+                             'jk->s1il', dm0],  # vk1
+                            shls_slice=shls_slice, vhfopt=ipip1_opt)
+            vj1_diag = vj1_diag.reshape(3,3,p1-p0,nao)
+            vk1_diag = vk1_diag.reshape(3,3,p1-p0,nao)
+            ej += numpy.einsum('xypq,pq->xy', vj1_diag, dm0[p0:p1])*2
+            ek += numpy.einsum('xypq,pq->xy', vk1_diag, dm0[p0:p1])
+            e1 -= numpy.einsum('xypq,pq->xy', s1aa[:,:,p0:p1], dme0[p0:p1])*2
+
+        shls_slice = (shl0, shl1, 0, mol.nbas, qshl0, qshl1, 0, mol.nbas)
         vj1, vk1, vk2 = _get_jk(mol, 'int2e_ip1ip2', 9, 's1',
                                 ['ji->s1kl', dm0[:,p0:p1],  # vj1
                                  'li->s1kj', dm0[:,p0:p1],  # vk1
                                  'lj->s1ki', dm0         ], # vk2
                                 shls_slice=shls_slice, vhfopt=ip1ip2_opt)
         vk1[:,:,p0:p1] += vk2
-        t1 = log.timer_debug1('contracting int2e_ip1ip2 for atom %d'%ia, *t1)
+        shls_slice = (shl0, shl1, qshl0, qshl1, 0, mol.nbas, 0, mol.nbas)
         vj2, vk2 = _get_jk(mol, 'int2e_ipvip1', 9, 's2kl',
                            ['lk->s1ij', dm0         ,  # vj1
                             'li->s1kj', dm0[:,p0:p1]], # vk1
                            shls_slice=shls_slice, vhfopt=ipvip1_opt)
         vj1[:,:,p0:p1] += vj2.transpose(0,2,1) * .5
         vk1 += vk2.transpose(0,2,1)
-        vj1 = vj1.reshape(3,3,nao,nao)
-        vk1 = vk1.reshape(3,3,nao,nao)
-        t1 = log.timer_debug1('contracting int2e_ipvip1 for atom %d'%ia, *t1)
-
-        s1ao = numpy.zeros((3,nao,nao))
-        s1ao[:,p0:p1] += s1a[:,p0:p1]
-        s1ao[:,:,p0:p1] += s1a[:,p0:p1].transpose(0,2,1)
-        s1oo = numpy.einsum('xpq,pi,qj->xij', s1ao, mocc, mocc)
-
-        ej[i0,i0] += numpy.einsum('xypq,pq->xy', vj1_diag[:,:,p0:p1], dm0[p0:p1])*2
-        ek[i0,i0] += numpy.einsum('xypq,pq->xy', vk1_diag[:,:,p0:p1], dm0[p0:p1])
-        e1[i0,i0] -= numpy.einsum('xypq,pq->xy', s1aa[:,:,p0:p1], dme0[p0:p1])*2
+        vj1 = vj1.reshape(3,3,q1-q0,nao)
+        vk1 = vk1.reshape(3,3,q1-q0,nao)
 
-        for j0, ja in enumerate(atmlst[:i0+1]):
-            q0, q1 = aoslices[ja][2:]
-            # *2 for +c.c.
-            ej[i0,j0] += numpy.einsum('xypq,pq->xy', vj1[:,:,q0:q1], dm0[q0:q1])*4
-            ek[i0,j0] += numpy.einsum('xypq,pq->xy', vk1[:,:,q0:q1], dm0[q0:q1])
-            e1[i0,j0] -= numpy.einsum('xypq,pq->xy', s1ab[:,:,p0:p1,q0:q1], dme0[p0:p1,q0:q1])*2
+        # *2 for +c.c.
+        ej += numpy.einsum('xypq,pq->xy', vj1, dm0[q0:q1])*4
+        ek += numpy.einsum('xypq,pq->xy', vk1, dm0[q0:q1])
+        e1 -= numpy.einsum('xypq,pq->xy', s1ab[:,:,p0:p1,q0:q1], dme0[p0:p1,q0:q1])*2
 
-            h1ao = hcore_deriv(ia, ja)
-            e1[i0,j0] += numpy.einsum('xypq,pq->xy', h1ao, dm0)
+        h1ao = hcore_deriv(ia, ja)
+        e1 += numpy.einsum('xypq,pq->xy', h1ao, dm0)
+        log.timer_debug1('hessian block of atoms (%d, %d)' % (ia, ja), *t1)
+        return e1, ej, ek
 
-        for j0 in range(i0):
-            e1[j0,i0] = e1[i0,j0].T
-            ej[j0,i0] = ej[i0,j0].T
-            ek[j0,i0] = ek[i0,j0].T
+    natm = mol.natm
+    pairs = [(i0, j0) for i0 in range(len(atmlst)) for j0 in range(i0+1)]
+    nao_atm = [aoslices[ia][3] - aoslices[ia][2] for ia in atmlst]
+    cost = [nao_atm[i0] * (nao_atm[j0] + (i0 == j0) * nao) for i0, j0 in pairs]
+    blks = lib.map_in_processes(hess_atom_pair, pairs,
+                                getattr(hessobj, 'nproc', 1), cost)
+    e1 = numpy.zeros((natm,natm,3,3))
+    ej = numpy.zeros((natm,natm,3,3))
+    ek = numpy.zeros((natm,natm,3,3))
+    for (i0, j0), (e1blk, ejblk, ekblk) in zip(pairs, blks):
+        e1[i0,j0] = e1blk
+        ej[i0,j0] = ejblk
+        ek[i0,j0] = ekblk
+        if j0 < i0:
+            e1[j0,i0] = e1blk.T
+            ej[j0,i0] = ejblk.T
+            ek[j0,i0] = ekblk.T
 
     log.timer('RHF partial hessian', *time0)
     return e1, ej, ek
@@ -227,8 +244,8 @@ def make_h1(hessobj, mo_coeff, mo_occ, chkfile=None, atmlst=None, verbose=None):
     hcore_deriv = hessobj.base.nuc_grad_method().hcore_generator(mol)
 
     aoslices = mol.aoslice_by_atom()
-    h1ao = [None] * mol.natm
-    for i0, ia in enumerate(atmlst):
+    atmlst = list(atmlst)
+    def h1_atom(ia):
         shl0, shl1, p0, p1 = aoslices[ia]
         shls_slice = (shl0, shl1) + (0, mol.nbas)*3
         vj1, vj2, vk1, vk2 = _get_jk(mol, 'int2e_ip1', 3, 's2kl',
@@ -241,12 +258,29 @@ def make_h1(hessobj, mo_coeff, mo_occ, chkfile=None, atmlst=None, verbose=None):
         vhf[:,p0:p1] += vj2 - vk2*.5
         h1 = vhf + vhf.transpose(0,2,1)
         h1 += hcore_deriv(ia)
+        return h1
 
-        if chkfile is None:
-            h1ao[ia] = h1
-        else:
-            key = 'scf_f1ao/%d' % ia
-            lib.chkfile.save(chkfile, key, h1)
+    # When h1ao is saved in chkfile, the atoms are processed in batches so
+    # that at most max_memory of h1ao is held in memory.
+    if chkfile is None:
+        blksize = len(atmlst)
+    else:
+        max_memory = max(2000, hessobj.max_memory - lib.current_memory()[0])
+        blksize = max(1, int(max_memory*.5e6/8/(3*nao**2)))
+    nproc = getattr(hessobj, 'nproc', 1)
+
+    h1ao = [None] * mol.natm
+    for ia0, ia1 in lib.prange(0, len(atmlst), blksize):
+        atms = atmlst[ia0:ia1]
+        cost = [aoslices[ia][3] - aoslices[ia][2] for ia in atms]
+        h1 = lib.map_in_processes(h1_atom, [(ia,) for ia in atms], nproc, cost)
+        for k, ia in enumerate(atms):
+            if chkfile is None:
+                h1ao[ia] = h1[k]
+            else:
+                key = 'scf_f1ao/%d' % ia
+                lib.chkfile.save(chkfile, key, h1[k])
+        h1 = None
     if chkfile is None:
         return h1ao
     else:
@@ -300,13 +334,16 @@ def _get_jk(mol, intor, comp, aosym, script_dms,
     return vs
 
 def solve_mo1(mf, mo_energy, mo_coeff, mo_occ, h1ao_or_chkfile,
-              fx=None, atmlst=None, max_memory=4000, verbose=None):
+              fx=None, atmlst=None, max_memory=4000, verbose=None, nproc=1):
     '''Solve the first order equation
 
     Kwargs:
         fx : function(dm_mo) => v1_mo
             A function to generate the induced potential.
             See also the function gen_vind.
+        nproc : int
+            Number of processes to solve the CPHF equations of different
+            blocks of atoms.
     '''
     mol = mf.mol
     if atmlst is None: atmlst = range(mol.natm)
@@ -322,44 +359,60 @@ def solve_mo1(mf, mo_energy, mo_coeff, mo_occ, h1ao_or_chkfile,
     def _ao2mo(mat):
         return numpy.asarray([reduce(numpy.dot, (mo_coeff.T, x, mocc)) for x in mat])
 
+    def _solve(h1vo, s1vo, space):
+        mo1, e1 = cphf.solve(fx, mo_energy, mo_occ, h1vo, s1vo, space=space)
+        mo1 = numpy.einsum('pq,xqi->xpi', mo_coeff, mo1).reshape(-1,3,nao,nocc)
+        e1 = e1.reshape(-1,3,nocc,nocc)
+        return mo1, e1
+
+    natm = len(atmlst)
+    nproc = max(1, min(nproc, natm))
     mem_now = lib.current_memory()[0]
     max_memory = max(2000, max_memory*.9-mem_now)
-    blksize = max(2, int(max_memory*1e6/8 / (nmo*nocc*3*6)))
+    blksize = max(2, int(max_memory/nproc*1e6/8 / (nmo*nocc*3*6)))
+    if nproc > 1:
+        blksize = min(blksize, (natm+nproc-1) // nproc)
+    blocks = list(lib.prange(0, natm, blksize))
     mo1s = [None] * mol.natm
     e1s = [None] * mol.natm
     aoslices = mol.aoslice_by_atom()
-    for ia0, ia1 in lib.prange(0, len(atmlst), blksize):
-        s1vo = []
-        h1vo = []
-        for i0 in range(ia0, ia1):
-            ia = atmlst[i0]
-            shl0, shl1, p0, p1 = aoslices[ia]
-            s1ao = numpy.zeros((3,nao,nao))
-            s1ao[:,p0:p1] += s1a[:,p0:p1]
-            s1ao[:,:,p0:p1] += s1a[:,p0:p1].transpose(0,2,1)
-            s1vo.append(_ao2mo(s1ao))
-            if isinstance(h1ao_or_chkfile, str):
-                key = 'scf_f1ao/%d' % ia
-                h1ao = lib.chkfile.load(h1ao_or_chkfile, key)
-            else:
-                h1ao = h1ao_or_chkfile[ia]
-            h1vo.append(_ao2mo(h1ao))
-
-        h1vo = numpy.vstack(h1vo)
-        s1vo = numpy.vstack(s1vo)
-        mo1, e1 = cphf.solve(fx, mo_energy, mo_occ, h1vo, s1vo)
-        mo1 = numpy.einsum('pq,xqi->xpi', mo_coeff, mo1).reshape(-1,3,nao,nocc)
-        e1 = e1.reshape(-1,3,nocc,nocc)
-
-        for k in range(ia1-ia0):
-            ia = atmlst[k+ia0]
-            if isinstance(h1ao_or_chkfile, str):
-                key = 'scf_mo1/%d' % ia
-                lib.chkfile.save(h1ao_or_chkfile, key, mo1[k])
-            else:
-                mo1s[ia] = mo1[k]
-            e1s[ia] = e1[k].reshape(3,nocc,nocc)
-        mo1 = e1 = None
+    # In serial mode, the Krylov subspace is shared by the CPHF equations of
+    # all atoms.  Otherwise each process has its own subspace.
+    space = []
+    for b0, b1 in lib.prange(0, len(blocks), nproc):
+        tasks = []
+        for ia0, ia1 in blocks[b0:b1]:
+            s1vo = []
+            h1vo = []
+            for i0 in range(ia0, ia1):
+                ia = atmlst[i0]
+                shl0, shl1, p0, p1 = aoslices[ia]
+                s1ao = numpy.zeros((3,nao,nao))
+                s1ao[:,p0:p1] += s1a[:,p0:p1]
+                s1ao[:,:,p0:p1] += s1a[:,p0:p1].transpose(0,2,1)
+                s1vo.append(_ao2mo(s1ao))
+                if isinstance(h1ao_or_chkfile, str):
+                    key = 'scf_f1ao/%d' % ia
+                    h1ao = lib.chkfile.load(h1ao_or_chkfile, key)
+                else:
+                    h1ao = h1ao_or_chkfile[ia]
+                h1vo.append(_ao2mo(h1ao))
+            tasks.append((numpy.vstack(h1vo), numpy.vstack(s1vo),
+                          space if nproc == 1 else []))
+
+        results = lib.map_in_processes(_solve, tasks, nproc)
+        tasks = None
+
+        for (ia0, ia1), (mo1, e1) in zip(blocks[b0:b1], results):
+            for k in range(ia1-ia0):
+                ia = atmlst[k+ia0]
+                if isinstance(h1ao_or_chkfile, str):
+                    key = 'scf_mo1/%d' % ia
+                    lib.chkfile.save(h1ao_or_chkfile, key, mo1[k])
+                else:
+                    mo1s[ia] = mo1[k]
+                e1s[ia] = e1[k].reshape(3,nocc,nocc)
+        results = mo1 = e1 = None
 
     if isinstance(h1ao_or_chkfile, str):
         return h1ao_or_chkfile, e1s
@@ -474,7 +527,17 @@ def gen_hop(hobj, mo_energy=None, mo_coeff=None, mo_occ=None, verbose=None):
 
 
 class Hessian(lib.StreamObject):
-    '''Non-relativistic restricted Hartree-Fock hessian'''
+    '''Non-relativistic restricted Hartree-Fock hessian
+
+    Attributes:
+        nproc : int
+            Number of processes to compute the integral derivatives of
+            different atoms (in partial_hess_elec and make_h1) and to solve
+            the CPHF equations of different atoms (in solve_mo1).
+    '''
+
+    nproc = getattr(__config__, 'hessian_rhf_Hessian_nproc', 1)
+
     def __init__(self, scf_method):
         self.verbose = scf_method.verbose
         self.stdout = scf_method.stdout
@@ -566,7 +629,7 @@ class Hessian(lib.StreamObject):
     def solve_mo1(self, mo_energy, mo_coeff, mo_occ, h1ao_or_chkfile,
                   fx=None, atmlst=None, max_memory=4000, verbose=None):
         return solve_mo1(self.base, mo_energy, mo_coeff, mo_occ, h1ao_or_chkfile,
-                         fx, atmlst, max_memory, verbose)
+                         fx, atmlst, max_memory, verbose, self.nproc)
 
     def hess_nuc(self, mol=None, atmlst=None):
         if mol is None: mol = self.mol
@@ -14,6 +14,7 @@
 # limitations under the License.
 
 import unittest
+import tempfile
 import numpy
 from pyscf import gto, scf, lib
 from pyscf import grad, hessian
@@ -101,6 +102,18 @@ class KnownValues(unittest.TestCase):
 #        e2 = mfs(mol.set_geom_('Cu 0 0 0; H 0 0 1.4999'))[1]
 #        self.assertAlmostEqual(abs(hess[1,:,2] - (e1-e2)/0.0002*lib.param.BOHR).max(), 0, 5)
 
+    def test_hess_nproc(self):
+        mol = gto.M(atom='O 0 0 0; H 0 -.757 .587; H 0 .757 .587',
+                    basis='631g', verbose=0)
+        mf = scf.RHF(mol).run(conv_tol=1e-12)
+        hess = hessian.RHF(mf).kernel()
+        hobj = hessian.RHF(mf)
+        hobj.nproc = 2
+        ftmp = tempfile.NamedTemporaryFile(dir=lib.param.TMPDIR)
+        hobj.chkfile = ftmp.name
+        self.assertAlmostEqual(abs(hobj.kernel() - hess).max(), 0, 9)
+        ftmp.close()
+
 
 if __name__ == "__main__":
     print("Full Tests for RHF Hessian")
@@ -18,6 +18,7 @@
 
 import sys
 import json
+import numpy
 import h5py
 
 if sys.version_info < (3,):
@@ -74,7 +75,7 @@ def load(chkfile, key):
         return load_as_dic(key, fh5)
 load_chkfile_key = load
 
-def dump(chkfile, key, value):
+def dump(chkfile, key, value, compression=None, chunks=None):
     '''Save array(s) in chkfile
     
     Args:
@@ -87,6 +88,14 @@ def dump(chkfile, key, value):
             If value is a python dict or list, the key/value of the dict will
             be saved recursively as the HDF5 group/dataset structure.
 
+    Kwargs:
+        compression : str
+            HDF5 compression filter (e.g. 'gzip', 'lzf') for the arrays.
+            Compressed datasets are read through h5py in :func:`view` and
+            cannot be memory-mapped.
+        chunks : bool or tuple
+            HDF5 chunk shape of the arrays.  Default is contiguous storage.
+
     Returns:
         No return value
 
@@ -117,7 +126,13 @@ def dump(chkfile, key, value):
                 save_as_group('%06d'%k, v, root1)
         else:
             try:
-                root[key] = value
+                if ((compression or chunks) and
+                    isinstance(value, numpy.ndarray) and value.ndim > 0 and
+                    value.size > 0 and value.dtype != object):
+                    root.create_dataset(key, data=value, chunks=chunks,
+                                        compression=compression)
+                else:
+                    root[key] = value
             except (TypeError, ValueError) as e:
                 if not (e.args[0] == "Object dtype dtype('O') has no native HDF5 equivalent" or
                         e.args[0].startswith('could not broadcast input array')):
@@ -138,6 +153,102 @@ def dump(chkfile, key, value):
             save_as_group(key, value, fh5)
 dump_chkfile_key = save = dump
 
+def keys(chkfile, key=None):
+    '''The names of all datasets stored in chkfile (or under the group key)
+
+    Examples:
+
+    >>> lib.chkfile.keys('He.chk', 'scf')
+    ['scf/e_tot', 'scf/mo_coeff', 'scf/mo_energy', 'scf/mo_occ']
+    '''
+    names = []
+    def collect(name, obj):
+        if isinstance(obj, h5py.Dataset):
+            names.append(name.replace('__from_list__', ''))
+    with h5py.File(chkfile, 'r') as fh5:
+        if key is None:
+            fh5.visititems(collect)
+        elif isinstance(fh5.get(key, None), h5py.Dataset):
+            names.append(key)
+        else:
+            if key not in fh5:
+                key = key + '__from_list__'
+            if key in fh5:
+                fh5[key].visititems(lambda name, obj:
+                                    collect(key + '/' + name, obj))
+    return sorted(names)
+
+def view(chkfile, key=None, mmap=True):
+    '''Lazy view of the data in chkfile.  Unlike :func:`load`, nothing is
+    read from the file until a dataset is accessed.  Datasets which are
+    stored contiguously (without compression) are returned as read-only
+    numpy memory-mapped arrays if mmap is True, otherwise h5py datasets are
+    returned.  Slicing these arrays reads only the requested part.
+
+    The HDF5 file is kept open until the view is closed.
+
+    Examples:
+
+    >>> with lib.chkfile.view('He.chk', 'scf') as scf_rec:
+    ...     e_tot = scf_rec['e_tot'][()]
+    ...     mo0 = scf_rec['mo_coeff'][:,0]
+    '''
+    return _ChkfileView(h5py.File(chkfile, 'r'), key, mmap)
+
+class _ChkfileView(object):
+    def __init__(self, fh5, key=None, mmap=True):
+        self._fh5 = fh5
+        self.mmap = mmap
+        if key is None:
+            self._group = fh5
+        elif key in fh5:
+            self._group = fh5[key]
+        else:
+            self._group = fh5[key + '__from_list__']
+
+    def __getitem__(self, key):
+        group = self._group
+        if key not in group:
+            key = key + '__from_list__'
+        val = group[key]
+        if isinstance(val, h5py.Group):
+            return _ChkfileView(self._fh5, val.name, self.mmap)
+        elif self.mmap:
+            return _as_memmap(val)
+        else:
+            return val
+
+    def __contains__(self, key):
+        return key in self._group or key + '__from_list__' in self._group
+
+    def keys(self):
+        return [k.replace('__from_list__', '') for k in self._group.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def load(self, key):
+        '''Read the data of key into memory, as :func:`load` does'''
+        return load(self._fh5.filename, self._group.name.rstrip('/') + '/' + key)
+
+    def close(self):
+        self._fh5.close()
+
+    def __enter__(self):
+        return self
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+def _as_memmap(dset):
+    '''Map the dataset to a numpy.memmap if it is stored contiguously'''
+    if (dset.shape and dset.size > 0 and dset.chunks is None and
+        dset.compression is None and dset.dtype.kind in 'biufc'):
+        offset = dset.id.get_offset()
+        if offset is not None:
+            return numpy.memmap(dset.file.filename, dtype=dset.dtype, mode='r',
+                                offset=offset, shape=dset.shape)
+    return dset
+
 
 def load_mol(chkfile):
     '''Load Mole object from chkfile.
@@ -417,18 +417,17 @@ def davidson1(aop, x0, precond, tol=1e-12, max_cycle=50, max_space=12,
         elast = e
         vlast = v
         conv_last = conv
-        for i in range(space):
-            if head <= i < head+rnow:
-                axi = axt[i-head].conj()
-                for k in range(i-head+1):
-                    heff[i,head+k] = dot(axi, xt[k])
-                    heff[head+k,i] = heff[i,head+k].conj()
-            else:
-                axi = numpy.asarray(ax[i]).conj()
-                for k in range(rnow):
-                    heff[i,head+k] = dot(axi, xt[k])
-                    heff[head+k,i] = heff[i,head+k].conj()
-            axi = None
+        for i, axi in enumerate(_stream_vecs(ax, 0, head)):
+            axi = axi.conj()
+            for k in range(rnow):
+                heff[i,head+k] = dot(axi, xt[k])
+                heff[head+k,i] = heff[i,head+k].conj()
+        for i in range(head, space):
+            axi = axt[i-head].conj()
+            for k in range(i-head+1):
+                heff[i,head+k] = dot(axi, xt[k])
+                heff[head+k,i] = heff[i,head+k].conj()
+        axi = None
         xt = axt = None
 
         w, v = scipy.linalg.eigh(heff[:space,:space])
@@ -514,11 +513,10 @@ def davidson1(aop, x0, precond, tol=1e-12, max_cycle=50, max_space=12,
                     log.debug1('Throwing out eigenvector %d with norm=%4.3g', k, dx_norm[k])
         xt = [xi for xi in xt if xi is not None]
 
-        for i in range(space):
-            xsi = numpy.asarray(xs[i])
+        for xsi in _stream_vecs(xs, 0, space):
             for xi in xt:
                 xi -= xsi * dot(xsi.conj(), xi)
-            xsi = None
+        xsi = None
         norm_min = 1
         for i,xi in enumerate(xt):
             norm = numpy.sqrt(dot(xi.conj(), xi).real)
@@ -816,9 +814,8 @@ def davidson_nosym1(aop, x0, precond, tol=1e-12, max_cycle=50, max_space=12,
         for i in range(rnow):
             for k in range(rnow):
                 heff[head+k,head+i] = dot(xt[k].conj(), axt[i])
-        for i in range(head):
-            axi = numpy.asarray(ax[i])
-            xi = numpy.asarray(xs[i])
+        for i, (axi, xi) in enumerate(zip(_stream_vecs(ax, 0, head),
+                                          _stream_vecs(xs, 0, head))):
             for k in range(rnow):
                 heff[head+k,i] = dot(xt[k].conj(), axi)
                 heff[i,head+k] = dot(xi.conj(), axt[k])
@@ -906,11 +903,10 @@ def davidson_nosym1(aop, x0, precond, tol=1e-12, max_cycle=50, max_space=12,
                     xt[k] = None
         xt = [xi for xi in xt if xi is not None]
 
-        for i in range(space):
-            xsi = numpy.asarray(xs[i])
+        for xsi in _stream_vecs(xs, 0, space):
             for xi in xt:
                 xi -= xsi * dot(xsi.conj(), xi)
-            xsi = None
+        xsi = None
         norm_min = 1
         for i,xi in enumerate(xt):
             norm = numpy.sqrt(dot(xi.conj(), xi).real)
@@ -1133,39 +1129,35 @@ def dgeev1(abop, x0, precond, type=1, tol=1e-12, max_cycle=50, max_space=12,
         head, space = space, space+rnow
 
         if type == 1:
-            for i in range(space):
-                if head <= i < head+rnow:
-                    for k in range(i-head+1):
-                        heff[head+k,i] = dot(xt[k].conj(), axt[i-head])
-                        heff[i,head+k] = heff[head+k,i].conj()
-                        seff[head+k,i] = dot(xt[k].conj(), bxt[i-head])
-                        seff[i,head+k] = seff[head+k,i].conj()
-                else:
-                    axi = numpy.asarray(ax[i])
-                    bxi = numpy.asarray(bx[i])
-                    for k in range(rnow):
-                        heff[head+k,i] = dot(xt[k].conj(), axi)
-                        heff[i,head+k] = heff[head+k,i].conj()
-                        seff[head+k,i] = dot(xt[k].conj(), bxi)
-                        seff[i,head+k] = seff[head+k,i].conj()
-                axi = bxi = None
+            for i, (axi, bxi) in enumerate(zip(_stream_vecs(ax, 0, head),
+                                               _stream_vecs(bx, 0, head))):
+                for k in range(rnow):
+                    heff[head+k,i] = dot(xt[k].conj(), axi)
+                    heff[i,head+k] = heff[head+k,i].conj()
+                    seff[head+k,i] = dot(xt[k].conj(), bxi)
+                    seff[i,head+k] = seff[head+k,i].conj()
+            axi = bxi = None
+            for i in range(head, space):
+                for k in range(i-head+1):
+                    heff[head+k,i] = dot(xt[k].conj(), axt[i-head])
+                    heff[i,head+k] = heff[head+k,i].conj()
+                    seff[head+k,i] = dot(xt[k].conj(), bxt[i-head])
+                    seff[i,head+k] = seff[head+k,i].conj()
         else:
-            for i in range(space):
-                if head <= i < head+rnow:
-                    for k in range(i-head+1):
-                        heff[head+k,i] = dot(bxt[k].conj(), axt[i-head])
-                        heff[i,head+k] = heff[head+k,i].conj()
-                        seff[head+k,i] = dot(xt[k].conj(), bxt[i-head])
-                        seff[i,head+k] = seff[head+k,i].conj()
-                else:
-                    axi = numpy.asarray(ax[i])
-                    bxi = numpy.asarray(bx[i])
-                    for k in range(rnow):
-                        heff[head+k,i] = dot(bxt[k].conj(), axi)
-                        heff[i,head+k] = heff[head+k,i].conj()
-                        seff[head+k,i] = dot(xt[k].conj(), bxi)
-                        seff[i,head+k] = seff[head+k,i].conj()
-                axi = bxi = None
+            for i, (axi, bxi) in enumerate(zip(_stream_vecs(ax, 0, head),
+                                               _stream_vecs(bx, 0, head))):
+                for k in range(rnow):
+                    heff[head+k,i] = dot(bxt[k].conj(), axi)
+                    heff[i,head+k] = heff[head+k,i].conj()
+                    seff[head+k,i] = dot(xt[k].conj(), bxi)
+                    seff[i,head+k] = seff[head+k,i].conj()
+            axi = bxi = None
+            for i in range(head, space):
+                for k in range(i-head+1):
+                    heff[head+k,i] = dot(bxt[k].conj(), axt[i-head])
+                    heff[i,head+k] = heff[head+k,i].conj()
+                    seff[head+k,i] = dot(xt[k].conj(), bxt[i-head])
+                    seff[i,head+k] = seff[head+k,i].conj()
 
         w, v = scipy.linalg.eigh(heff[:space,:space], seff[:space,:space])
         if space < nroots or e.size != nroots:
@@ -1215,11 +1207,10 @@ def dgeev1(abop, x0, precond, type=1, tol=1e-12, max_cycle=50, max_space=12,
             else:
                 xt[k] = None
         xt = [xi for xi in xt if xi is not None]
-        for i in range(space):
-            xsi = numpy.asarray(xs[i])
+        for xsi in _stream_vecs(xs, 0, space):
             for xi in xt:
                 xi -= xsi * numpy.dot(xi, xsi)
-            xsi = None
+        xsi = None
         norm_min = 1
         for i,xi in enumerate(xt):
             norm = numpy_helper.norm(xi)
@@ -1347,11 +1338,10 @@ def krylov(aop, b, x0=None, tol=1e-10, max_cycle=30, dot=numpy.dot,
             callback(cycle, xs, ax)
 
         x1 = axt.copy()
-        for i in range(len(xs)):
-            xsi = numpy.asarray(xs[i])
+        for i, xsi in enumerate(_stream_vecs(xs)):
             for j, axj in enumerate(axt):
                 x1[j] -= xsi * (dot(xsi.conj(), axj) / innerprod[i])
-        axt = None
+        xsi = axt = None
 
         max_innerprod = 0
         idx = []
@@ -1405,6 +1395,165 @@ def krylov(aop, b, x0=None, tol=1e-10, max_cycle=30, dot=numpy.dot,
     return x
 
 
+def block_krylov(aop, b, x0=None, tol=1e-10, max_cycle=30,
+                 lindep=DSOLVE_LINDEP, space=None, hermi=False,
+                 max_memory=MAX_MEMORY, verbose=logger.WARN):
+    '''Block Krylov subspace method to solve  (1+a) x = b  for many right-hand
+    sides simultaneously.
+
+    All right-hand sides share one subspace.  In each iteration, the residuals
+    of the unconverged equations are orthogonalized against the subspace and
+    added to the subspace.  The equations are converged individually.  The
+    converged ones do not generate new trial vectors.
+
+    Args:
+        aop : function(x) => array_like_x
+            aop(x) to mimic the matrix vector multiplication for a block of
+            vectors.  The argument is a 2D array (nvec,ndim).  The returned
+            value has the same shape.
+        b : a vector or a 2D array (nrhs,ndim)
+
+    Kwargs:
+        x0 : array like b
+            Initial guess
+        tol : float
+            Convergence threshold for the norm of the residual of each equation
+        max_cycle : int
+            max number of iterations.
+        lindep : float
+            Linear dependency threshold for the new trial vectors.
+        space : list
+            If given, the subspace [xs, axs] is reused for the initial
+            projection, and it is updated inplace on exit.  It can be passed
+            to the next call which solves equations of the same operator
+            (e.g. the CPHF equations of different atoms).
+        hermi : bool
+            Whether the matrix a is hermitian.  If True, the lower triangular
+            part of the subspace matrix is generated from the upper
+            triangular part.
+        max_memory : float
+            Memory (in MB) to hold the subspace.  The block size of the
+            vectors passed to aop is also determined by max_memory.
+
+    Returns:
+        x : ndarray like b
+
+    Examples:
+
+    >>> from pyscf import lib
+    >>> a = numpy.random.random((10,10)) * 1e-2
+    >>> b = numpy.random.random((3,10))
+    >>> aop = lambda x: numpy.dot(x, a.T)
+    >>> x = lib.block_krylov(aop, b)
+    >>> numpy.allclose(numpy.dot(x,a.T)+x, b)
+    True
+    '''
+    if isinstance(verbose, logger.Logger):
+        log = verbose
+    else:
+        log = logger.Logger(sys.stdout, verbose)
+
+    b = numpy.asarray(b)
+    b_shape = b.shape
+    b = b.reshape(-1,b_shape[-1])
+    if x0 is not None:
+        x0 = numpy.asarray(x0).reshape(b.shape)
+        b = b - (x0 + aop(x0).reshape(b.shape))
+
+    is_complex = numpy.iscomplexobj(b)
+    if is_complex:
+        # The response operators of complex orbitals are often linear over
+        # the real numbers only (e.g. dm1 + dm1.conj().T).  Complex vectors are
+        # treated as real vectors of doubled length.
+        b = numpy.ascontiguousarray(b, dtype=numpy.complex128).view(numpy.double)
+        aop_complex = aop
+        def aop(x):
+            x = numpy.ascontiguousarray(x).view(numpy.complex128)
+            ax = numpy.asarray(aop_complex(x), dtype=numpy.complex128)
+            return numpy.ascontiguousarray(ax.reshape(x.shape)).view(numpy.double)
+    nrhs, ndim = b.shape
+
+    if space and space[0].shape[1] == ndim:
+        xs, axs = space
+        dtype = numpy.result_type(b, xs)
+    else:
+        dtype = b.dtype
+        xs = numpy.zeros((0,ndim), dtype=dtype)
+        axs = numpy.zeros((0,ndim), dtype=dtype)
+    h = numpy.dot(xs.conj(), (xs+axs).T)
+
+    blksize = int(max_memory*.1e6/b.itemsize/ndim)
+    blksize = max(1, min(nrhs, blksize))
+    log.debug1('block_krylov nrhs %d  blksize %d  initial space %d',
+               nrhs, blksize, len(xs))
+
+    bnorm = numpy.linalg.norm(b, axis=1)
+    for cycle in range(max_cycle+1):
+        if len(xs) > 0:
+            c = numpy.linalg.solve(h, numpy.dot(xs.conj(), b.T))
+            r = b - numpy.dot(c.T, xs+axs)
+        else:
+            c = numpy.zeros((0,nrhs), dtype=dtype)
+            r = b
+        rnorm = numpy.linalg.norm(r, axis=1)
+        conv = rnorm < tol
+        log.debug('block_krylov cycle %d  space %d  max|r| = %g  conv %d/%d',
+                  cycle, len(xs), rnorm.max(), numpy.count_nonzero(conv), nrhs)
+        if conv.all() or cycle == max_cycle:
+            break
+
+        # New trial vectors from the residuals of the unconverged equations
+        x1 = r[~conv]
+        r0 = rnorm[~conv]
+        for i in range(2):
+            x1 = x1 - numpy.dot(numpy.dot(x1, xs.conj().T), xs)
+        qs = []
+        for i, xi in enumerate(x1):
+            for q in qs:
+                xi -= q * numpy.dot(q.conj(), xi)
+            norm = numpy.linalg.norm(xi)
+            if norm**2 > lindep * r0[i]**2:
+                qs.append(xi / norm)
+        if not qs:
+            log.debug('block_krylov: linear dependency in trial vectors')
+            break
+        x1 = numpy.asarray(qs)
+        ax1 = numpy.empty_like(x1)
+        for p0, p1 in misc.prange(0, len(x1), blksize):
+            ax1[p0:p1] = aop(x1[p0:p1]).reshape(p1-p0,ndim)
+
+        nx = len(xs)
+        hnew = numpy.empty((nx+len(x1),)*2, dtype=h.dtype)
+        hnew[:nx,:nx] = h
+        hnew[:nx,nx:] = numpy.dot(xs.conj(), (x1+ax1).T)
+        if hermi:
+            hnew[nx:,:nx] = hnew[:nx,nx:].conj().T
+        else:
+            hnew[nx:,:nx] = numpy.dot(x1.conj(), (xs+axs).T)
+        hnew[nx:,nx:] = numpy.dot(x1.conj(), (x1+ax1).T)
+        h = hnew
+        xs = numpy.vstack((xs, x1))
+        axs = numpy.vstack((axs, ax1))
+        x1 = ax1 = hnew = None
+
+    if not conv.all():
+        log.warn('block_krylov: %d of %d equations not converged. max|r| = %g',
+                 numpy.count_nonzero(~conv), nrhs, rnorm.max())
+
+    x = numpy.dot(c.T, xs) if len(xs) > 0 else numpy.zeros_like(b)
+    if is_complex:
+        x = x.view(numpy.complex128)
+    if x0 is not None:
+        x = x + x0
+
+    if space is not None:
+        if (xs.nbytes + axs.nbytes) < max_memory*.5e6:
+            space[:] = [xs, axs]
+        else:
+            log.debug1('block_krylov: subspace too large to be saved')
+    return x.reshape(b_shape)
+
+
 def dsolve(aop, b, precond, tol=1e-12, max_cycle=30, dot=numpy.dot,
            lindep=DSOLVE_LINDEP, verbose=0, tol_residual=None):
     '''Davidson iteration to solve linear equation.  It works bad.
@@ -1480,13 +1629,39 @@ def _qr(xs, dot, lindep=1e-14):
 
 def _gen_x0(v, xs):
     space, nroots = v.shape
-    x0 = numpy.einsum('c,x->cx', v[space-1], numpy.asarray(xs[space-1]))
-    for i in reversed(range(space-1)):
-        xsi = numpy.asarray(xs[i])
-        for k in range(nroots):
-            x0[k] += v[i,k] * xsi
+    x0 = None
+    for i, xsi in enumerate(_stream_vecs(xs, 0, space)):
+        if x0 is None:
+            x0 = numpy.einsum('c,x->cx', v[i], xsi)
+        else:
+            for k in range(nroots):
+                x0[k] += v[i,k] * xsi
     return x0
 
+def _stream_vecs(xs, start=0, end=None):
+    '''Iterate over the vectors xs[start:end].  If the vectors are stored on
+    disk (:class:`_Xlist`), the next vector is read in background while the
+    current one is being processed.
+    '''
+    if end is None:
+        end = len(xs)
+    if not isinstance(xs, _Xlist) or end - start <= 1:
+        for i in range(start, end):
+            yield numpy.asarray(xs[i])
+        return
+
+    def load(i, buf):
+        buf[0] = numpy.asarray(xs[i])
+    dat = [None]
+    prefetch = [None]
+    with misc.call_in_background(load) as bload:
+        bload(start, prefetch)
+        for i in range(start+1, end):
+            dat, prefetch = prefetch, dat
+            bload(i, prefetch)
+            yield dat[0]
+    yield prefetch[0]
+
 def _sort_by_similarity(w, v, nroots, conv, vlast, emin=None, heff=None):
     if not any(conv) or vlast is None:
         return w[:nroots], v[:,:nroots]
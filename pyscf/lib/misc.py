@@ -792,6 +792,123 @@ def background_process(func, *args, **kwargs):
 bg = background = bg_thread = background_thread
 bp = bg_process = background_process
 
+def _fork_context():
+    '''multiprocessing context of the fork start method.  None if fork is
+    not supported on the platform.'''
+    import multiprocessing
+    if hasattr(multiprocessing, 'get_context'):
+        try:
+            return multiprocessing.get_context('fork')
+        except ValueError:
+            return None
+    elif os.name == 'posix':  # python2
+        return multiprocessing
+    else:
+        return None
+
+def _map_in_processes_worker(fn, args, tasks, results):
+    import traceback
+    with with_omp_threads(1):
+        while True:
+            k = tasks.get()
+            if k is None:
+                break
+            try:
+                results.put((k, fn(*args[k]), None))
+            except BaseException:
+                results.put((k, None, traceback.format_exc()))
+                break
+
+def map_in_processes(fn, args, nproc=None, cost=None):
+    '''Evaluate [fn(*arg) for arg in args] in nproc processes.
+
+    The processes are created with the fork start method, regardless of the
+    default start method of multiprocessing.  fn and args are inherited by
+    the child processes, thus they do not need to be picklable (closures are
+    allowed).  Only the task indices and the return values are transferred
+    between processes.  The tasks are dispatched dynamically, the most
+    expensive ones first.  OpenMP threading is disabled in the child
+    processes.
+
+    If fork is not available on the platform, or nproc is 1, the tasks are
+    executed in the current process.
+
+    Args:
+        fn : function
+        args : list of tuples
+            Arguments of each task
+
+    Kwargs:
+        nproc : int
+            Number of processes.  Default is num_threads().
+        cost : list of float
+            Estimated costs of the tasks, to determine the order of tasks.
+
+    Returns:
+        A list of the return values in the order of args.  An error in a
+        child process raises ProcessRuntimeError, with the traceback of the
+        child process, in the parent process.
+
+    Examples:
+
+    >>> lib.map_in_processes(numpy.dot, [(a, b), (c, d)], nproc=2)
+    '''
+    try:
+        from queue import Empty
+    except ImportError:  # python2
+        from Queue import Empty
+
+    args = list(args)
+    ntasks = len(args)
+    if nproc is None:
+        nproc = num_threads()
+    nproc = max(1, min(nproc, ntasks))
+    ctx = _fork_context()
+    if nproc == 1 or ctx is None:
+        return [fn(*arg) for arg in args]
+
+    if cost is None:
+        order = range(ntasks)
+    else:
+        order = numpy.argsort(-numpy.asarray(cost), kind='mergesort')
+    tasks = ctx.Queue()
+    for k in order:
+        tasks.put(int(k))
+    for i in range(nproc):
+        tasks.put(None)
+    results = ctx.Queue()
+
+    ps = [ctx.Process(target=_map_in_processes_worker,
+                      args=(fn, args, tasks, results)) for i in range(nproc)]
+    for p in ps:
+        p.start()
+
+    out = [None] * ntasks
+    ndone = 0
+    try:
+        while ndone < ntasks:
+            try:
+                k, val, err = results.get(timeout=.5)
+            except Empty:
+                exitcodes = [p.exitcode for p in ps]
+                if (any(x not in (None, 0) for x in exitcodes) or
+                    all(x is not None for x in exitcodes) and results.empty()):
+                    raise ProcessRuntimeError(
+                        'Subprocess terminated unexpectedly. Exit codes %s' %
+                        exitcodes)
+                continue
+            if err is not None:
+                raise ProcessRuntimeError('Error in subprocess (task %d):\n%s'
+                                          % (k, err))
+            out[k] = val
+            ndone += 1
+    finally:
+        for p in ps:
+            if ndone < ntasks and p.is_alive():
+                p.terminate()
+            p.join()
+    return out
+
 ASYNC_IO = getattr(__config__, 'ASYNC_IO', True)
 class call_in_background(object):
     '''Within this macro, function(s) can be executed asynchronously (the
@@ -60,6 +60,31 @@ class KnownValues(unittest.TestCase):
         self.assertTrue(numpy.all(a['x'][1] == dat['x'][1]))
         self.assertTrue(numpy.all(a['y'][0] == dat['y'][0]))
 
+    def test_view(self):
+        fchk = tempfile.NamedTemporaryFile()
+        a = {'mo_coeff': numpy.random.random((3,4,5)) + .5j,
+             'e_tot': 1.5,
+             'kpts': [numpy.eye(2), numpy.ones(3)]}
+        lib.chkfile.save(fchk.name, 'scf', a)
+        lib.chkfile.save(fchk.name, 'b', numpy.arange(100.).reshape(10,10),
+                         compression='gzip', chunks=(5,5))
+        self.assertEqual(lib.chkfile.keys(fchk.name),
+                         ['b', 'scf/e_tot', 'scf/kpts/000000',
+                          'scf/kpts/000001', 'scf/mo_coeff'])
+        self.assertEqual(lib.chkfile.keys(fchk.name, 'scf/kpts'),
+                         ['scf/kpts/000000', 'scf/kpts/000001'])
+
+        with lib.chkfile.view(fchk.name) as dat:
+            self.assertEqual(sorted(dat.keys()), ['b', 'scf'])
+            mo = dat['scf']['mo_coeff']
+            self.assertTrue(isinstance(mo, numpy.memmap))
+            self.assertAlmostEqual(abs(mo[1] - a['mo_coeff'][1]).max(), 0, 14)
+            self.assertEqual(dat['scf/e_tot'][()], 1.5)
+            self.assertTrue('kpts' in dat['scf'])
+            self.assertTrue(numpy.all(dat['scf']['kpts']['000001'][:] == 1))
+            self.assertTrue(isinstance(dat['scf'].load('kpts'), list))
+            self.assertTrue(numpy.all(dat['b'][3,:3] == [30, 31, 32]))
+
 
 if __name__ == "__main__":
     print("Full Tests for lib.chkfile")
@@ -19,6 +19,7 @@ import unittest
 import numpy
 import scipy.linalg
 import tempfile
+from pyscf import lib
 from pyscf import gto
 from pyscf import scf
 from pyscf import fci
@@ -38,6 +39,62 @@ class KnownValues(unittest.TestCase):
         e = myfci.kernel()[0]
         self.assertAlmostEqual(e, -11.579978414933732+mol.energy_nuc(), 9)
 
+    def test_davidson_outcore(self):
+        numpy.random.seed(12)
+        n = 200
+        a = numpy.random.random((n,n))*.1 + numpy.diag(numpy.arange(n)*1.)
+        aop = lambda xs: [a.dot(x) for x in xs]
+        precond = lambda dx, e, x0: dx/(a.diagonal()-e+1e-4)
+        x0 = [numpy.eye(n)[i]+.1 for i in range(3)]
+        conv, e0, x1 = lib.davidson_nosym1(aop, x0, precond, nroots=3)
+        conv, e1, x1 = lib.davidson_nosym1(aop, x0, precond, nroots=3,
+                                           max_memory=.001)
+        self.assertTrue(all(conv))
+        self.assertAlmostEqual(abs(e0 - e1).max(), 0, 9)
+
+        a = a + a.T
+        conv, e0, x1 = lib.davidson1(aop, x0, precond, nroots=3)
+        conv, e1, x1 = lib.davidson1(aop, x0, precond, nroots=3,
+                                     max_memory=.001)
+        self.assertTrue(all(conv))
+        self.assertAlmostEqual(abs(e0 - e1).max(), 0, 9)
+
+        xs = lib.linalg_helper._Xlist()
+        for i in range(5):
+            xs.append(a[i])
+        ys = list(lib.linalg_helper._stream_vecs(xs, 1, 4))
+        self.assertAlmostEqual(abs(numpy.asarray(ys) - a[1:4]).max(), 0, 14)
+
+    def test_block_krylov(self):
+        numpy.random.seed(12)
+        n = 100
+        a = numpy.random.random((n,n)) * .1
+        b = numpy.random.random((4,n))
+        aop = lambda xs: numpy.dot(xs, a.T)
+        ref = numpy.linalg.solve(numpy.eye(n)+a, b.T).T
+        x = lib.block_krylov(aop, b, tol=1e-12)
+        self.assertAlmostEqual(abs(x - ref).max(), 0, 9)
+
+        x = lib.block_krylov(aop, b, tol=1e-12, max_memory=.001)
+        self.assertAlmostEqual(abs(x - ref).max(), 0, 9)
+
+        # Krylov subspace of the first RHS is reused by the next RHS
+        space = []
+        x = lib.block_krylov(aop, b[:2], tol=1e-12, space=space)
+        nvec = space[0].shape[0]
+        x = lib.block_krylov(aop, b[2:], tol=1e-12, space=space)
+        self.assertAlmostEqual(abs(x - ref[2:]).max(), 0, 9)
+        self.assertTrue(space[0].shape[0] >= nvec)
+
+        bz = b[:2] + b[2:] * 1j
+        x = lib.block_krylov(aop, bz, tol=1e-12)
+        self.assertAlmostEqual(abs(x - (ref[:2] + ref[2:]*1j)).max(), 0, 9)
+
+        a = a + a.T
+        ref = numpy.linalg.solve(numpy.eye(n)+a, b.T).T
+        x = lib.block_krylov(aop, b, tol=1e-12, hermi=True)
+        self.assertAlmostEqual(abs(x - ref).max(), 0, 9)
+
 if __name__ == "__main__":
     print("Full Tests for linalg_helper")
     unittest.main()
@@ -30,6 +30,23 @@ class KnownValues(unittest.TestCase):
 
         self.assertRaises(lib.ThreadRuntimeError, bg_raise)
 
+    def test_map_in_processes(self):
+        a = numpy.random.random((4,5))
+        def f(i, x):
+            return a[i] * x
+        args = [(i, i+1.) for i in range(4)]
+        ref = [a[i] * (i+1.) for i in range(4)]
+        out = lib.map_in_processes(f, args, nproc=2, cost=[1,4,2,3])
+        for x, y in zip(out, ref):
+            self.assertAlmostEqual(abs(x-y).max(), 0, 12)
+
+        def raise1(i):
+            if i == 1:
+                raise ValueError
+            return i
+        self.assertRaises(lib.ProcessRuntimeError, lib.map_in_processes,
+                          raise1, [(i,) for i in range(3)], nproc=2)
+
     def test_index_tril_to_pair(self):
         i_j = (numpy.random.random((2,30)) * 100).astype(int)
         i0 = numpy.max(i_j, axis=0)
@@ -25,6 +25,7 @@ from pyscf import lib
 from pyscf.lib import logger
 from pyscf.ao2mo import _ao2mo
 from pyscf import df
+from pyscf.mcscf import mc1step
 
 
 def density_fit(casscf, auxbasis=None, with_df=None):
@@ -82,7 +83,7 @@ def density_fit(casscf, auxbasis=None, with_df=None):
             return self
 
         def ao2mo(self, mo_coeff=None):
-            if self.with_df and 'CASSCF' in casscf_class.__name__:
+            if self.with_df and isinstance(self, mc1step.CASSCF):
                 return _ERIS(self, mo_coeff, self.with_df)
             else:
                 return casscf_class.ao2mo(self, mo_coeff)
@@ -130,7 +131,11 @@ def density_fit(casscf, auxbasis=None, with_df=None):
                 return casscf_class._exact_paaa(self, mol, u, out)
 
         def nuc_grad_method(self):
-            raise NotImplementedError
+            if self.with_df and isinstance(self, mc1step.CASSCF):
+                from pyscf.df.grad import casscf
+                return casscf.Gradients(self)
+            else:
+                raise NotImplementedError
 
     return DFCASSCF()
 
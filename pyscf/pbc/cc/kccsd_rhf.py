@@ -18,6 +18,7 @@
 #
 
 import time
+import collections
 from functools import reduce
 import numpy as np
 import h5py
@@ -82,6 +83,12 @@ def update_amps(cc, t1, t2, eris):
         Lvv[k][np.diag_indices(nvir)] -= mo_e_v[k]
     time1 = log.timer_debug1('intermediates', *time1)
 
+    # For the ERIs stored on disk, the (kx,ky,kz) tiles of vovv and ooov are
+    # kept in LRU caches.  vovv[ka,kk,:] and ooov[:,:,ki] are reused in the
+    # loops below.
+    vovv = _cached_ktiles(cc, eris.vovv, nkpts, nfactors=2)
+    ooov = _cached_ktiles(cc, eris.ooov, nkpts**2, nfactors=2)
+
     # T1 equation
     t1new = np.array(fov).astype(t1.dtype).conj()
 
@@ -107,7 +114,7 @@ def update_amps(cc, t1, t2, eris):
             for kc in range(nkpts):
                 kd = kconserv[ka, kc, kk]
 
-                Svovv = 2 * eris.vovv[ka, kk, kc] - eris.vovv[ka, kk, kd].transpose(0, 1, 3, 2)
+                Svovv = 2 * vovv[ka, kk, kc] - vovv[ka, kk, kd].transpose(0, 1, 3, 2)
                 tau_term_1 = t2[ki, kk, kc].copy()
                 if ki == kc and kk == kd:
                     tau_term_1 += einsum('ic,kd->ikcd', t1[ki], t1[kk])
@@ -116,11 +123,12 @@ def update_amps(cc, t1, t2, eris):
                 # kk - ki + kl = kc
                 #  => kl = ki - kk + kc
                 kl = kconserv[ki, kk, kc]
-                Sooov = 2 * eris.ooov[kk, kl, ki] - eris.ooov[kl, kk, ki].transpose(1, 0, 2, 3)
+                Sooov = 2 * ooov[kk, kl, ki] - ooov[kl, kk, ki].transpose(1, 0, 2, 3)
                 tau_term_1 = t2[kk, kl, ka].copy()
                 if kk == ka and kl == kc:
                     tau_term_1 += einsum('ka,lc->klac', t1[ka], t1[kc])
                 t1new[ka] += -einsum('klic,klac->ia', Sooov, tau_term_1)
+    vovv = ooov = None
     time1 = log.timer_debug1('t1', *time1)
 
     # T2 equation
@@ -135,6 +143,8 @@ def update_amps(cc, t1, t2, eris):
         fimd = lib.H5TmpFile()
         Woooo = fimd.create_dataset('oooo', (nkpts, nkpts, nkpts, nocc, nocc, nocc, nocc), t1.dtype.char)
         Woooo = imdk.cc_Woooo(t1, t2, eris, kconserv, Woooo)
+        # Woooo[:,:,ki] are reused for all kj and ka
+        Woooo = _cached_ktiles(cc, Woooo, nkpts**2)
 
     for ki, kj, ka in kpts_helper.loop_kkk(nkpts):
         # Chemist's notation for momentum conserving t2(ki,kj,ka,kb)
@@ -185,8 +195,12 @@ def update_amps(cc, t1, t2, eris):
         Wvovo = fimd.create_dataset('vovo', (nkpts, nkpts, nkpts, nvir, nocc, nvir, nocc), t1.dtype.char)
         Wvoov = imdk.cc_Wvoov(t1, t2, eris, kconserv, Wvoov)
         Wvovo = imdk.cc_Wvovo(t1, t2, eris, kconserv, Wvovo)
+        # With kj in the inner loop, Wvoov[ka,:,ki] and Wvovo[ka,:,:] are
+        # reused for all kj
+        Wvoov = _cached_ktiles(cc, Wvoov, nkpts, nfactors=2)
+        Wvovo = _cached_ktiles(cc, Wvovo, nkpts**2+nkpts, nfactors=2)
 
-    for ki, kj, ka in kpts_helper.loop_kkk(nkpts):
+    for ki, ka, kj in kpts_helper.loop_kkk(nkpts):
         kb = kconserv[ki, ka, kj]
         t2new_tmp = np.zeros((nocc, nocc, nvir, nvir), dtype=t2.dtype)
         for kk in range(nkpts):
@@ -466,19 +480,107 @@ def add_vvvv_(cc, Ht2, t1, t2, eris):
     #:idx = np.arange(nkpts)
     #:tau[idx,:,idx] += einsum('xic,yjd->xyijcd', t1, t1)
     #:Ht2 += einsum('xyuijcd,zwuabcd,xyuv,zwuv->xyzijab', tau, Wvvvv, Ps, Ps)
-    for ka, kb, kc in kpts_helper.loop_kkk(nkpts):
+    # The next Wvvvv tile is read from disk (or generated with the DF tensors)
+    # in background while the current one is contracted with tau.
+    Wvvvv_tiles = _KTileCache(get_Wvvvv, max_tiles=1)
+    for (ka, kb, kc), Wvvvv in Wvvvv_tiles.loop(kpts_helper.loop_kkk(nkpts)):
         kd = kconserv[ka, kc, kb]
-        Wvvvv = get_Wvvvv(ka, kb, kc)
         for ki in range(nkpts):
             kj = kconserv[ka, ki, kb]
             tau = t2[ki, kj, kc].copy()
             if ki == kc and kj == kd:
                 tau += np.einsum('ic,jd->ijcd', t1[ki], t1[kj])
             Ht2[ki, kj, ka] += lib.einsum('abcd,ijcd->ijab', Wvvvv, tau)
+    Wvvvv_tiles = None
     fimd = None
     return Ht2
 
 
+class _KTileCache(object):
+    '''Read-only LRU cache of the (kx,ky,kz) tiles of a tensor of shape
+    (nkpts,nkpts,nkpts,...) which is stored on disk or generated on the fly.
+    It is used for the out-of-core ERIs and intermediates in update_amps.
+    Tiles are never written back.  The amplitudes t1, t2 and the output
+    Ht1, Ht2 are in-memory arrays which do not go through this cache.
+
+    Args:
+        data : h5py dataset, ndarray or function
+            A function data(kx,ky,kz) or an array-like object indexed by
+            data[kx,ky,kz] that returns the tile of the given k-points.
+        max_tiles : int
+            The maximum number of tiles resident in memory.
+    '''
+    def __init__(self, data, max_tiles=2):
+        if callable(data):
+            self._load = lambda key: data(*key)
+        else:
+            self._load = lambda key: np.asarray(data[key])
+        self.max_tiles = max(1, max_tiles)
+        self._tiles = collections.OrderedDict()
+
+    def __getitem__(self, key):
+        key = tuple(int(k) for k in key)
+        tile = self._tiles.pop(key, None)
+        if tile is None:
+            tile = self._load(key)
+        self._add(key, tile)
+        return tile
+
+    def _add(self, key, tile):
+        self._tiles[key] = tile
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+
+    def loop(self, keys):
+        '''Iterate over (key, tile) for the given keys.  The tile of the next
+        key is loaded in background while the current one is being processed.
+        '''
+        keys = [tuple(int(k) for k in key) for key in keys]
+        if len(keys) == 0:
+            return
+
+        def load(key, tile, buf):
+            if tile is None:
+                tile = self._load(key)
+            buf[0] = tile
+
+        dat = [None]
+        prefetch = [None]
+        with lib.call_in_background(load) as bload:
+            bload(keys[0], self._tiles.get(keys[0]), prefetch)
+            for i, key in enumerate(keys[1:]):
+                dat, prefetch = prefetch, dat
+                bload(key, self._tiles.get(key), prefetch)
+                self._add(keys[i], dat[0])
+                yield keys[i], dat[0]
+        self._add(keys[-1], prefetch[0])
+        yield keys[-1], prefetch[0]
+
+
+def _max_resident_tiles(cc, tile_shape, dtype, nfactors=1):
+    '''The number of (kx,ky,kz) tiles which can be kept in memory for each of
+    the nfactors tensors within cc.max_memory.  One tile of each tensor is
+    reserved for the prefetch buffer.
+    '''
+    mem_now = lib.current_memory()[0]
+    tile_mem = np.prod(tile_shape) * np.dtype(dtype).itemsize / 1e6
+    max_tiles = int((cc.max_memory * .9 - mem_now) / nfactors / max(tile_mem, 1e-6))
+    return max(1, max_tiles - 1)
+
+
+def _cached_ktiles(cc, data, ntiles, nfactors=1):
+    '''Wrap the ERIs or intermediates stored on disk in a read cache
+    (_KTileCache) which holds at most ntiles tiles (or as many as the memory
+    allows).  In-memory arrays are returned as they are.
+    '''
+    if isinstance(data, np.ndarray):
+        return data
+    max_tiles = _max_resident_tiles(cc, data.shape[3:], data.dtype, nfactors)
+    logger.debug1(cc, 'Keep %d tiles of tensor %s in memory',
+                  min(ntiles, max_tiles), data.shape)
+    return _KTileCache(data, min(ntiles, max_tiles))
+
+
 # Ps is Permutation transformation matrix
 # The physical meaning of Ps matrix is the conservation of moment.
 # Given the four indices in Ps, the element shows whether moment conservation
@@ -499,6 +601,10 @@ class RCCSD(pyscf.cc.ccsd.CCSD):
 
     def __init__(self, mf, frozen=0, mo_coeff=None, mo_occ=None):
         assert (isinstance(mf, scf.khf.KSCF))
+        if getattr(mf, 'ksymm', None) is not None:
+            # Orbitals of the irreducible k-points from k-point symmetry
+            # adapted SCF are transformed to the full k-point mesh
+            mf = mf.to_khf()
         pyscf.cc.ccsd.CCSD.__init__(self, mf, frozen, mo_coeff, mo_occ)
         self.kpts = mf.kpts
         self.khelper = kpts_helper.KptsHelper(mf.cell, mf.kpts)
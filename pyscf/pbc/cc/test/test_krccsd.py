@@ -761,6 +761,27 @@ class KnownValues(unittest.TestCase):
         self.assertAlmostEqual(finger(Hr1), (-0.234979092885-0.218401823892j), 6)
         self.assertAlmostEqual(finger(Hr2), (-3.56244154449+2.12051064183j), 6)
 
+    def test_rand_ccsd_outcore(self):
+        '''Single ccsd iteration with ERIs and intermediates stored on disk.'''
+        kmf = copy.copy(rand_kmf)
+        mat_veff = kmf.get_veff().round(4)
+        mat_hcore = kmf.get_hcore().round(4)
+        kmf.get_veff = lambda *x: mat_veff
+        kmf.get_hcore = lambda *x: mat_hcore
+
+        rand_cc = pbcc.KRCCSD(kmf)
+        eris = rand_cc.ao2mo(kmf.mo_coeff)
+        eris.mo_energy = [eris.fock[k].diagonal() for k in range(rand_cc.nkpts)]
+        t1, t2 = rand_t1_t2(kmf, rand_cc)
+        Ht1_ref, Ht2_ref = rand_cc.update_amps(t1, t2, eris)
+
+        eris = pbcc.kccsd_rhf._ERIS(rand_cc, kmf.mo_coeff, method='outcore')
+        eris.mo_energy = [eris.fock[k].diagonal() for k in range(rand_cc.nkpts)]
+        rand_cc.max_memory = 1
+        Ht1, Ht2 = rand_cc.update_amps(t1, t2, eris)
+        self.assertAlmostEqual(abs(Ht1 - Ht1_ref).max(), 0, 9)
+        self.assertAlmostEqual(abs(Ht2 - Ht2_ref).max(), 0, 9)
+
     def test_rand_ccsd_frozen0(self):
         '''Single (eom-)ccsd iteration with random t1/t2 and lowest lying orbital
         at multiple k-points frozen.'''
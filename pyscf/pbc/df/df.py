@@ -58,6 +58,7 @@ from pyscf.pbc.df.aft import _sub_df_jk_
 from pyscf import __config__
 
 LINEAR_DEP_THR = getattr(__config__, 'pbc_df_df_DF_lindep', 1e-9)
+J3C_LS_PRECISION = getattr(__config__, 'pbc_df_df_DF_j3c_Ls_precision', None)
 
 
 def make_modrho_basis(cell, auxbasis=None, drop_eta=None):
@@ -139,6 +140,51 @@ def make_modchg_basis(auxcell, smooth_eta):
     logger.debug1(auxcell, 'chgcell.rcut %s', chgcell.rcut)
     return chgcell
 
+def estimate_j3c_Ls(cell, auxcell, precision=None):
+    '''Lattice translations for the real space lattice sum of the 3-center
+    integrals (i[L]j[M]|P).  cell.get_lattice_Ls() keeps the images which are
+    within cell.rcut to any point of the reference cell.  An image is needed
+    only if the AO functions of an atom A on the image overlap with the
+    functions P (including the compensating charges of the fused auxcell)
+    of an atom C of the reference cell, i.e.
+    |R_A + L - R_C| < rcut(A) + rcut(P on C).  The radii are estimated with
+    the given precision.  If precision is None, all images of
+    cell.get_lattice_Ls() are returned.
+
+    The screening is carried out for atom pairs.  The AO shell pairs of the
+    retained images are screened by the lattice-sum driver (see PBCOpt).
+    '''
+    Ls = cell.get_lattice_Ls()
+    if precision is None or cell.nbas == 0 or auxcell.nbas == 0:
+        return Ls
+
+    def atom_rcut(mol):
+        rcut = numpy.zeros(mol.natm)
+        for ib in range(mol.nbas):
+            ia = mol.bas_atom(ib)
+            rcut[ia] = max(rcut[ia], mol.bas_rcut(ib, precision))
+        return rcut
+
+    ao_rcut = atom_rcut(cell)
+    rcut_max = max([cell.bas_rcut(ib, cell.precision) for ib in range(cell.nbas)])
+    # cell.rcut may be enlarged by the user to increase the lattice sum
+    if cell.rcut > rcut_max:
+        ao_rcut *= cell.rcut / rcut_max
+    atm_idx = numpy.where(ao_rcut > 0)[0]
+    ao_rcut = ao_rcut[atm_idx]
+    ao_coords = cell.atom_coords()[atm_idx]
+
+    aux_rcut = atom_rcut(auxcell)
+    aux_coords = auxcell.atom_coords()
+
+    mask = numpy.zeros(len(Ls), dtype=bool)
+    for c, rc in zip(aux_coords, aux_rcut):
+        if rc > 0:
+            # (nimgs, natm) distances between the images of atom A and atom C
+            r = lib.norm(Ls[:,None,:] + ao_coords - c, axis=2)
+            mask |= (r < ao_rcut + rc).any(axis=1)
+    return numpy.asarray(Ls[mask], order='C')
+
 # kpti == kptj: s2 symmetry
 # kpti == kptj == 0 (gamma point): real
 def _make_j3c(mydf, cell, auxcell, kptij_lst, cderi_file):
@@ -160,8 +206,16 @@ def _make_j3c(mydf, cell, auxcell, kptij_lst, cderi_file):
     # Unlink swapfile to avoid trash
     swapfile = None
 
+    if mydf.j3c_Ls_precision is None:
+        Ls = estimate_j3c_Ls(cell, fused_cell)
+    else:
+        Ls = estimate_j3c_Ls(cell, fused_cell,
+                             cell.precision*mydf.j3c_Ls_precision)
+    log.debug('Lattice sum of 3c2e over %d of %d images', len(Ls),
+              len(cell.get_lattice_Ls()))
     outcore._aux_e2(cell, fused_cell, fswap, 'int3c2e', aosym='s2',
-                    kptij_lst=kptij_lst, dataname='j3c-junk', max_memory=max_memory)
+                    kptij_lst=kptij_lst, dataname='j3c-junk',
+                    max_memory=max_memory, Ls=Ls)
     t1 = log.timer_debug1('3c2e', *t1)
 
     nao = cell.nao_nr()
@@ -448,6 +502,14 @@ class GDF(aft.AFTDF):
         # 0 since v1.5.2.
         self.exp_to_discard = cell.exp_to_discard
 
+        # Relative to cell.precision, the precision to estimate the images
+        # required by the lattice sum of 3-center integrals. If None, all
+        # images of cell.get_lattice_Ls() are included. Images are dropped
+        # only if they are beyond the reach of the AO functions and the
+        # fitting functions (see estimate_j3c_Ls). This mostly affects large
+        # cells, e.g. molecules or slabs with vacuum.
+        self.j3c_Ls_precision = J3C_LS_PRECISION
+
         # The following attributes are not input options.
         self.exxdiv = None  # to mimic KRHF/KUHF object in function get_coulG
         self.auxcell = None
@@ -500,6 +562,7 @@ class GDF(aft.AFTDF):
             log.info('auxbasis = %s', self.auxcell.basis)
         log.info('eta = %s', self.eta)
         log.info('exp_to_discard = %s', self.exp_to_discard)
+        log.info('j3c_Ls_precision = %s', self.j3c_Ls_precision)
         if isinstance(self._cderi, str):
             log.info('_cderi = %s  where DF integrals are loaded (readonly).',
                      self._cderi)
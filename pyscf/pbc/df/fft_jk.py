@@ -24,6 +24,7 @@ import time
 import numpy as np
 from pyscf import lib
 from pyscf.pbc import tools
+from pyscf.pbc.tools.pbc import _hermitian_half
 from pyscf.pbc.dft import numint
 from pyscf.pbc.df.df_jk import _format_dms, _format_kpts_band, _format_jks
 from pyscf.pbc.df.df_jk import _ewald_exxdiv_for_G0
@@ -68,10 +69,14 @@ def get_j_kpts(mydf, dm_kpts, hermi=1, kpts=np.zeros((1,3)), kpts_band=None):
                 rhoR[i,p0:p1] += make_rho(i, ao_ks, mask, 'LDA')
             ao = ao_ks = None
 
-        for i in range(nset):
-            rhoG = tools.fft(rhoR[i], mesh)
-            vG = coulG * rhoG
-            vR[i] = tools.ifft(vG, mesh).real
+        # rhoR is real. The real-to-complex FFT computes half of the G vectors.
+        # coulG(G) and coulG(-G) can be different on the boundary of the mesh.
+        # Its Hermitian part is used to keep vR the same to the real part of
+        # ifft(coulG*rhoG).
+        rhoG = tools.rfft(rhoR, mesh)
+        vG = _hermitian_half(coulG, mesh).real.reshape(-1) * rhoG
+        vR = tools.irfft(vG, mesh)
+        rhoR = rhoG = vG = None
 
     else:  # vR may be complex if the underlying density is complex
         vR = rhoR = np.zeros((nset,ngrids), dtype=np.complex128)
@@ -140,6 +145,9 @@ def get_k_kpts(mydf, dm_kpts, hermi=1, kpts=np.zeros((1,3)), kpts_band=None,
     if getattr(dm_kpts, 'mo_coeff', None) is not None:
         mo_coeff = dm_kpts.mo_coeff
         mo_occ   = dm_kpts.mo_occ
+        if dm_kpts[0].ndim == 2:  # KRHF
+            mo_coeff = [mo_coeff]
+            mo_occ = [mo_occ]
     else:
         mo_coeff = None
 
@@ -166,10 +174,13 @@ def get_k_kpts(mydf, dm_kpts, hermi=1, kpts=np.zeros((1,3)), kpts_band=None,
     else:
         ao1_kpts = [np.asarray(ao.T, order='C')
                     for ao in mydf._numint.eval_ao(cell, coords, kpts=kpts_band)]
-    if mo_coeff is not None and nset == 1:
-        mo_coeff = [mo_coeff[k][:,occ>0] * np.sqrt(occ[occ>0])
-                    for k, occ in enumerate(mo_occ)]
-        ao2_kpts = [np.dot(mo_coeff[k].T, ao) for k, ao in enumerate(ao2_kpts)]
+    if mo_coeff is not None and len(mo_coeff) == nset:
+        # The occupied orbitals C*sqrt(n) of each DM at each k-point
+        mo_coeff = [[c[k][:,occ[k]>0] * np.sqrt(occ[k][occ[k]>0])
+                     for k in range(nkpts)]
+                    for c, occ in zip(mo_coeff, mo_occ)]
+    else:
+        mo_coeff = None
 
     mem_now = lib.current_memory()[0]
     max_memory = mydf.max_memory - mem_now
@@ -186,11 +197,20 @@ def get_k_kpts(mydf, dm_kpts, hermi=1, kpts=np.zeros((1,3)), kpts_band=None,
             continue
 
         kpt2 = kpts[k2]
-        naoj = ao2T.shape[0]
-        if mo_coeff is None or nset > 1:
-            ao_dms = [lib.dot(dms[i,k2], ao2T.conj()) for i in range(nset)]
+        # The exchange matrix is computed with the pair products between ao1
+        # and the occupied orbitals of each DM if the total number of occupied
+        # orbitals is smaller than nao.  Otherwise the pair products between
+        # ao1 and ao2 are computed once for all DMs.  Each job is a pair of
+        # the (ket) functions on grids and the contractions [(i, dm_i*ket)].
+        if (mo_coeff is not None and
+            sum(c[k2].shape[1] for c in mo_coeff) < nao):
+            jobs = []
+            for i in range(nset):
+                mo2T = lib.dot(mo_coeff[i][k2].T, ao2T)
+                jobs.append((mo2T, [(i, mo2T.conj())]))
         else:
-            ao_dms = [ao2T.conj()]
+            jobs = [(ao2T, [(i, lib.dot(dms[i,k2], ao2T.conj()))
+                            for i in range(nset)])]
 
         for k1, ao1T in enumerate(ao1_kpts):
             kpt1 = kpts_band[k1]
@@ -209,17 +229,26 @@ def get_k_kpts(mydf, dm_kpts, hermi=1, kpts=np.zeros((1,3)), kpts_band=None,
                 expmikr = np.exp(-1j * np.dot(coords, kpt2-kpt1))
 
             for p0, p1 in lib.prange(0, nao, blksize):
-                rho1 = np.einsum('ig,jg->ijg', ao1T[p0:p1].conj()*expmikr, ao2T)
-                vG = tools.fft(rho1.reshape(-1,ngrids), mesh)
-                rho1 = None
-                vG *= coulG
-                vR = tools.ifft(vG, mesh).reshape(p1-p0,naoj,ngrids)
-                vG = None
-                if vR_dm.dtype == np.double:
-                    vR = vR.real
-                for i in range(nset):
-                    np.einsum('ijg,jg->ig', vR, ao_dms[i], out=vR_dm[i,p0:p1])
-                vR = None
+                for ketT, ket_dms in jobs:
+                    if ketT.size == 0:
+                        for i, ket_dm in ket_dms:
+                            vR_dm[i,p0:p1] = 0
+                        continue
+                    naoj = ketT.shape[0]
+                    rho1 = np.einsum('ig,jg->ijg', ao1T[p0:p1].conj()*expmikr, ketT)
+                    vG = tools.fft(rho1.reshape(-1,ngrids), mesh)
+                    rho1 = None
+                    vG *= coulG
+                    vR = tools.ifft(vG, mesh).reshape(p1-p0,naoj,ngrids)
+                    vG = None
+                    if vR_dm.dtype == np.double and ketT.dtype == np.double:
+                        vR = vR.real
+                    for i, ket_dm in ket_dms:
+                        if vR_dm.dtype == np.double:
+                            vR_dm[i,p0:p1] = np.einsum('ijg,jg->ig', vR, ket_dm).real
+                        else:
+                            np.einsum('ijg,jg->ig', vR, ket_dm, out=vR_dm[i,p0:p1])
+                    vR = None
             vR_dm *= expmikr.conj()
 
             for i in range(nset):
@@ -236,6 +265,106 @@ def get_k_kpts(mydf, dm_kpts, hermi=1, kpts=np.zeros((1,3)), kpts_band=None,
 
     return _format_jks(vk_kpts, dm_kpts, input_band, kpts)
 
+def get_k_occ_kpts(mydf, mo_coeff_kpts, mo_occ_kpts, kpts=np.zeros((1,3)),
+                   exxdiv=None):
+    r'''The exchange matrix projected onto the occupied orbitals,
+    C_k^\dagger K_k[D], for the density matrix D_k = C_k n_k C_k^\dagger.
+
+    The pair densities are formed between occupied orbitals only.  This takes
+    nocc^2 FFTs for each pair of k-points while :func:`get_k_kpts` takes
+    nao*nocc FFTs.  The adaptively compressed exchange (ACE) operator is
+    constructed from the returned matrices.
+
+    Args:
+        mo_coeff_kpts : (nkpts, nao, nmo) ndarray or a list of 2D arrays
+        mo_occ_kpts : (nkpts, nmo) ndarray or a list of 1D arrays
+        kpts : (nkpts, 3) ndarray
+
+    Returns:
+        A list of (nocc_k, nao) ndarrays, one for each k-point, where nocc_k
+        is the number of orbitals with mo_occ > 0.
+    '''
+    cell = mydf.cell
+    mesh = mydf.mesh
+    coords = mydf.grids.coords
+    ngrids = coords.shape[0]
+    kpts = np.asarray(kpts).reshape(-1,3)
+    nkpts = len(kpts)
+    nao = cell.nao_nr()
+    weight = 1./nkpts * (cell.vol/ngrids)
+
+    mo_coeff_kpts = [mo_coeff_kpts[k][:,occ>0] for k, occ in enumerate(mo_occ_kpts)]
+    mo_occ_kpts = [occ[occ>0] for occ in mo_occ_kpts]
+    if gamma_point(kpts):
+        dtype = np.result_type(*mo_coeff_kpts)
+    else:
+        dtype = np.complex128
+
+    ao_kpts = [np.asarray(ao.T, order='C')
+               for ao in mydf._numint.eval_ao(cell, coords, kpts=kpts)]
+    mo1_kpts = [lib.dot(c.T, ao) for c, ao in zip(mo_coeff_kpts, ao_kpts)]
+    mo2_kpts = [mo * np.sqrt(occ)[:,None] for mo, occ in zip(mo1_kpts, mo_occ_kpts)]
+    vk_kpts = [np.zeros((c.shape[1],nao), dtype=dtype) for c in mo_coeff_kpts]
+
+    nocc = max(c.shape[1] for c in mo_coeff_kpts)
+    mem_now = lib.current_memory()[0]
+    max_memory = mydf.max_memory - mem_now
+    blksize = int(min(nocc, max(1, max_memory*1e6/16/4/ngrids/max(1,nocc))))
+    lib.logger.debug1(mydf, 'fft_jk: get_k_occ_kpts max_memory %s  blksize %d',
+                      max_memory, blksize)
+
+    t1 = (time.clock(), time.time())
+    for k2, mo2T in enumerate(mo2_kpts):
+        if mo2T.size == 0:
+            continue
+        kpt2 = kpts[k2]
+        nocc2 = mo2T.shape[0]
+        for k1, mo1T in enumerate(mo1_kpts):
+            if mo1T.size == 0:
+                continue
+            kpt1 = kpts[k1]
+            nocc1 = mo1T.shape[0]
+
+            mydf.exxdiv = exxdiv
+            if exxdiv == 'ewald' or exxdiv is None:
+                coulG = tools.get_coulG(cell, kpt2-kpt1, False, mydf, mesh)
+            else:
+                coulG = tools.get_coulG(cell, kpt2-kpt1, True, mydf, mesh)
+            if is_zero(kpt1-kpt2):
+                expmikr = np.array(1.)
+            else:
+                expmikr = np.exp(-1j * np.dot(coords, kpt2-kpt1))
+
+            vR_dm = np.empty((nocc1,ngrids), dtype=dtype)
+            for p0, p1 in lib.prange(0, nocc1, blksize):
+                rho1 = np.einsum('ig,jg->ijg', mo1T[p0:p1].conj()*expmikr, mo2T)
+                vG = tools.fft(rho1.reshape(-1,ngrids), mesh)
+                rho1 = None
+                vG *= coulG
+                vR = tools.ifft(vG, mesh).reshape(p1-p0,nocc2,ngrids)
+                vG = None
+                if dtype == np.double:
+                    vR = vR.real
+                np.einsum('ijg,jg->ig', vR, mo2T.conj(), out=vR_dm[p0:p1])
+                vR = None
+            vR_dm *= expmikr.conj()
+            vk_kpts[k1] += weight * lib.dot(vR_dm, ao_kpts[k1].T)
+        t1 = lib.logger.timer_debug1(mydf, 'get_k_occ_kpts: make_kpt (%d,*)'%k2, *t1)
+
+    # The G=0 correction of _ewald_exxdiv_for_G0, madelung * S D S, projected
+    # onto the occupied orbitals
+    if exxdiv == 'ewald':
+        s = cell.pbc_intor('int1e_ovlp', hermi=1, kpts=kpts)
+        madelung = tools.pbc.madelung(cell, kpts)
+        for k, c in enumerate(mo_coeff_kpts):
+            sc = np.dot(s[k], c)
+            csc = np.dot(c.conj().T, sc)
+            vk_g0 = madelung * np.dot(csc * mo_occ_kpts[k], sc.conj().T)
+            if dtype == np.double:
+                vk_g0 = vk_g0.real
+            vk_kpts[k] += vk_g0
+    return vk_kpts
+
 
 def get_jk(mydf, dm, hermi=1, kpt=np.zeros(3), kpts_band=None,
            with_j=True, with_k=True, exxdiv=None):
@@ -261,7 +390,6 @@ def get_jk(mydf, dm, hermi=1, kpt=np.zeros(3), kpts_band=None,
         The function returns one J and one K matrix, corresponding to the input
         density matrix (both order and shape).
     '''
-    dm = np.asarray(dm, order='C')
     vj = vk = None
     if with_j:
         vj = get_j(mydf, dm, hermi, kpt, kpts_band)
@@ -326,9 +454,17 @@ def get_k(mydf, dm, hermi=1, kpt=np.zeros(3), kpts_band=None, exxdiv=None):
         The function returns one J and one K matrix, corresponding to the input
         density matrix (both order and shape).
     '''
+    mo_coeff = getattr(dm, 'mo_coeff', None)
+    mo_occ = getattr(dm, 'mo_occ', None)
     dm = np.asarray(dm, order='C')
     nao = dm.shape[-1]
     dm_kpts = dm.reshape(-1,1,nao,nao)
+    if mo_coeff is not None:
+        # Keep the orbitals for the occupied-orbital path of get_k_kpts
+        nmo = np.shape(mo_occ)[-1]
+        dm_kpts = lib.tag_array(dm_kpts,
+                                mo_coeff=np.reshape(mo_coeff, (-1,1,nao,nmo)),
+                                mo_occ=np.reshape(mo_occ, (-1,1,nmo)))
     vk = get_k_kpts(mydf, dm_kpts, hermi, kpt.reshape(1,3), kpts_band, exxdiv)
     if kpts_band is None:
         vk = vk[:,0,:,:]
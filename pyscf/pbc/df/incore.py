@@ -130,7 +130,8 @@ def aux_e2(cell, auxcell, intor='int3c2e', aosym='s1', comp=None,
     return out
 
 def wrap_int3c(cell, auxcell, intor='int3c2e', aosym='s1', comp=1,
-               kptij_lst=numpy.zeros((1,2,3)), cintopt=None, pbcopt=None):
+               kptij_lst=numpy.zeros((1,2,3)), cintopt=None, pbcopt=None,
+               Ls=None):
     intor = cell._add_suffix(intor)
     pcell = copy.copy(cell)
     pcell._atm, pcell._bas, pcell._env = \
@@ -142,7 +143,9 @@ def wrap_int3c(cell, auxcell, intor='int3c2e', aosym='s1', comp=1,
                            dtype=numpy.int32)
     atm, bas, env = gto.conc_env(atm, bas, env,
                                  auxcell._atm, auxcell._bas, auxcell._env)
-    Ls = cell.get_lattice_Ls()
+    if Ls is None:
+        Ls = cell.get_lattice_Ls()
+    Ls = numpy.asarray(Ls, order='C')
     nimgs = len(Ls)
     nbas = cell.nbas
 
@@ -62,8 +62,14 @@ def _make_j3c(mydf, cell, auxcell, kptij_lst, cderi_file):
     # Unlink swapfile to avoid trash
     swapfile = None
 
+    if mydf.j3c_Ls_precision is None:
+        Ls = df.estimate_j3c_Ls(cell, fused_cell)
+    else:
+        Ls = df.estimate_j3c_Ls(cell, fused_cell,
+                                cell.precision*mydf.j3c_Ls_precision)
     outcore._aux_e2(cell, fused_cell, fswap, 'int3c2e', aosym='s2',
-                    kptij_lst=kptij_lst, dataname='j3c-junk', max_memory=max_memory)
+                    kptij_lst=kptij_lst, dataname='j3c-junk',
+                    max_memory=max_memory, Ls=Ls)
     t1 = log.timer_debug1('3c2e', *t1)
 
     nao = cell.nao_nr()
@@ -344,6 +350,10 @@ class MDF(df.DF):
         # can be set to the value of self.eta
         self.exp_to_discard = None
 
+        # Relative to cell.precision, the precision to estimate the images
+        # required by the lattice sum of 3-center integrals. See df.GDF.
+        self.j3c_Ls_precision = df.J3C_LS_PRECISION
+
         # The following attributes are not input options.
         self.exxdiv = None  # to mimic KRHF/KUHF object in function get_coulG
         self.auxcell = None
@@ -30,7 +30,7 @@ libpbc = lib.load_library('libpbc')
 
 def aux_e1(cell, auxcell, erifile, intor='int3c2e', aosym='s2ij', comp=None,
            kptij_lst=None, dataname='eri_mo', shls_slice=None, max_memory=2000,
-           verbose=0):
+           verbose=0, Ls=None):
     r'''3-center AO integrals (L|ij) with double lattice sum:
     \sum_{lm} (L[0]|i[l]j[m]), where L is the auxiliary basis.
     Three-index integral tensor (kptij_idx, naux, nao_pair) or four-index
@@ -39,6 +39,9 @@ def aux_e1(cell, auxcell, erifile, intor='int3c2e', aosym='s2ij', comp=None,
     Args:
         kptij_lst : (*,2,3) array
             A list of (kpti, kptj)
+        Ls : (nimgs,3) array
+            Lattice translations of the lattice sum.  By default, the images
+            given by cell.get_lattice_Ls() are used.
     '''
     intor, comp = gto.moleintor._get_intor_and_comp(cell._add_suffix(intor), comp)
 
@@ -114,7 +117,7 @@ def aux_e1(cell, auxcell, erifile, intor='int3c2e', aosym='s2ij', comp=None,
     buf = numpy.empty(nkptij*comp*ni*nj*buflen, dtype=dtype)
     buf1 = numpy.empty(ni*nj*buflen, dtype=dtype)
 
-    int3c = wrap_int3c(cell, auxcell, intor, aosym, comp, kptij_lst)
+    int3c = wrap_int3c(cell, auxcell, intor, aosym, comp, kptij_lst, Ls=Ls)
 
     naux0 = 0
     for istep, auxrange in enumerate(auxranges):
@@ -146,7 +149,7 @@ def aux_e1(cell, auxcell, erifile, intor='int3c2e', aosym='s2ij', comp=None,
 
 def _aux_e2(cell, auxcell, erifile, intor='int3c2e', aosym='s2ij', comp=None,
             kptij_lst=None, dataname='eri_mo', shls_slice=None, max_memory=2000,
-            verbose=0):
+            verbose=0, Ls=None):
     r'''3-center AO integrals (ij|L) with double lattice sum:
     \sum_{lm} (i[l]j[m]|L[0]), where L is the auxiliary basis.
     Three-index integral tensor (kptij_idx, nao_pair, naux) or four-index
@@ -158,6 +161,9 @@ def _aux_e2(cell, auxcell, erifile, intor='int3c2e', aosym='s2ij', comp=None,
     Args:
         kptij_lst : (*,2,3) array
             A list of (kpti, kptj)
+        Ls : (nimgs,3) array
+            Lattice translations of the lattice sum.  By default, the images
+            given by cell.get_lattice_Ls() are used.
     '''
     intor, comp = gto.moleintor._get_intor_and_comp(cell._add_suffix(intor), comp)
 
@@ -215,7 +221,7 @@ def _aux_e2(cell, auxcell, erifile, intor='int3c2e', aosym='s2ij', comp=None,
     buf = numpy.empty(nkptij*comp*ni*nj*buflen, dtype=dtype)
     buf1 = numpy.empty_like(buf)
 
-    int3c = wrap_int3c(cell, auxcell, intor, aosym, comp, kptij_lst)
+    int3c = wrap_int3c(cell, auxcell, intor, aosym, comp, kptij_lst, Ls=Ls)
 
     kptis = kptij_lst[:,0]
     kptjs = kptij_lst[:,1]
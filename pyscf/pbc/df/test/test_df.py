@@ -122,6 +122,23 @@ class KnownValues(unittest.TestCase):
         self.assertAlmostEqual(abs(eri0123.imag.sum()), 0.0006633634465733618, 9)
         self.assertAlmostEqual(finger(eri0123), 0.9693314315640165-0.33152709566516436j, 9)
 
+    def test_estimate_j3c_Ls(self):
+        cell1 = pgto.M(atom='H 0 0 0; H 0 0 .74', a=numpy.eye(3)*8,
+                       basis='6-31g', verbose=0)
+        mydf = df.DF(cell1)
+        auxcell = df.make_modrho_basis(cell1, 'weigend', mydf.exp_to_discard)
+        fused_cell = df.fuse_auxcell(mydf, auxcell)[0]
+        Ls = df.estimate_j3c_Ls(cell1, fused_cell, cell1.precision*1e-4)
+        self.assertTrue(len(Ls) < len(cell1.get_lattice_Ls()))
+
+        mydf.auxbasis = 'weigend'
+        mydf.j3c_Ls_precision = None
+        ref = mydf.get_eri()
+        mydf = df.DF(cell1)
+        mydf.auxbasis = 'weigend'
+        mydf.j3c_Ls_precision = 1e-4
+        eri = mydf.get_eri()
+        self.assertAlmostEqual(abs(eri - ref).max(), 0, 9)
 
 
 if __name__ == '__main__':
@@ -678,6 +678,22 @@ class KnownValues(unittest.TestCase):
         dms = lib.tag_array(lib.asarray(dms), mo_coeff=mo_coeff, mo_occ=mo_occ)
         vk1 = df.get_jk(dms, kpts=kpts, kpts_band=kpts_band, exxdiv=None)[1]
         self.assertAlmostEqual(lib.finger(vk1), 10.239828255099447+2.1190549216896182j, 9)
+        vk0 = df.get_jk(numpy.asarray(dms), kpts=kpts, kpts_band=kpts_band, exxdiv=None)[1]
+        self.assertAlmostEqual(abs(vk1 - vk0).max(), 0, 9)
+
+        # UHF-like DMs, one spin with all orbitals occupied
+        mo_occ = numpy.array([mo_occ, numpy.ones((nkpts,nao))])
+        mo_coeff = numpy.array([mo_coeff, mo_coeff])
+        dms = numpy.einsum('skpi,ski,skqi->skpq', mo_coeff, mo_occ, mo_coeff)
+        vk0 = df.get_jk(dms, kpts=kpts, exxdiv=None)[1]
+        dms = lib.tag_array(dms, mo_coeff=mo_coeff, mo_occ=mo_occ)
+        vk1 = df.get_jk(dms, kpts=kpts, exxdiv=None)[1]
+        self.assertAlmostEqual(abs(vk1 - vk0).max(), 0, 9)
+
+        dm = lib.tag_array(dms[0,0], mo_coeff=mo_coeff[0,0], mo_occ=mo_occ[0,0])
+        vk0 = df.get_jk(numpy.asarray(dm), kpts=kpts[0], exxdiv=None)[1]
+        vk1 = df.get_jk(dm, kpts=kpts[0], exxdiv=None)[1]
+        self.assertAlmostEqual(abs(vk1 - vk0).max(), 0, 9)
 
     def test_get_j_non_hermitian(self):
         kpt = kpts[0]
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# Copyright 2014-2019 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Restricted Kohn-Sham for periodic systems with k-point symmetry
+
+See Also:
+    pyscf.pbc.scf.khf_ksymm
+    pyscf.pbc.dft.krks
+'''
+
+import time
+import numpy as np
+from pyscf import lib
+from pyscf.lib import logger
+from pyscf.pbc.scf import khf_ksymm
+from pyscf.pbc.dft import gen_grid
+from pyscf.pbc.dft import rks
+from pyscf.pbc.dft import krks
+from pyscf.pbc.dft import multigrid
+
+
+def get_veff(ks, cell=None, dm=None, dm_last=0, vhf_last=0, hermi=1,
+             kpts=None, kpts_band=None):
+    '''Coulomb + XC functional at the irreducible k-points
+
+    .. note::
+        This is a replica of pyscf.pbc.dft.krks.get_veff.  The density
+        matrices of the full k-point mesh are generated from the input dm of
+        the irreducible k-points.
+
+    Returns:
+        Veff : (nibz, nao, nao) or (*, nibz, nao, nao) ndarray
+        Veff = J + Vxc.
+    '''
+    if cell is None: cell = ks.cell
+    if dm is None: dm = ks.make_rdm1()
+    if kpts is not None and not khf_ksymm._is_ibz(ks.ksymm, kpts):
+        return krks.get_veff(ks, cell, dm, dm_last, vhf_last, hermi,
+                             kpts, kpts_band)
+    t0 = (time.clock(), time.time())
+
+    # ndim = 3 : dm.shape = (nibz, nao, nao)
+    ground_state = (isinstance(dm, np.ndarray) and dm.ndim == 3 and
+                    kpts_band is None)
+    kpts = ks.kpts_bz
+    if kpts_band is None:
+        kpts_band = ks.kpts
+    weights = ks.ksymm.weights
+    dm_bz = ks.ksymm.transform_dm(dm)
+
+    omega, alpha, hyb = ks._numint.rsh_and_hybrid_coeff(ks.xc, spin=cell.spin)
+    hybrid = abs(hyb) > 1e-10 or abs(alpha) > 1e-10
+
+    if not hybrid and isinstance(ks.with_df, multigrid.MultiGridFFTDF):
+        n, exc, vxc = multigrid.nr_rks(ks.with_df, ks.xc, dm_bz, hermi,
+                                       kpts, kpts_band,
+                                       with_j=True, return_j=False)
+        logger.debug(ks, 'nelec by numeric integration = %s', n)
+        t0 = logger.timer(ks, 'vxc', *t0)
+        return vxc
+
+    if ks.grids.non0tab is None:
+        ks.grids.build(with_non0tab=True)
+        if (isinstance(ks.grids, gen_grid.BeckeGrids) and
+            ks.small_rho_cutoff > 1e-20 and ground_state):
+            ks.grids = rks.prune_small_rho_grids_(ks, cell, dm_bz, ks.grids, kpts)
+        t0 = logger.timer(ks, 'setting up grids', *t0)
+
+    if hermi == 2:  # because rho = 0
+        n, exc, vxc = 0, 0, 0
+    else:
+        n, exc, vxc = ks._numint.nr_rks(cell, ks.grids, ks.xc, dm_bz, 0,
+                                        kpts, kpts_band)
+        logger.debug(ks, 'nelec by numeric integration = %s', n)
+        t0 = logger.timer(ks, 'vxc', *t0)
+
+    if not hybrid:
+        vj = ks.get_j(cell, dm_bz, hermi, kpts, kpts_band)
+        vxc += vj
+    else:
+        if getattr(ks.with_df, '_j_only', False):  # for GDF and MDF
+            ks.with_df._j_only = False
+        vj, vk = ks.get_jk(cell, dm_bz, hermi, kpts, kpts_band)
+        vk *= hyb
+        if abs(omega) > 1e-10:
+            vklr = ks.get_k(cell, dm_bz, hermi, kpts, kpts_band, omega=omega)
+            vklr *= (alpha - hyb)
+            vk += vklr
+        vxc += vj - vk * .5
+
+        if ground_state:
+            exc -= np.einsum('K,Kij,Kji', weights, dm, vk).real * .5 * .5
+
+    if ground_state:
+        ecoul = np.einsum('K,Kij,Kji', weights, dm, vj).real * .5
+    else:
+        ecoul = None
+
+    vxc = lib.tag_array(vxc, ecoul=ecoul, exc=exc, vj=None, vk=None)
+    return vxc
+
+
+class KsymAdaptedKRKS(khf_ksymm.KsymAdaptedKRHF, rks.KohnShamDFT):
+    '''KRKS with k-point symmetry'''
+    def __init__(self, cell, kpts=np.zeros((1,3)), xc='LDA,VWN'):
+        khf_ksymm.KsymAdaptedKRHF.__init__(self, cell, kpts)
+        rks.KohnShamDFT.__init__(self, xc)
+
+    def dump_flags(self, verbose=None):
+        khf_ksymm.KsymAdaptedKRHF.dump_flags(self, verbose)
+        rks.KohnShamDFT.dump_flags(self, verbose)
+        return self
+
+    get_veff = get_veff
+
+    def to_khf(self):
+        '''Convert to the KRKS object of the full k-point mesh.  The orbitals
+        of the irreducible k-points are transformed to all k-points.'''
+        return khf_ksymm._to_khf(self, krks.KRKS)
+
+    def energy_elec(self, dm_kpts=None, h1e_kpts=None, vhf=None):
+        if h1e_kpts is None: h1e_kpts = self.get_hcore(self.cell, self.kpts)
+        if dm_kpts is None: dm_kpts = self.make_rdm1()
+        if vhf is None or getattr(vhf, 'ecoul', None) is None:
+            vhf = self.get_veff(self.cell, dm_kpts)
+
+        weights = self.ksymm.weights
+        e1 = np.einsum('k,kij,kji', weights, h1e_kpts, dm_kpts)
+        tot_e = e1 + vhf.ecoul + vhf.exc
+        self.scf_summary['e1'] = e1.real
+        self.scf_summary['coul'] = vhf.ecoul.real
+        self.scf_summary['exc'] = vhf.exc.real
+        logger.debug(self, 'E1 = %s  Ecoul = %s  Exc = %s', e1, vhf.ecoul, vhf.exc)
+        return tot_e.real, vhf.ecoul + vhf.exc
+
+    density_fit = rks._patch_df_beckegrids(khf_ksymm.KsymAdaptedKRHF.density_fit)
+    mix_density_fit = rks._patch_df_beckegrids(khf_ksymm.KsymAdaptedKRHF.mix_density_fit)
+
+KRKS = KsymAdaptedKRKS
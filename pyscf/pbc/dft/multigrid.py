@@ -20,6 +20,7 @@
 
 import time
 import ctypes
+import threading
 import copy
 import numpy
 import scipy.linalg
@@ -30,6 +31,7 @@ from pyscf.lib import logger
 from pyscf.gto import ATOM_OF, ANG_OF, NPRIM_OF, PTR_EXP, PTR_COEFF
 from pyscf.dft.numint import libdft
 from pyscf.pbc import tools
+from pyscf.pbc.tools.pbc import _hermitian_expand, _hermitian_half
 from pyscf.pbc import gto
 from pyscf.pbc.gto import pseudo
 from pyscf.pbc.dft import numint, gen_grid
@@ -53,6 +55,9 @@ INIT_MESH_ORTH = getattr(__config__, 'pbc_dft_multigrid_init_mesh_orth', (12,12,
 INIT_MESH_NONORTH = getattr(__config__, 'pbc_dft_multigrid_init_mesh_nonorth', (32,32,32))
 KE_RATIO = getattr(__config__, 'pbc_dft_multigrid_ke_ratio', 1.3)
 TASKS_TYPE = getattr(__config__, 'pbc_dft_multigrid_tasks_type', 'ke_cut') # 'rcut'
+# The number of multigrid tasks (grid levels) to be executed concurrently.
+# The OpenMP threads are evenly distributed to the concurrent tasks.
+TASKS_CONCURRENCY = getattr(__config__, 'pbc_dft_multigrid_tasks_concurrency', 1)
 
 # RHOG_HIGH_ORDER=True will compute the high order derivatives of electron
 # density in real space and FT to reciprocal space.  Set RHOG_HIGH_ORDER=False
@@ -484,7 +489,8 @@ def _eval_rhoG(mydf, dm_kpts, hermi=1, kpts=numpy.zeros((1,3)), deriv=0,
     ni = mydf._numint
     nx, ny, nz = mydf.mesh
     rhoG = numpy.zeros((nset*rhodim,nx,ny,nz), dtype=numpy.complex128)
-    for grids_dense, grids_sparse in tasks:
+    lock = threading.Lock()
+    def eval_task(grids_dense, grids_sparse):
         h_cell = grids_dense.cell
         mesh = tuple(grids_dense.mesh)
         ngrids = numpy.prod(mesh)
@@ -577,14 +583,21 @@ def _eval_rhoG(mydf, dm_kpts, hermi=1, kpts=numpy.zeros((1,3)), deriv=0,
                     raise NotImplementedError
 
         weight = 1./nkpts * cell.vol/ngrids
-        rho_freq = tools.fft(rho.reshape(nset*rhodim, -1), mesh)
+        if numpy.isrealobj(rho):
+            rho_freq = tools.rfft(rho.reshape(nset*rhodim, -1), mesh)
+            rho_freq = _hermitian_expand(
+                rho_freq.reshape(-1,mesh[0],mesh[1],mesh[2]//2+1), mesh)
+        else:
+            rho_freq = tools.fft(rho.reshape(nset*rhodim, -1), mesh)
         rho_freq *= weight
         gx = numpy.fft.fftfreq(mesh[0], 1./mesh[0]).astype(numpy.int32)
         gy = numpy.fft.fftfreq(mesh[1], 1./mesh[1]).astype(numpy.int32)
         gz = numpy.fft.fftfreq(mesh[2], 1./mesh[2]).astype(numpy.int32)
         #:rhoG[:,gx[:,None,None],gy[:,None],gz] += rho_freq.reshape((-1,)+mesh)
-        _takebak_4d(rhoG, rho_freq.reshape((-1,) + mesh), (None, gx, gy, gz))
+        with lock:
+            _takebak_4d(rhoG, rho_freq.reshape((-1,) + mesh), (None, gx, gy, gz))
 
+    _run_tasks(mydf, tasks, eval_task, log)
     rhoG = rhoG.reshape(nset,rhodim,-1)
 
     if gga_high_order:
@@ -770,8 +783,8 @@ def _get_j_pass2(mydf, vG, kpts=numpy.zeros((1,3)), verbose=None):
     else:
         vj_kpts = numpy.zeros((nset,nkpts,nao,nao), dtype=numpy.complex128)
 
-    ni = mydf._numint
-    for grids_dense, grids_sparse in tasks:
+    lock = threading.Lock()
+    def eval_task(grids_dense, grids_sparse):
         mesh = grids_dense.mesh
         ngrids = numpy.prod(mesh)
         log.debug('mesh %s', mesh)
@@ -781,12 +794,15 @@ def _get_j_pass2(mydf, vG, kpts=numpy.zeros((1,3)), verbose=None):
         gz = numpy.fft.fftfreq(mesh[2], 1./mesh[2]).astype(numpy.int32)
         #:sub_vG = vG[:,gx[:,None,None],gy[:,None],gz].reshape(nset,ngrids)
         sub_vG = _take_4d(vG, (None, gx, gy, gz)).reshape(nset,ngrids)
-
-        v_rs = tools.ifft(sub_vG, mesh).reshape(nset,ngrids)
-        vR = numpy.asarray(v_rs.real, order='C')
-        vI = numpy.asarray(v_rs.imag, order='C')
         if at_gamma_point:
-            v_rs = vR
+            # Only the real part of the potential is needed. It is computed by
+            # the complex-to-real FFT of the Hermitian part of sub_vG
+            sub_vG = _hermitian_half(sub_vG, mesh)
+            v_rs = vR = tools.irfft(sub_vG.reshape(nset,-1), mesh)
+        else:
+            v_rs = tools.ifft(sub_vG, mesh).reshape(nset,ngrids)
+            vR = numpy.asarray(v_rs.real, order='C')
+            vI = numpy.asarray(v_rs.imag, order='C')
 
         idx_h = grids_dense.ao_idx
         if grids_sparse is None:
@@ -795,7 +811,8 @@ def _get_j_pass2(mydf, vG, kpts=numpy.zeros((1,3)), verbose=None):
                 for k in range(nkpts):
                     for i in range(nset):
                         vj_sub = lib.dot(ao_h[k].conj().T*v_rs[i,p0:p1], ao_h[k])
-                        vj_kpts[i,k,idx_h[:,None],idx_h] += vj_sub
+                        with lock:
+                            vj_kpts[i,k,idx_h[:,None],idx_h] += vj_sub
                 ao_h = ao_h_etc = None
         else:
             idx_h = grids_dense.ao_idx
@@ -824,16 +841,18 @@ def _get_j_pass2(mydf, vG, kpts=numpy.zeros((1,3)), verbose=None):
                 vp = vp + vpI * 1j
                 vpI = None
 
-            vj_kpts[:,:,idx_h[:,None],idx_h] += vp[:,:,:,:naoh]
-            vj_kpts[:,:,idx_h[:,None],idx_l] += vp[:,:,:,naoh:]
+            with lock:
+                vj_kpts[:,:,idx_h[:,None],idx_h] += vp[:,:,:,:naoh]
+                vj_kpts[:,:,idx_h[:,None],idx_l] += vp[:,:,:,naoh:]
 
-            #:shls_slice = (nshells_h, nshells_t, 0, nshells_h)
-            #:vp = eval_mat(t_cell, vR, shls_slice, 1, 0, 'LDA', kpts)
-            #:vp = lib.einsum('nkpq,pi,qj->nkij', vp, l_coeff, h_coeff)
-            #:vj_kpts[:,:,idx_l[:,None],idx_h] += vp
-            vj_kpts[:,:,idx_l[:,None],idx_h] += \
-                    vp[:,:,:,naoh:].transpose(0,1,3,2).conj()
+                #:shls_slice = (nshells_h, nshells_t, 0, nshells_h)
+                #:vp = eval_mat(t_cell, vR, shls_slice, 1, 0, 'LDA', kpts)
+                #:vp = lib.einsum('nkpq,pi,qj->nkij', vp, l_coeff, h_coeff)
+                #:vj_kpts[:,:,idx_l[:,None],idx_h] += vp
+                vj_kpts[:,:,idx_l[:,None],idx_h] += \
+                        vp[:,:,:,naoh:].transpose(0,1,3,2).conj()
 
+    _run_tasks(mydf, tasks, eval_task, log)
     return vj_kpts
 
 
@@ -851,7 +870,8 @@ def _get_gga_pass2(mydf, vG, kpts=numpy.zeros((1,3)), verbose=None):
     else:
         veff = numpy.zeros((nset,nkpts,nao,nao), dtype=numpy.complex128)
 
-    for grids_dense, grids_sparse in mydf.tasks:
+    lock = threading.Lock()
+    def eval_task(grids_dense, grids_sparse):
         mesh = grids_dense.mesh
         ngrids = numpy.prod(mesh)
         log.debug('mesh %s', mesh)
@@ -873,7 +893,8 @@ def _get_gga_pass2(mydf, vG, kpts=numpy.zeros((1,3)), verbose=None):
                     for i in range(nset):
                         aow = numint._scale_ao(ao_h[k], wv[i])
                         v = lib.dot(aow.conj().T, ao_h[k][0])
-                        veff[i,k,idx_h[:,None],idx_h] += v + v.conj().T
+                        with lock:
+                            veff[i,k,idx_h[:,None],idx_h] += v + v.conj().T
                 ao_h = ao_h_etc = None
         else:
             idx_h = grids_dense.ao_idx
@@ -895,17 +916,20 @@ def _get_gga_pass2(mydf, vG, kpts=numpy.zeros((1,3)), verbose=None):
             shls_slice = (0, nshells_h, 0, nshells_t)
             v = eval_mat(t_cell, wv, shls_slice, 1, 0, 'GGA', kpts)
             v = lib.einsum('nkpq,pi,qj->nkij', v, h_coeff, t_coeff)
-            veff[:,:,idx_h[:,None],idx_h] += v[:,:,:,:naoh]
-            veff[:,:,idx_h[:,None],idx_h] += v[:,:,:,:naoh].conj().transpose(0,1,3,2)
-            veff[:,:,idx_h[:,None],idx_l] += v[:,:,:,naoh:]
-            veff[:,:,idx_l[:,None],idx_h] += v[:,:,:,naoh:].conj().transpose(0,1,3,2)
+            with lock:
+                veff[:,:,idx_h[:,None],idx_h] += v[:,:,:,:naoh]
+                veff[:,:,idx_h[:,None],idx_h] += v[:,:,:,:naoh].conj().transpose(0,1,3,2)
+                veff[:,:,idx_h[:,None],idx_l] += v[:,:,:,naoh:]
+                veff[:,:,idx_l[:,None],idx_h] += v[:,:,:,naoh:].conj().transpose(0,1,3,2)
 
             shls_slice = (nshells_h, nshells_t, 0, nshells_h)
             v = eval_mat(t_cell, wv, shls_slice, 1, 0, 'GGA', kpts)#, offset, submesh)
             v = lib.einsum('nkpq,pi,qj->nkij', v, l_coeff.conj(), h_coeff)
-            veff[:,:,idx_l[:,None],idx_h] += v
-            veff[:,:,idx_h[:,None],idx_l] += v.conj().transpose(0,1,3,2)
+            with lock:
+                veff[:,:,idx_l[:,None],idx_h] += v
+                veff[:,:,idx_h[:,None],idx_l] += v.conj().transpose(0,1,3,2)
 
+    _run_tasks(mydf, mydf.tasks, eval_task, log)
     return veff
 
 
@@ -1696,11 +1720,70 @@ def _primitive_gto_cutoff(cell):
     return rcut, ke_cutoff
 
 
+def _task_cost(grids_dense, grids_sparse):
+    '''Estimated cost of a multigrid task: the number of grids times the
+    number of AO pairs evaluated on the grids'''
+    naoh = len(grids_dense.ao_idx)
+    if grids_sparse is None:
+        naot = naoh
+    else:
+        naot = naoh + len(grids_sparse.ao_idx)
+    return numpy.prod(grids_dense.mesh) * float(naoh * naot)
+
+def _run_tasks(mydf, tasks, task_fn, log):
+    '''Execute task_fn(grids_dense, grids_sparse) for all multigrid tasks.
+
+    When mydf.tasks_concurrency > 1, the tasks are dispatched to a pool of
+    threads, the most expensive ones first.  The OpenMP threads are evenly
+    distributed to the working threads.  task_fn should accumulate its
+    results into the shared buffers under a lock.  The wall time of each
+    task is stored in mydf.tasks_timing.
+    '''
+    ntasks = len(tasks)
+    timing = numpy.zeros(ntasks)
+    def run(i):
+        grids_dense, grids_sparse = tasks[i]
+        t0 = time.time()
+        task_fn(grids_dense, grids_sparse)
+        timing[i] = time.time() - t0
+        log.debug1('Multigrid task %d mesh %s  wall time %.2f sec',
+                   i, grids_dense.mesh, timing[i])
+
+    nworkers = min(getattr(mydf, 'tasks_concurrency', 1), ntasks)
+    if nworkers <= 1:
+        for i in range(ntasks):
+            run(i)
+    else:
+        cost = [_task_cost(*task) for task in tasks]
+        pending = list(numpy.argsort(cost)[::-1])
+        nthreads = max(1, lib.num_threads() // nworkers)
+        def worker():
+            with lib.with_omp_threads(nthreads):
+                while True:
+                    try:
+                        i = pending.pop(0)
+                    except IndexError:
+                        break
+                    run(i)
+        workers = [lib.ThreadWithTraceBack(target=worker)
+                   for k in range(nworkers)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+    mydf.tasks_timing = timing
+    return timing
+
+
 class MultiGridFFTDF(fft.FFTDF):
     def __init__(self, cell, kpts=numpy.zeros((1,3))):
         fft.FFTDF.__init__(self, cell, kpts)
         self.tasks = None
-        self._keys = self._keys.union(['tasks'])
+        self.tasks_concurrency = TASKS_CONCURRENCY
+        # Wall time of each task in the last call of J/XC evaluation
+        self.tasks_timing = None
+        self._keys = self._keys.union(['tasks', 'tasks_concurrency',
+                                       'tasks_timing'])
 
     def build(self):
         self.tasks = multi_grids_tasks(self.cell, self.mesh, self.verbose)
@@ -123,6 +123,23 @@ class KnownValues(unittest.TestCase):
         mf.kernel()
         self.assertAlmostEqual(mf.e_tot, -2.399571378419408, 7)
 
+    def test_krks_ksymm(self):
+        from pyscf.pbc.dft import krks_ksymm
+        cell = pbcgto.Cell()
+        cell.atom = 'He 0 0 0; He 1.3 1.3 1.3'
+        cell.a = np.eye(3) * 2.6
+        cell.basis = [[0, [1.2, 1.]], [1, [.8, 1.]]]
+        cell.mesh = [11] * 3
+        cell.verbose = 0
+        cell.build()
+        kpts = cell.make_kpts([2,2,2])
+        for xc in ('lda,vwn', 'b3lyp'):
+            e0 = pbcdft.KRKS(cell, kpts, xc=xc).kernel()
+            mf = krks_ksymm.KRKS(cell, kpts, xc=xc)
+            e1 = mf.kernel()
+            self.assertEqual(len(mf.kpts), 4)
+            self.assertAlmostEqual(e1, e0, 8)
+
 
 if __name__ == '__main__':
     print("Full Tests for pbc.dft.krks")
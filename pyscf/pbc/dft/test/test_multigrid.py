@@ -424,6 +424,17 @@ class KnownValues(unittest.TestCase):
         self.assertAlmostEqual(exc1, exc2, 8)
         self.assertAlmostEqual(abs(v1-v2).max(), 0, 8)
 
+    def test_tasks_concurrency(self):
+        xc = 'b88,'
+        mg_df = multigrid.MultiGridFFTDF(cell_orth)
+        n0, exc0, v0 = multigrid.nr_rks(mg_df, xc, dm, hermi=1, kpts=kpts, with_j=True)
+        mg_df.tasks_concurrency = 3
+        n1, exc1, v1 = multigrid.nr_rks(mg_df, xc, dm, hermi=1, kpts=kpts, with_j=True)
+        self.assertAlmostEqual(n0, n1, 9)
+        self.assertAlmostEqual(exc0, exc1, 9)
+        self.assertAlmostEqual(abs(v0-v1).max(), 0, 9)
+        self.assertEqual(len(mg_df.tasks_timing), len(mg_df.tasks))
+
 
 if __name__ == '__main__':
     print("Full Tests for multigrid")
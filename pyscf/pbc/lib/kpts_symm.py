@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+# Copyright 2014-2019 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Space group symmetry of a Cell and the reduction of k-point meshes to the
+irreducible Brillouin zone (IBZ).
+
+A symmetry operation g = {R|t} maps the fractional coordinates x of a point
+to W x + t, where W is an integer matrix in the basis of lattice vectors.
+Under g, the Bloch AO basis transforms as
+
+    g phi^k_mu = exp(-i (Rk) L_a) sum_nu phi^{Rk}_nu U_{nu,mu}
+
+where U is the rotation matrix of the atomic orbitals (including the
+permutation of the equivalent atoms) and L_a is the lattice vector which
+brings the image of atom a back to the reference cell.  The symmetry
+related density matrices (and Fock matrices) satisfy
+
+    D(Rk) = M D(k) M^dagger,  M_{nu,mu} = exp(-i (Rk) L_a) U_{nu,mu}
+
+Time reversal symmetry additionally gives D(-k) = D(k)^*.
+'''
+
+import numpy as np
+from pyscf import lib
+from pyscf import gto as mol_gto
+from pyscf import __config__
+
+SYMPREC = getattr(__config__, 'pbc_lib_kpts_symm_symprec', 1e-6)
+KPT_DIFF_TOL = getattr(__config__, 'pbc_lib_kpts_helper_kpt_diff_tol', 1e-6)
+
+
+def get_space_group(cell, tol=SYMPREC):
+    '''Space group operations of the cell.
+
+    Returns:
+        A list of (W, t).  W is (3,3) integer matrix which acts on the
+        fractional coordinates.  t is the fractional translation.
+    '''
+    a = cell.lattice_vectors()
+    metric = a.dot(a.T)
+    frac = np.dot(cell.atom_coords(), np.linalg.inv(a))
+    symbs = np.array([cell.atom_symbol(i) for i in range(cell.natm)])
+
+    # Candidate point group operations which preserve the lattice metric
+    ws = np.array(list(lib.cartesian_prod([(-1,0,1)]*9))).reshape(-1,3,3)
+    ws = ws[abs(np.linalg.det(ws)) == 1]
+    gs = np.einsum('nji,jk,nkl->nil', ws, metric, ws)
+    ws = ws[abs(gs - metric).max(axis=(1,2)) < tol * abs(metric).max()]
+
+    if cell.natm == 0:
+        return [(w, np.zeros(3)) for w in ws]
+
+    ops = []
+    for w in ws:
+        wfrac = frac.dot(w.T)
+        # Trial translations bring atom 0 to one of the atoms of the same kind
+        for j in np.where(symbs == symbs[0])[0]:
+            t = frac[j] - wfrac[0]
+            t -= np.round(t)
+            diff = wfrac[:,None] + t - frac
+            diff -= np.round(diff)
+            matched = (abs(diff).max(axis=2) < tol) & (symbs[:,None] == symbs)
+            if np.all(matched.sum(axis=1) == 1):
+                ops.append((w, t))
+    return ops
+
+def _rotation_cart(cell, w):
+    '''Rotation matrix in Cartesian coordinates for the operation W'''
+    a = cell.lattice_vectors()
+    return np.linalg.solve(a, w.T.dot(a)).T
+
+def _atom_map(cell, w, t, tol=SYMPREC):
+    '''Atom b and lattice translation n (fractional) for each atom a so that
+    W x_a + t = x_b + n'''
+    a = cell.lattice_vectors()
+    frac = np.dot(cell.atom_coords(), np.linalg.inv(a))
+    wfrac = frac.dot(w.T) + t
+    diff = wfrac[:,None] - frac
+    dround = np.round(diff)
+    idx = np.argmin(abs(diff - dround).max(axis=2), axis=1)
+    shifts = dround[np.arange(cell.natm),idx]
+    return idx, shifts
+
+def _ao_rotation_l(l, rots, cart=False):
+    '''Transformation matrices U of the real solid harmonics (or Cartesian
+    GTOs) under rotations, chi_mu(R^{-1} r) = sum_nu chi_nu(r) U_{nu,mu}'''
+    mol = mol_gto.M(atom='X 0 0 0', basis={'X': [[int(l), [1., 1.]]]},
+                    cart=cart, unit='B')
+    coords = np.random.RandomState(7).random_sample((60,3)) - .5
+    if cart:
+        intor = 'GTOval_cart'
+    else:
+        intor = 'GTOval_sph'
+    ao = mol.eval_gto(intor, coords)
+    ao_pinv = np.linalg.pinv(ao)
+    return [ao_pinv.dot(mol.eval_gto(intor, coords.dot(rot))) for rot in rots]
+
+def ao_transform_matrices(cell, ops):
+    '''For each operation, the matrix U of the atomic orbitals (including the
+    permutation of atoms) and the lattice translations of the atom images.
+
+    Returns:
+        us : (nops,nao,nao) ndarray
+        shifts : (nops,natm,3) ndarray
+            The lattice translations (in Cartesian coordinates) for atoms.
+        atom_maps : (nops,natm) ndarray
+    '''
+    a = cell.lattice_vectors()
+    nao = cell.nao_nr()
+    ao_loc = cell.ao_loc_nr()
+    aoslices = cell.aoslice_by_atom()
+    ls = sorted(set(cell._bas[:,mol_gto.ANG_OF]))
+    rots = [_rotation_cart(cell, w) for w, t in ops]
+    u_ls = dict([(l, _ao_rotation_l(l, rots, cell.cart)) for l in ls])
+    us = []
+    shifts = []
+    atom_maps = []
+    for iop, (w, t) in enumerate(ops):
+        u_l = dict([(l, u_ls[l][iop]) for l in ls])
+        atm_idx, ns = _atom_map(cell, w, t)
+        u = np.zeros((nao,nao))
+        for ia, ib in enumerate(atm_idx):
+            sh0, sh1 = aoslices[ia,:2]
+            p0 = aoslices[ib,2]
+            for ish in range(sh0, sh1):
+                l = cell.bas_angular(ish)
+                nd = u_l[l].shape[0]
+                i0 = ao_loc[ish]
+                for ic in range(cell.bas_nctr(ish)):
+                    j0 = p0 + i0 - aoslices[ia,2] + ic * nd
+                    u[j0:j0+nd,i0+ic*nd:i0+ic*nd+nd] = u_l[l]
+        us.append(u)
+        shifts.append(ns.dot(a))
+        atom_maps.append(atm_idx)
+    return np.asarray(us), np.asarray(shifts), np.asarray(atom_maps)
+
+
+class KPointSymmetry(lib.StreamObject):
+    '''Reduction of a k-point mesh to the irreducible Brillouin zone.
+
+    Attributes:
+        kpts_bz : (nkpts,3) ndarray
+            All k-points.
+        ibz2bz : (nibz,) ndarray of int
+            Indices of the irreducible k-points in kpts_bz.
+        bz2ibz : (nkpts,) ndarray of int
+            For each k-point, the index of the irreducible k-point which
+            generates it.
+        bz_op : (nkpts,) ndarray of int
+            The operation which transforms the irreducible k-point to the
+            k-point.
+        bz_time_reversal : (nkpts,) ndarray of bool
+            Whether time reversal is applied after the operation.
+        weights : (nibz,) ndarray
+            Weights of the irreducible k-points.  They sum to 1.
+    '''
+    def __init__(self, cell, kpts, ops=None,
+                 time_reversal=getattr(__config__, 'pbc_lib_kpts_symm_time_reversal', True)):
+        self.cell = cell
+        self.kpts_bz = np.reshape(kpts, (-1,3))
+        if ops is None:
+            ops = get_space_group(cell)
+        self.time_reversal = time_reversal
+
+        nkpts = len(self.kpts_bz)
+        scaled_kpts = cell.get_scaled_kpts(self.kpts_bz)
+        rot_kpts = []
+        ops_kept = []
+        for w, t in ops:
+            # In fractional coordinates of the reciprocal lattice, k transforms
+            # with the inverse transpose of W
+            wk = np.linalg.inv(w).T
+            kmap = _match_kpts(scaled_kpts.dot(wk.T), scaled_kpts)
+            if kmap is not None:
+                rot_kpts.append(kmap)
+                ops_kept.append((w, t))
+        if len(ops_kept) < len(ops):
+            lib.logger.debug(cell, '%d of %d space group operations do not '
+                             'preserve the k-point mesh', len(ops)-len(ops_kept),
+                             len(ops))
+        self.ops = ops_kept
+        self.time_reversal_map = None
+        if time_reversal:
+            self.time_reversal_map = _match_kpts(-scaled_kpts, scaled_kpts)
+            if self.time_reversal_map is None:
+                self.time_reversal = False
+
+        bz2ibz = -np.ones(nkpts, dtype=int)
+        bz_op = np.zeros(nkpts, dtype=int)
+        bz_time_reversal = np.zeros(nkpts, dtype=bool)
+        ibz2bz = []
+        for k in range(nkpts):
+            if bz2ibz[k] >= 0:
+                continue
+            ik = len(ibz2bz)
+            ibz2bz.append(k)
+            for iop, kmap in enumerate(rot_kpts):
+                k1 = kmap[k]
+                if bz2ibz[k1] < 0:
+                    bz2ibz[k1] = ik
+                    bz_op[k1] = iop
+                if self.time_reversal:
+                    k1 = self.time_reversal_map[k1]
+                    if bz2ibz[k1] < 0:
+                        bz2ibz[k1] = ik
+                        bz_op[k1] = iop
+                        bz_time_reversal[k1] = True
+        self.ibz2bz = np.asarray(ibz2bz)
+        self.bz2ibz = bz2ibz
+        self.bz_op = bz_op
+        self.bz_time_reversal = bz_time_reversal
+        self.weights = np.bincount(bz2ibz) / float(nkpts)
+
+        self._ao_us, self._ao_shifts = ao_transform_matrices(cell, self.ops)[:2]
+
+    @property
+    def kpts_ibz(self):
+        return self.kpts_bz[self.ibz2bz]
+
+    @property
+    def nkpts_ibz(self):
+        return len(self.ibz2bz)
+
+    def dump_flags(self, verbose=None):
+        log = lib.logger.new_logger(self.cell, verbose)
+        log.info('Number of space group operations = %d', len(self.ops))
+        log.info('Time reversal symmetry = %s', self.time_reversal)
+        log.info('Number of k-points in IBZ = %d of %d',
+                 len(self.ibz2bz), len(self.kpts_bz))
+        return self
+
+    def transform_matrix(self, k):
+        '''The matrix M which transforms matrices at the irreducible k-point
+        of k to the k-point k (before the time reversal),
+        D(k) = M D(k_ibz) M^dagger'''
+        iop = self.bz_op[k]
+        kpt = self.kpts_bz[k]
+        if self.bz_time_reversal[k]:
+            kpt = -kpt
+        u = self._ao_us[iop]
+        phase = np.exp(-1j * self._ao_shifts[iop].dot(kpt))
+        aoslices = self.cell.aoslice_by_atom()
+        ao_phase = np.empty(u.shape[1], dtype=np.complex128)
+        for ia, (p0, p1) in enumerate(aoslices[:,2:]):
+            ao_phase[p0:p1] = phase[ia]
+        return u * ao_phase
+
+    def transform_dm(self, dm_ibz):
+        '''Density matrices (or other Hermitian matrices which have the
+        symmetry of the cell) at all k-points from the irreducible k-points.
+        '''
+        dm_ibz = np.asarray(dm_ibz)
+        if dm_ibz.ndim == 4:  # UHF
+            return np.asarray([self.transform_dm(d) for d in dm_ibz])
+        nkpts = len(self.kpts_bz)
+        nao = dm_ibz.shape[-1]
+        dm_bz = np.empty((nkpts,nao,nao), dtype=np.complex128)
+        for k in range(nkpts):
+            ik = self.bz2ibz[k]
+            if k == self.ibz2bz[ik]:
+                dm_bz[k] = dm_ibz[ik]
+                continue
+            m = self.transform_matrix(k)
+            dm = m.dot(dm_ibz[ik]).dot(m.conj().T)
+            if self.bz_time_reversal[k]:
+                dm = dm.conj()
+            dm_bz[k] = dm
+        return dm_bz
+
+    transform_fock = transform_dm
+
+
+def _match_kpts(kpts1, kpts2, tol=KPT_DIFF_TOL):
+    '''Indices of kpts2 which are equivalent to kpts1 (modulo reciprocal
+    lattice vectors).  Return None if any k-point is not found.'''
+    diff = kpts1[:,None] - kpts2
+    diff -= np.round(diff)
+    match = abs(diff).max(axis=2) < tol
+    if not np.all(match.any(axis=1)):
+        return None
+    return np.argmax(match, axis=1)
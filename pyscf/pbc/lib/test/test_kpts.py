@@ -19,6 +19,7 @@ from numpy import testing
 from pyscf.pbc import gto as pbcgto
 from pyscf.pbc import tools
 from pyscf.pbc.scf import khf
+from pyscf.pbc.lib import kpts_symm
 from pyscf import lib
 
 class KnownValues(unittest.TestCase):
@@ -46,6 +47,30 @@ class KnownValues(unittest.TestCase):
         kconserve = tools.get_kconserv3(cell, kpts, kijkab)
         self.assertAlmostEqual(lib.finger(kconserve), -3.1172758206126852, 0)
 
+    def test_kpts_symm(self):
+        cell = pbcgto.Cell()
+        cell.atom = 'C 0 0 0; C 0.8917 0.8917 0.8917'
+        cell.a = '''0.      1.7834  1.7834
+                    1.7834  0.      1.7834
+                    1.7834  1.7834  0.    '''
+        cell.unit = 'A'
+        cell.basis = [[0, [1.2, 1.]], [1, [.8, 1.]], [2, [.6, 1.]]]
+        cell.build()
+        self.assertEqual(len(kpts_symm.get_space_group(cell)), 48)
+
+        kpts = cell.make_kpts([3,3,3])
+        ksymm = kpts_symm.KPointSymmetry(cell, kpts)
+        self.assertEqual(ksymm.nkpts_ibz, 4)
+        self.assertAlmostEqual(ksymm.weights.sum(), 1, 12)
+        self.assertAlmostEqual(abs(ksymm.weights*27 - [1, 8, 6, 12]).max(), 0, 9)
+
+        s = numpy.asarray(cell.pbc_intor('int1e_ovlp', kpts=kpts))
+        s1 = ksymm.transform_dm(s[ksymm.ibz2bz])
+        self.assertAlmostEqual(abs(s1 - s).max(), 0, 9)
+        t = numpy.asarray(cell.pbc_intor('int1e_kin', kpts=kpts))
+        t1 = ksymm.transform_fock(t[ksymm.ibz2bz])
+        self.assertAlmostEqual(abs(t1 - t).max(), 0, 9)
+
 if __name__ == "__main__":
     print("Tests for kpts_helper")
     unittest.main()
@@ -45,6 +45,9 @@ from pyscf import __config__
 WITH_META_LOWDIN = getattr(__config__, 'pbc_scf_analyze_with_meta_lowdin', True)
 PRE_ORTH_METHOD = getattr(__config__, 'pbc_scf_analyze_pre_orth_method', 'ANO')
 CHECK_COULOMB_IMAG = getattr(__config__, 'pbc_scf_check_coulomb_imag', True)
+# Natural orbitals (and ACE eigenvalues) below this threshold are discarded
+ACE_OCC_TOL = getattr(__config__, 'pbc_scf_ace_occ_tol', 1e-10)
+ACE_INNER_RATIO = getattr(__config__, 'pbc_scf_ace_inner_ratio', .1)
 
 
 def get_ovlp(mf, cell=None, kpts=None):
@@ -386,6 +389,207 @@ def get_rho(mf, dm=None, grids=None, kpts=None):
     ni = numint.KNumInt()
     return ni.get_rho(mf.cell, dm, grids, kpts, mf.max_memory)
 
+def _occupied_orbitals(mf, dm_kpts):
+    '''Orbitals and occupations of the k-point density matrices.  They are
+    read from the tags of dm_kpts, or otherwise computed as the natural
+    orbitals of dm_kpts.'''
+    if getattr(dm_kpts, 'mo_coeff', None) is not None:
+        return dm_kpts.mo_coeff, dm_kpts.mo_occ
+
+    s = mf.get_ovlp()
+    mo_coeff = []
+    mo_occ = []
+    for k, dm in enumerate(dm_kpts):
+        sds = reduce(np.dot, (s[k], dm, s[k]))
+        n, c = scipy.linalg.eigh(sds, s[k])
+        # Drop the natural orbitals of numerically zero occupation
+        n[n < ACE_OCC_TOL] = 0
+        mo_coeff.append(c[:,::-1])
+        mo_occ.append(n[::-1])
+    return mo_coeff, mo_occ
+
+def build_ace(mf, dm_kpts, omega=None):
+    r'''Adaptively compressed exchange (ACE) operator of the density matrix.
+
+    The ACE operator K^{ACE}_k = W_k^\dagger M_k^{-1} W_k is the low-rank
+    approximation of the exchange matrix K_k[D].  It is exact in the space of
+    the occupied orbitals C_k of D.  W_k = C_k^\dagger K_k and M_k = W_k C_k.
+    M_k is not positive definite if the exchange matrix includes the G=0
+    correction of exxdiv='ewald' for the range-separated Coulomb operator.
+
+    Returns:
+        The ACE operators K^{ACE}_k for all k-points in a (nkpts,nao,nao)
+        array, or two such arrays for UHF density matrices.
+    '''
+    from pyscf.pbc.df import fft_jk
+    with_df = mf.with_df
+    kpts = mf.kpts
+    if dm_kpts[0].ndim == 2:
+        mo_coeff, mo_occ = _occupied_orbitals(mf, dm_kpts)
+        sets = [(mo_coeff, mo_occ)]
+    else:  # KUHF
+        if getattr(dm_kpts, 'mo_coeff', None) is not None:
+            sets = list(zip(dm_kpts.mo_coeff, dm_kpts.mo_occ))
+        else:
+            sets = [_occupied_orbitals(mf, dm) for dm in dm_kpts]
+
+    vk = []
+    for mo_coeff, mo_occ in sets:
+        if omega is None:
+            w_kpts = fft_jk.get_k_occ_kpts(with_df, mo_coeff, mo_occ, kpts,
+                                           mf.exxdiv)
+        else:
+            with with_df.cell.with_range_coulomb(omega):
+                w_kpts = fft_jk.get_k_occ_kpts(with_df, mo_coeff, mo_occ, kpts,
+                                               mf.exxdiv)
+        vk_kpts = []
+        for k, w in enumerate(w_kpts):
+            c = mo_coeff[k][:,mo_occ[k]>0]
+            m = np.dot(w, c)
+            e, u = scipy.linalg.eigh((m + m.conj().T) * .5)
+            mask = abs(e) > ACE_OCC_TOL
+            uw = np.dot(u[:,mask].conj().T, w)
+            vk_kpts.append(np.dot(uw.conj().T / e[mask], uw))
+        vk.append(vk_kpts)
+
+    if dm_kpts[0].ndim == 2:
+        return lib.asarray(vk[0])
+    else:
+        return lib.asarray(vk)
+
+def kernel_ace(mf, conv_tol=1e-10, conv_tol_grad=None,
+               dm0=None, callback=None, conv_check=True, **kwargs):
+    '''SCF with the adaptively compressed exchange (ACE) operator.
+
+    The SCF iterations are carried out by one run of :func:`scf.hf.kernel`.
+    In the outer iterations the ACE operator (see :func:`build_ace`) is built
+    from the density matrix of the current SCF cycle.  The energy and the
+    orbital gradients of this cycle are exact and the convergence is checked
+    in this cycle only.  If not converged, the exchange matrices of the outer
+    iterations are extrapolated by DIIS and the extrapolated exchange matrix
+    is kept fixed in the following (inner) SCF cycles.  The inner cycles are
+    finished when they are converged, when the density matrix changes much
+    less than it moves away from the density matrix of the outer iteration,
+    or after mf.exx_ace_refresh cycles (every SCF cycle is an outer iteration
+    if mf.exx_ace_refresh is 1).  If the outer iterations do not reduce the
+    error of the exchange matrix, the ACE operator is built in every following
+    SCF cycle.  The orbitals and orbital energies are finally canonicalized
+    with the exact Fock matrix.
+
+    See also :func:`scf.hf.kernel` for the arguments and return values.
+    '''
+    if conv_tol_grad is None:
+        conv_tol_grad = np.sqrt(conv_tol)
+    check_convergence = mf.check_convergence
+    scf_conv = [False]
+    e_outer = [0]
+    vk_in = [None]
+    norm_err_last = [np.inf]
+
+    def check_ace_convergence(envs):
+        if mf._ace_cycle == 1 and not scf_conv[0]:
+            # The ACE operator was built in this cycle.  The energy is compared
+            # to the energy of the previous outer iteration.
+            envs = dict(envs, last_hf_e=e_outer[0])
+            e_outer[0] = envs['e_tot']
+        if callable(check_convergence):
+            conv = check_convergence(envs)
+        elif scf_conv[0]:  # The extra cycle of hf.kernel
+            conv = (abs(envs['e_tot']-envs['last_hf_e']) < envs['conv_tol'] or
+                    envs['norm_gorb'] < envs['conv_tol_grad'])
+        else:
+            conv = (abs(envs['e_tot']-envs['last_hf_e']) < envs['conv_tol'] and
+                    envs['norm_gorb'] < envs['conv_tol_grad'])
+        if scf_conv[0]:
+            return conv
+
+        if mf._ace_cycle > 1:  # Inner iterations
+            norm_res = np.linalg.norm(envs['dm'] - mf._ace_dm)
+            if conv or envs['norm_ddm'] < ACE_INNER_RATIO * norm_res:
+                mf._ace_refresh = True
+            return False
+
+        if conv:
+            # The extra cycle of hf.kernel uses the operator of this cycle
+            mf._ace_max_cycle = np.inf
+            mf._ace_vk_in = {}
+            scf_conv[0] = True
+            return True
+        if mf._ace_max_cycle == 1:
+            return False
+
+        # The outer iterations converge linearly.  They are accelerated by the
+        # DIIS extrapolation of the exchange matrices with the error vector
+        # vk_out - vk_in.
+        omegas = list(mf._ace_vk.keys())
+        vk_out = np.hstack([mf._ace_vk[omega].ravel() for omega in omegas])
+        if vk_in[0] is None:
+            vk_in[0] = vk_out
+        else:
+            err = vk_out - vk_in[0]
+            norm_err = np.linalg.norm(err)
+            if norm_err > .5 * norm_err_last[0]:
+                logger.debug(mf, 'ACE outer iterations do not converge. '
+                             'The ACE operator is built in every SCF cycle.')
+                mf._ace_max_cycle = 1
+                mf._ace_vk_in = {}
+                return False
+            norm_err_last[0] = norm_err
+            vk_in[0] = outer_diis.update(vk_out, xerr=err)
+        p0 = 0
+        for omega in omegas:
+            p1 = p0 + mf._ace_vk[omega].size
+            mf._ace_vk_in[omega] = vk_in[0][p0:p1].reshape(mf._ace_vk[omega].shape)
+            p0 = p1
+        if mf_diis is not None:
+            # The DIIS vectors of the old operator are not consistent with the
+            # extrapolated one
+            mf_diis.__init__(mf, mf.diis_file)
+            mf_diis.space = mf.diis_space
+        return False
+
+    diis = mf.diis
+    if isinstance(diis, lib.diis.DIIS):
+        mf_diis = diis
+    elif diis:
+        mf_diis = mf.DIIS(mf, mf.diis_file)
+        mf_diis.space = mf.diis_space
+        mf_diis.rollback = mf.diis_space_rollback
+    else:
+        mf_diis = None
+    outer_diis = lib.diis.DIIS(mf)
+    outer_diis.space = mf.diis_space
+    mf._ace_cycle = 0
+    mf._ace_max_cycle = max(1, mf.exx_ace_refresh)
+    mf.check_convergence = check_ace_convergence
+    mf.diis = mf_diis
+    try:
+        scf_conv, e_tot, mo_energy, mo_coeff, mo_occ = \
+                mol_hf.kernel(mf, conv_tol, conv_tol_grad, dm0=dm0,
+                              callback=callback, conv_check=conv_check,
+                              **kwargs)
+    finally:
+        mf.check_convergence = check_convergence
+        mf.diis = diis
+        mf._ace_cycle = mf._ace_max_cycle = None
+        mf._ace_dm = mf._ace_last_dm = None
+        mf._ace_refresh = False
+        mf._ace_vk = {}
+        mf._ace_vk_in = {}
+    dm = mf.make_rdm1(mo_coeff, mo_occ)
+    dm = lib.tag_array(dm, mo_coeff=mo_coeff, mo_occ=mo_occ)
+
+    # The ACE operator vanishes in the virtual space.  The Fock matrix with
+    # the exact exchange matrix is needed by the virtual orbital energies.
+    h1e = mf.get_hcore()
+    s1e = mf.get_ovlp()
+    vhf = mf.get_veff(mf.cell, dm)
+    fock = mf.get_fock(h1e, s1e, vhf, dm)
+    e_tot = mf.energy_tot(dm, h1e, vhf)
+    mo_energy, mo_coeff = mf.eig(fock, s1e)
+    mo_occ = mf.get_occ(mo_energy, mo_coeff)
+    return scf_conv, e_tot, mo_energy, mo_coeff, mo_occ
+
 
 class KSCF(pbchf.SCF):
     '''SCF base class with k-point sampling.
@@ -397,9 +601,20 @@ class KSCF(pbchf.SCF):
     Attributes:
         kpts : (nks,3) ndarray
             The sampling k-points in Cartesian coordinates, in units of 1/Bohr.
+        exx_ace : bool
+            Whether to use the adaptively compressed exchange (ACE) operator
+            in the SCF iterations.  It requires the FFTDF integrals.  See also
+            :func:`kernel_ace`.  Default is False.
+        exx_ace_refresh : int
+            The maximum number of SCF cycles which use the same ACE operator.
+            Default is 1, i.e. the ACE operator is built in every SCF cycle.
+            With larger values the inner SCF cycles reuse the operator and do
+            not build the exchange matrix, at the cost of more SCF cycles.
     '''
     conv_tol_grad = getattr(__config__, 'pbc_scf_KSCF_conv_tol_grad', None)
     direct_scf = getattr(__config__, 'pbc_scf_SCF_direct_scf', False)
+    exx_ace = getattr(__config__, 'pbc_scf_KSCF_exx_ace', False)
+    exx_ace_refresh = getattr(__config__, 'pbc_scf_KSCF_exx_ace_refresh', 1)
 
     def __init__(self, cell, kpts=np.zeros((1,3)),
                  exxdiv=getattr(__config__, 'pbc_scf_SCF_exxdiv', 'ewald')):
@@ -415,6 +630,16 @@ class KSCF(pbchf.SCF):
         self.conv_tol = cell.precision * 10
 
         self.exx_built = False
+        # The SCF cycle counters, the rebuild request, the density matrices
+        # and the exchange matrices of the ACE operators (for each omega) of
+        # kernel_ace
+        self._ace_cycle = None
+        self._ace_max_cycle = None
+        self._ace_refresh = False
+        self._ace_dm = None
+        self._ace_last_dm = None
+        self._ace_vk = {}
+        self._ace_vk_in = {}
         self._keys = self._keys.union(['cell', 'exx_built', 'exxdiv', 'with_df'])
 
     @property
@@ -463,6 +688,9 @@ class KSCF(pbchf.SCF):
             logger.info(self, '    Total energy shift due to Ewald probe charge'
                         ' = -1/2 * Nelec*madelung = %.12g',
                         madelung*nelectron * -.5)
+        if self.exx_ace:
+            logger.info(self, 'ACE exchange operator, rebuilt after at most %d cycles',
+                        self.exx_ace_refresh)
         logger.info(self, 'DF object = %s', self.with_df)
         if not getattr(self.with_df, 'build', None):
             # .dump_flags() is called in pbc.df.build function
@@ -559,11 +787,76 @@ class KSCF(pbchf.SCF):
         if kpts is None: kpts = self.kpts
         if dm_kpts is None: dm_kpts = self.make_rdm1()
         cpu0 = (time.clock(), time.time())
-        vj, vk = self.with_df.get_jk(dm_kpts, hermi, kpts, kpts_band,
-                                     with_j, with_k, omega, exxdiv=self.exxdiv)
+        if (with_k and self._ace_cycle is not None and hermi == 1 and
+            kpts_band is None and getattr(dm_kpts, 'ndim', None) == 3):
+            vj = None
+            if with_j:
+                vj = self.with_df.get_jk(dm_kpts, hermi, kpts, kpts_band, True,
+                                         False, omega, exxdiv=self.exxdiv)[0]
+            vk = self.get_k_ace(dm_kpts, omega)
+        else:
+            vj, vk = self.with_df.get_jk(dm_kpts, hermi, kpts, kpts_band,
+                                         with_j, with_k, omega, exxdiv=self.exxdiv)
         logger.timer(self, 'vj and vk', *cpu0)
         return vj, vk
 
+    def get_k_ace(self, dm_kpts, omega=None):
+        '''Exchange matrix from the ACE operator in :func:`kernel_ace`.  The
+        ACE operator is rebuilt from dm_kpts when kernel_ace requests it.'''
+        if dm_kpts is not self._ace_last_dm:  # A new SCF cycle
+            if (self._ace_refresh or self._ace_dm is None or
+                self._ace_cycle >= self._ace_max_cycle):
+                self._ace_dm = dm_kpts
+                self._ace_vk = {}
+                self._ace_vk_in = {}
+                self._ace_cycle = 0
+                self._ace_refresh = False
+            self._ace_cycle += 1
+            self._ace_last_dm = dm_kpts
+
+        # Callers may scale the returned exchange matrix in place
+        if self._ace_cycle > 1 and omega in self._ace_vk_in:
+            return self._ace_vk_in[omega].copy()
+        if omega not in self._ace_vk:
+            cpu0 = (time.clock(), time.time())
+            self._ace_vk[omega] = build_ace(self, self._ace_dm, omega)
+            logger.timer(self, 'ACE operator', *cpu0)
+        return self._ace_vk[omega].copy()
+
+    def scf(self, dm0=None, **kwargs):
+        if not self._ace_enabled():
+            return pbchf.SCF.scf(self, dm0, **kwargs)
+
+        cput0 = (time.clock(), time.time())
+        self.dump_flags()
+        self.build(self.cell)
+        self.converged, self.e_tot, \
+                self.mo_energy, self.mo_coeff, self.mo_occ = \
+                kernel_ace(self, self.conv_tol, self.conv_tol_grad,
+                           dm0=dm0, callback=self.callback,
+                           conv_check=self.conv_check, **kwargs)
+        logger.timer(self, 'SCF', *cput0)
+        self._finalize()
+        return self.e_tot
+    kernel = lib.alias(scf, alias_name='kernel')
+
+    def _ace_enabled(self):
+        from pyscf.pbc.scf import krohf, khf_ksymm
+        if not self.exx_ace:
+            return False
+        if (not isinstance(self, KRHF) or isinstance(self, krohf.KROHF) or
+            isinstance(self, khf_ksymm.KsymAdaptedKSCF)):
+            logger.warn(self, 'ACE exchange is only available for KRHF and KRKS')
+            return False
+        if not isinstance(self.with_df, df.FFTDF):
+            logger.warn(self, 'ACE exchange is only available for FFTDF')
+            return False
+        if getattr(self, 'xc', None) is not None:  # KS-DFT
+            omega, alpha, hyb = self._numint.rsh_and_hybrid_coeff(
+                self.xc, spin=self.cell.spin)
+            return abs(hyb) > 1e-10 or abs(alpha) > 1e-10
+        return True
+
     def get_veff(self, cell=None, dm_kpts=None, dm_last=0, vhf_last=0, hermi=1,
                  kpts=None, kpts_band=None):
         '''Hartree-Fock potential matrix for the given density matrix.
@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# Copyright 2014-2019 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Restricted Hartree-Fock for periodic systems with k-point symmetry
+
+The Fock matrices are diagonalized at the k-points of the irreducible
+Brillouin zone (IBZ) only.  The density matrices of the other k-points are
+generated by the space group operations when building J and K matrices.
+
+See Also:
+    pyscf.pbc.lib.kpts_symm
+'''
+
+import time
+import copy
+import numpy as np
+from pyscf.lib import logger
+from pyscf.pbc.scf import khf
+from pyscf.pbc.lib import kpts_symm
+from pyscf import __config__
+
+
+def _weighted_fermi(mo_energy_kpts, weights, nocc):
+    mo_energy = np.hstack(mo_energy_kpts)
+    mo_weights = np.hstack([[w]*len(e) for w, e in zip(weights, mo_energy_kpts)])
+    idx = np.argsort(mo_energy, kind='mergesort')
+    cum_weights = np.cumsum(mo_weights[idx])
+    return mo_energy[idx[np.searchsorted(cum_weights, nocc-1e-8)]]
+
+def get_fermi(mf, mo_energy_kpts=None, mo_occ_kpts=None):
+    '''Fermi level
+    '''
+    if mo_energy_kpts is None: mo_energy_kpts = mf.mo_energy
+    if mo_occ_kpts is None: mo_occ_kpts = mf.mo_occ
+    weights = mf.ksymm.weights
+    nocc = sum(w * occ.sum() for w, occ in zip(weights, mo_occ_kpts)) * .5
+    return _weighted_fermi(mo_energy_kpts, weights, nocc)
+
+def get_occ(mf, mo_energy_kpts=None, mo_coeff_kpts=None):
+    '''Label the occupancies for each orbital at the irreducible k-points.
+    The Fermi level is determined by the weighted number of electrons.
+    '''
+    if mo_energy_kpts is None: mo_energy_kpts = mf.mo_energy
+    nocc = mf.cell.tot_electrons(1) * .5
+    fermi = _weighted_fermi(mo_energy_kpts, mf.ksymm.weights, nocc)
+
+    mo_occ_kpts = []
+    for mo_e in mo_energy_kpts:
+        mo_occ_kpts.append((mo_e <= fermi).astype(np.double) * 2)
+
+    if mf.verbose >= logger.DEBUG:
+        np.set_printoptions(threshold=sum(len(e) for e in mo_energy_kpts))
+        logger.debug(mf, '     k-point                  mo_energy')
+        for k,kpt in enumerate(mf.cell.get_scaled_kpts(mf.kpts)):
+            logger.debug(mf, '  %2d (%6.3f %6.3f %6.3f)   %s %s',
+                         k, kpt[0], kpt[1], kpt[2],
+                         mo_energy_kpts[k][mo_occ_kpts[k]> 0],
+                         mo_energy_kpts[k][mo_occ_kpts[k]==0])
+        np.set_printoptions(threshold=1000)
+    return mo_occ_kpts
+
+def energy_elec(mf, dm_kpts=None, h1e_kpts=None, vhf_kpts=None):
+    '''Following pyscf.pbc.scf.khf.energy_elec().  The traces at the
+    irreducible k-points are summed with the weights of the k-points.
+    '''
+    if dm_kpts is None: dm_kpts = mf.make_rdm1()
+    if h1e_kpts is None: h1e_kpts = mf.get_hcore()
+    if vhf_kpts is None: vhf_kpts = mf.get_veff(mf.cell, dm_kpts)
+
+    weights = mf.ksymm.weights
+    e1 = np.einsum('k,kij,kji', weights, dm_kpts, h1e_kpts)
+    e_coul = np.einsum('k,kij,kji', weights, dm_kpts, vhf_kpts) * 0.5
+    mf.scf_summary['e1'] = e1.real
+    mf.scf_summary['e2'] = e_coul.real
+    logger.debug(mf, 'E1 = %s  E_coul = %s', e1, e_coul)
+    return (e1+e_coul).real, e_coul.real
+
+
+class KsymAdaptedKSCF(khf.KSCF):
+    '''KSCF with k-point symmetry.
+
+    Attributes:
+        kpts : (nibz,3) ndarray
+            The irreducible k-points.  When assigning kpts, the full k-point
+            mesh should be given.  It is reduced to the IBZ automatically.
+        kpts_bz : (nkpts,3) ndarray
+            All k-points of the mesh.
+        ksymm : :class:`KPointSymmetry`
+            The mapping between the full k-point mesh and the IBZ.
+        time_reversal : bool
+            Whether to use the time reversal symmetry k -> -k.
+    '''
+    time_reversal = getattr(__config__, 'pbc_scf_KsymAdaptedKSCF_time_reversal', True)
+
+    def __init__(self, cell, kpts=np.zeros((1,3)),
+                 exxdiv=getattr(__config__, 'pbc_scf_SCF_exxdiv', 'ewald')):
+        self.ksymm = None
+        khf.KSCF.__init__(self, cell, kpts, exxdiv)
+        self._keys = self._keys.union(['ksymm', 'time_reversal'])
+
+    @property
+    def kpts(self):
+        if 'kpts' in self.__dict__:
+            # To handle the attribute kpt loaded from chkfile
+            self.kpt = self.__dict__.pop('kpts')
+        return self.ksymm.kpts_ibz
+    @kpts.setter
+    def kpts(self, x):
+        self.with_df.kpts = np.reshape(x, (-1,3))
+        self.ksymm = kpts_symm.KPointSymmetry(self.cell, self.with_df.kpts,
+                                              time_reversal=self.time_reversal)
+
+    @property
+    def kpts_bz(self):
+        return self.with_df.kpts
+
+    def dump_flags(self, verbose=None):
+        khf.KSCF.dump_flags(self, verbose)
+        logger.info(self, 'N kpts in the full mesh = %d', len(self.kpts_bz))
+        self.ksymm.dump_flags(verbose)
+        return self
+
+    get_occ = get_occ
+    energy_elec = energy_elec
+    get_fermi = get_fermi
+
+    def get_jk(self, cell=None, dm_kpts=None, hermi=1, kpts=None, kpts_band=None,
+               with_j=True, with_k=True, omega=None, **kwargs):
+        '''J and K matrices at the irreducible k-points (or the band k-points
+        kpts_band).  dm_kpts are the density matrices at the irreducible
+        k-points unless the full k-point mesh is given in kpts.
+        '''
+        if cell is None: cell = self.cell
+        if dm_kpts is None: dm_kpts = self.make_rdm1()
+        cpu0 = (time.clock(), time.time())
+        if kpts is None or _is_ibz(self.ksymm, kpts):
+            dm_kpts = self.ksymm.transform_dm(dm_kpts)
+            kpts = self.kpts_bz
+            if kpts_band is None:
+                kpts_band = self.kpts
+        vj, vk = self.with_df.get_jk(dm_kpts, hermi, kpts, kpts_band,
+                                     with_j, with_k, omega, exxdiv=self.exxdiv)
+        logger.timer(self, 'vj and vk', *cpu0)
+        return vj, vk
+
+    def get_rho(self, dm=None, grids=None, kpts=None):
+        if dm is None: dm = self.make_rdm1()
+        if kpts is None or _is_ibz(self.ksymm, kpts):
+            dm = self.ksymm.transform_dm(dm)
+            kpts = self.kpts_bz
+        return khf.get_rho(self, dm, grids, kpts)
+
+    def to_khf(self):
+        '''Convert to the KSCF object of the full k-point mesh.  The orbitals
+        of the irreducible k-points are transformed to all k-points.'''
+        return _to_khf(self, khf.KRHF)
+
+    def analyze(self, verbose=None,
+                with_meta_lowdin=getattr(__config__, 'pbc_scf_analyze_with_meta_lowdin', True),
+                **kwargs):
+        '''Analyze the orbitals and the density matrices of the full k-point
+        mesh.  See :func:`pyscf.pbc.scf.khf.analyze`.'''
+        if verbose is None: verbose = self.verbose
+        return self.to_khf().analyze(verbose, with_meta_lowdin, **kwargs)
+
+    def mulliken_meta(self, cell=None, dm=None, verbose=logger.DEBUG,
+                      **kwargs):
+        '''Mulliken population analysis of the density matrices of the full
+        k-point mesh.  dm can be given at the irreducible k-points.'''
+        if dm is None: dm = self.make_rdm1()
+        if len(dm) == self.ksymm.nkpts_ibz:
+            dm = self.ksymm.transform_dm(dm)
+        return self.to_khf().mulliken_meta(cell, dm, verbose, **kwargs)
+
+    def stability(self, *args, **kwargs):
+        raise NotImplementedError('Stability analysis is not available for the '
+                                  'orbitals of the irreducible k-points. Call '
+                                  '.to_khf() to get the SCF object of the full '
+                                  'k-point mesh.')
+
+    def newton(self):
+        raise NotImplementedError('Newton solver is not available for the '
+                                  'orbitals of the irreducible k-points. Call '
+                                  '.to_khf() to get the SCF object of the full '
+                                  'k-point mesh.')
+
+
+class KsymAdaptedKRHF(KsymAdaptedKSCF, khf.KRHF):
+    '''KRHF with k-point symmetry'''
+    check_sanity = khf.KRHF.check_sanity
+
+def _to_khf(mf, cls):
+    '''An object of class cls for the full k-point mesh, with the attributes
+    of mf and the orbitals of mf transformed to all k-points.'''
+    ksymm = mf.ksymm
+    kmf = mf.view(cls)
+    kmf.__dict__.pop('ksymm', None)
+    kmf.__dict__.pop('time_reversal', None)
+    kmf._keys = kmf._keys.difference(['ksymm', 'time_reversal'])
+    kmf.with_df = copy.copy(mf.with_df)
+    if mf.mo_coeff is None:
+        return kmf
+
+    mo_coeff = []
+    for k in range(len(ksymm.kpts_bz)):
+        ik = ksymm.bz2ibz[k]
+        c = np.asarray(mf.mo_coeff[ik])
+        if k != ksymm.ibz2bz[ik]:
+            c = ksymm.transform_matrix(k).dot(c)
+            if ksymm.bz_time_reversal[k]:
+                c = c.conj()
+        mo_coeff.append(c)
+    kmf.mo_coeff = mo_coeff
+    kmf.mo_energy = [mf.mo_energy[ik] for ik in ksymm.bz2ibz]
+    kmf.mo_occ = [mf.mo_occ[ik] for ik in ksymm.bz2ibz]
+    return kmf
+
+def _is_ibz(ksymm, kpts):
+    kpts_ibz = ksymm.kpts_ibz
+    return (np.shape(kpts) == kpts_ibz.shape and
+            abs(np.asarray(kpts) - kpts_ibz).max() < kpts_symm.KPT_DIFF_TOL)
+
+KRHF = KsymAdaptedKRHF
+
+
+if __name__ == '__main__':
+    from pyscf.pbc import gto
+    cell = gto.Cell()
+    cell.atom = 'C 0 0 0; C 0.8917 0.8917 0.8917'
+    cell.a = '0 1.7834 1.7834; 1.7834 0 1.7834; 1.7834 1.7834 0'
+    cell.unit = 'A'
+    cell.basis = 'gth-szv'
+    cell.pseudo = 'gth-pade'
+    cell.mesh = [24] * 3
+    cell.verbose = 5
+    cell.build()
+    mf = KRHF(cell, cell.make_kpts([3,3,3]))
+    mf.kernel()
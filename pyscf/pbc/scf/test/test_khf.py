@@ -272,6 +272,103 @@ class KnownValues(unittest.TestCase):
         self.assertAlmostEqual(e1, e2, 9)
         self.assertAlmostEqual(e1, -11.451118801956275, 9)
 
+    def test_krhf_ksymm(self):
+        from pyscf.pbc.scf import khf_ksymm
+        cell = pbcgto.Cell()
+        cell.atom = 'He 0 0 0; He 1.3 1.3 1.3'
+        cell.a = np.eye(3) * 2.6
+        cell.basis = [[0, [1.2, 1.]], [1, [.8, 1.]]]
+        cell.mesh = [11] * 3
+        cell.verbose = 0
+        cell.build()
+        kpts = cell.make_kpts([2,2,2])
+        e0 = khf.KRHF(cell, kpts).kernel()
+        mf = khf_ksymm.KRHF(cell, kpts)
+        e1 = mf.kernel()
+        self.assertEqual(len(mf.kpts), 4)
+        self.assertAlmostEqual(e1, e0, 8)
+
+        kmf = mf.to_khf()
+        self.assertTrue(type(kmf) is khf.KRHF)
+        self.assertEqual(len(kmf.mo_coeff), 8)
+        self.assertAlmostEqual(kmf.energy_tot(), e0, 8)
+        self.assertRaises(NotImplementedError, mf.stability)
+
+    def test_krhf_ace(self):
+        cell = pbcgto.M(atom='He 0 0 0; He 1 1.2 1', a=np.eye(3)*3.5,
+                        basis='631g', mesh=[11]*3, verbose=0)
+        kpts = cell.make_kpts([2,1,1])
+        mf = khf.KRHF(cell, kpts)
+        mf.conv_tol = 1e-10
+        e0 = mf.kernel()
+        mf1 = khf.KRHF(cell, kpts)
+        mf1.conv_tol = 1e-10
+        mf1.exx_ace = True
+        e1 = mf1.kernel()
+        self.assertTrue(mf1.converged)
+        self.assertAlmostEqual(e1, e0, 8)
+        self.assertAlmostEqual(abs(np.array(mf1.mo_energy) -
+                                   np.array(mf.mo_energy)).max(), 0, 6)
+
+        dm = mf.make_rdm1()
+        dm = lib.tag_array(dm, mo_coeff=mf.mo_coeff, mo_occ=mf.mo_occ)
+        vk = mf.get_k(dm_kpts=dm)
+        vk_ace = khf.build_ace(mf, dm)
+        for k in range(len(kpts)):
+            c = mf.mo_coeff[k][:,mf.mo_occ[k]>0]
+            self.assertAlmostEqual(abs(vk_ace[k].dot(c) - vk[k].dot(c)).max(), 0, 9)
+
+        # The G=0 correction makes M_k indefinite for the short-range
+        # exchange
+        vk = mf.get_k(dm_kpts=dm, omega=.3)
+        vk_ace = khf.build_ace(mf, dm, omega=.3)
+        for k in range(len(kpts)):
+            c = mf.mo_coeff[k][:,mf.mo_occ[k]>0]
+            self.assertAlmostEqual(abs(vk_ace[k].dot(c) - vk[k].dot(c)).max(), 0, 9)
+
+    def test_krhf_ace_k_builds(self):
+        from pyscf.pbc.df import fft_jk
+        cell = pbcgto.M(atom='He 0 0 0; He 1 1.2 1', a=np.eye(3)*3.5,
+                        basis='631g', mesh=[11]*3, verbose=0)
+        kpts = cell.make_kpts([2,1,1])
+        count = {'full': 0, 'occ': 0}
+        get_k_kpts, get_k_occ_kpts = fft_jk.get_k_kpts, fft_jk.get_k_occ_kpts
+        def count_k_kpts(*args, **kwargs):
+            count['full'] += 1
+            return get_k_kpts(*args, **kwargs)
+        def count_k_occ_kpts(*args, **kwargs):
+            count['occ'] += 1
+            return get_k_occ_kpts(*args, **kwargs)
+        def run(exx_ace, exx_ace_refresh=1):
+            count['full'] = count['occ'] = 0
+            mf = khf.KRHF(cell, kpts)
+            mf.conv_tol = 1e-10
+            mf.exx_ace = exx_ace
+            mf.exx_ace_refresh = exx_ace_refresh
+            cycles = []
+            mf.callback = lambda envs: cycles.append(envs['cycle'])
+            e = mf.kernel()
+            self.assertTrue(mf.converged)
+            return e, len(cycles), count['full'], count['occ']
+        fft_jk.get_k_kpts = count_k_kpts
+        fft_jk.get_k_occ_kpts = count_k_occ_kpts
+        try:
+            e0, cycles0, nfull0, nocc0 = run(False)
+            e1, cycles1, nfull1, nocc1 = run(True)
+            e2, cycles2, nfull2, nocc2 = run(True, 4)
+        finally:
+            fft_jk.get_k_kpts = get_k_kpts
+            fft_jk.get_k_occ_kpts = get_k_occ_kpts
+        self.assertEqual(nocc0, 0)
+        self.assertAlmostEqual(e1, e0, 8)
+        self.assertAlmostEqual(e2, e0, 8)
+        # Only the final canonicalization builds the full exchange matrix
+        self.assertEqual(nfull1, 1)
+        self.assertEqual(nfull2, 1)
+        self.assertTrue(nfull1 + nocc1 <= nfull0)
+        # The inner cycles reuse the ACE operator
+        self.assertTrue(nocc2 < cycles2)
+
 
 if __name__ == '__main__':
     print("Full Tests for pbc.scf.khf")
@@ -43,6 +43,10 @@ class TDA(rhf.TDA):
     def __init__(self, mf):
         from pyscf.pbc import scf
         assert(isinstance(mf, scf.khf.KSCF))
+        if getattr(mf, 'ksymm', None) is not None:
+            # Orbitals of the irreducible k-points from k-point symmetry
+            # adapted SCF are transformed to the full k-point mesh
+            mf = mf.to_khf()
         self.cell = mf.cell
         rhf.TDA.__init__(self, mf)
         from pyscf.pbc.df.df_ao2mo import warn_pbc2d_eri
@@ -22,14 +22,35 @@ from pyscf.pbc.lib.kpts_helper import get_kconserv, get_kconserv3
 from pyscf import __config__
 
 FFT_ENGINE = getattr(__config__, 'pbc_tools_pbc_fft_engine', 'BLAS')
+# File to load and save the FFTW wisdom
+FFTW_WISDOM = getattr(__config__, 'pbc_tools_pbc_fftw_wisdom', None)
+FFTW_PLANNER_EFFORT = getattr(__config__, 'pbc_tools_pbc_fftw_planner_effort',
+                              'FFTW_ESTIMATE')
+
+class _PlanCache(dict):
+    '''FFT plans (or the DFT matrices of the BLAS engine) indexed by
+    (mesh, batch, dtype).  The oldest plan is dropped when the cache holds
+    more than max_size plans.'''
+    max_size = 32
+    def get_plan(self, key, make_plan):
+        if key not in self:
+            if len(self) >= self.max_size:
+                self.pop(next(iter(self)))
+            self[key] = make_plan()
+        return self[key]
+
+_blas_plans = _PlanCache()
+def _blas_dft_matrices(mesh, sign):
+    def make_plan():
+        mats = []
+        for n in mesh:
+            G = np.fft.fftfreq(n)
+            mats.append(np.exp(np.einsum('x,k->xk', sign*2j*np.pi*np.arange(n), G)))
+        return mats
+    return _blas_plans.get_plan((tuple(mesh), sign), make_plan)
 
 def _fftn_blas(f, mesh):
-    Gx = np.fft.fftfreq(mesh[0])
-    Gy = np.fft.fftfreq(mesh[1])
-    Gz = np.fft.fftfreq(mesh[2])
-    expRGx = np.exp(np.einsum('x,k->xk', -2j*np.pi*np.arange(mesh[0]), Gx))
-    expRGy = np.exp(np.einsum('x,k->xk', -2j*np.pi*np.arange(mesh[1]), Gy))
-    expRGz = np.exp(np.einsum('x,k->xk', -2j*np.pi*np.arange(mesh[2]), Gz))
+    expRGx, expRGy, expRGz = _blas_dft_matrices(mesh, -1)
     out = np.empty(f.shape, dtype=np.complex128)
     buf = np.empty(mesh, dtype=np.complex128)
     for i, fi in enumerate(f):
@@ -40,12 +61,7 @@ def _fftn_blas(f, mesh):
     return out.reshape(-1, *mesh)
 
 def _ifftn_blas(g, mesh):
-    Gx = np.fft.fftfreq(mesh[0])
-    Gy = np.fft.fftfreq(mesh[1])
-    Gz = np.fft.fftfreq(mesh[2])
-    expRGx = np.exp(np.einsum('x,k->xk', 2j*np.pi*np.arange(mesh[0]), Gx))
-    expRGy = np.exp(np.einsum('x,k->xk', 2j*np.pi*np.arange(mesh[1]), Gy))
-    expRGz = np.exp(np.einsum('x,k->xk', 2j*np.pi*np.arange(mesh[2]), Gz))
+    expRGx, expRGy, expRGz = _blas_dft_matrices(mesh, 1)
     out = np.empty(g.shape, dtype=np.complex128)
     buf = np.empty(mesh, dtype=np.complex128)
     for i, gi in enumerate(g):
@@ -55,55 +71,177 @@ def _ifftn_blas(g, mesh):
         f = lib.dot(f.reshape(mesh[2],-1).T, expRGz, 1./mesh[2], c=out[i].reshape(-1,mesh[2]))
     return out.reshape(-1, *mesh)
 
-if FFT_ENGINE == 'FFTW':
-    # pyfftw is slower than np.fft in most cases
-    try:
-        import pyfftw
-        pyfftw.interfaces.cache.enable()
-        nproc = lib.num_threads()
-        def _fftn_wrapper(a):
-            return pyfftw.interfaces.numpy_fft.fftn(a, axes=(1,2,3), threads=nproc)
-        def _ifftn_wrapper(a):
-            return pyfftw.interfaces.numpy_fft.ifftn(a, axes=(1,2,3), threads=nproc)
-    except ImportError:
-        def _fftn_wrapper(a):
-            return np.fft.fftn(a, axes=(1,2,3))
-        def _ifftn_wrapper(a):
-            return np.fft.ifftn(a, axes=(1,2,3))
-
-elif FFT_ENGINE == 'NUMPY':
-    def _fftn_wrapper(a):
-        return np.fft.fftn(a, axes=(1,2,3))
-    def _ifftn_wrapper(a):
-        return np.fft.ifftn(a, axes=(1,2,3))
+def _hermitian_expand(g, mesh):
+    '''Recover the full spectrum of real functions from the first nz//2+1
+    elements of the last axis, using g(-G) = g(G)^*'''
+    nx, ny, nz = mesh
+    nh = nz // 2 + 1
+    out = np.empty((g.shape[0],nx,ny,nz), dtype=np.complex128)
+    out[:,:,:,:nh] = g
+    if nz > nh:
+        ix = -np.arange(nx) % nx
+        iy = -np.arange(ny) % ny
+        iz = nz - np.arange(nh, nz)
+        out[:,:,:,nh:] = g[:,ix[:,None,None],iy[:,None],iz].conj()
+    return out
+
+def _hermitian_half(g, mesh):
+    '''The first nz//2+1 elements (along the last axis) of the Hermitian part
+    (g(G) + g(-G)^*)/2 of g.  The real part of ifft(g) is the same to the
+    complex-to-real inverse FFT of the returned array.'''
+    nx, ny, nz = mesh
+    nh = nz // 2 + 1
+    g = g.reshape(-1,nx,ny,nz)
+    ix = -np.arange(nx) % nx
+    iy = -np.arange(ny) % ny
+    iz = -np.arange(nh) % nz
+    return (g[:,:,:,:nh] + g[:,ix[:,None,None],iy[:,None],iz].conj()) * .5
+
+def _rfftn_by_fftn(fftn):
+    '''Real-to-complex transform computed by a complex FFT engine'''
+    def rfftn(a):
+        nz = a.shape[3]
+        return np.asarray(fftn(a)[:,:,:,:nz//2+1], order='C')
+    return rfftn
+
+def _irfftn_by_ifftn(ifftn):
+    '''Complex-to-real transform computed by a complex FFT engine'''
+    def irfftn(a, mesh):
+        return ifftn(_hermitian_expand(a, mesh)).real
+    return irfftn
+
+_FFT_ENGINES = {}
+
+def register_fft_engine(name, fftn, ifftn, rfftn=None, irfftn=None):
+    '''Register an FFT engine which can be selected by :func:`set_fft_engine`.
 
-elif FFT_ENGINE == 'NUMPY+BLAS':
-    _EXCLUDE = [17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79,
-                83, 89, 97,101,103,107,109,113,127,131,137,139,149,151,157,163,
-                167,173,179,181,191,193,197,199,211,223,227,229,233,239,241,251,
-                257,263,269,271,277,281,283,293]
-    _EXCLUDE = set(_EXCLUDE + [n*2 for n in _EXCLUDE] + [n*3 for n in _EXCLUDE])
-    def _fftn_wrapper(a):
-        mesh = a.shape[1:]
-        if mesh[0] in _EXCLUDE and mesh[1] in _EXCLUDE and mesh[2] in _EXCLUDE:
-            return _fftn_blas(a, mesh)
-        else:
-            return np.fft.fftn(a, axes=(1,2,3))
-    def _ifftn_wrapper(a):
-        mesh = a.shape[1:]
-        if mesh[0] in _EXCLUDE and mesh[1] in _EXCLUDE and mesh[2] in _EXCLUDE:
-            return _ifftn_blas(a, mesh)
-        else:
-            return np.fft.ifftn(a, axes=(1,2,3))
+    Args:
+        fftn, ifftn : functions
+            fftn(a) and ifftn(a) are the complex FFT and inverse FFT on the
+            last three axes of the 4D array a (a batch of meshes).  The
+            normalization factors are the same to numpy.fft.
+
+    Kwargs:
+        rfftn, irfftn : functions
+            rfftn(a) is the FFT of the real 4D array a.  It returns the first
+            nz//2+1 elements of the last axis.  irfftn(g, mesh) is its inverse
+            transform.  If not given, they are computed with fftn and ifftn.
+    '''
+    if rfftn is None:
+        rfftn = _rfftn_by_fftn(fftn)
+    if irfftn is None:
+        irfftn = _irfftn_by_ifftn(ifftn)
+    _FFT_ENGINES[name.upper()] = (fftn, ifftn, rfftn, irfftn)
+
+def set_fft_engine(name):
+    '''Select the FFT engine at runtime.  The registered engines are 'BLAS',
+    'NUMPY', 'NUMPY+BLAS', 'SCIPY' (scipy.fft with lib.num_threads() workers)
+    and 'FFTW' (pyfftw with cached plans).  If scipy.fft or pyfftw is not
+    available, the NUMPY engine is used.
 
-#?elif:  # 'FFTW+BLAS'
-else:  # 'BLAS'
-    def _fftn_wrapper(a):
-        mesh = a.shape[1:]
+    Returns:
+        The name of the selected engine
+    '''
+    global FFT_ENGINE, _fftn_wrapper, _ifftn_wrapper, _rfftn_wrapper, _irfftn_wrapper
+    name = name.upper()
+    if name not in _FFT_ENGINES:
+        if name in ('FFTW', 'SCIPY'):
+            warnings.warn('FFT engine %s is not available. NUMPY is used.' % name)
+            name = 'NUMPY'
+        else:
+            raise KeyError('Unknown FFT engine %s' % name)
+    FFT_ENGINE = name
+    _fftn_wrapper, _ifftn_wrapper, _rfftn_wrapper, _irfftn_wrapper = \
+            _FFT_ENGINES[name]
+    return name
+
+def _numpy_fftn(a):
+    return np.fft.fftn(a, axes=(1,2,3))
+def _numpy_ifftn(a):
+    return np.fft.ifftn(a, axes=(1,2,3))
+def _numpy_rfftn(a):
+    return np.fft.rfftn(a, axes=(1,2,3))
+def _numpy_irfftn(a, mesh):
+    return np.fft.irfftn(a, s=mesh, axes=(1,2,3))
+register_fft_engine('NUMPY', _numpy_fftn, _numpy_ifftn, _numpy_rfftn, _numpy_irfftn)
+
+def _blas_fftn(a):
+    return _fftn_blas(a, a.shape[1:])
+def _blas_ifftn(a):
+    return _ifftn_blas(a, a.shape[1:])
+register_fft_engine('BLAS', _blas_fftn, _blas_ifftn)
+
+_EXCLUDE = [17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79,
+            83, 89, 97,101,103,107,109,113,127,131,137,139,149,151,157,163,
+            167,173,179,181,191,193,197,199,211,223,227,229,233,239,241,251,
+            257,263,269,271,277,281,283,293]
+_EXCLUDE = set(_EXCLUDE + [n*2 for n in _EXCLUDE] + [n*3 for n in _EXCLUDE])
+def _numpy_blas_fftn(a):
+    mesh = a.shape[1:]
+    if mesh[0] in _EXCLUDE and mesh[1] in _EXCLUDE and mesh[2] in _EXCLUDE:
         return _fftn_blas(a, mesh)
-    def _ifftn_wrapper(a):
-        mesh = a.shape[1:]
+    else:
+        return np.fft.fftn(a, axes=(1,2,3))
+def _numpy_blas_ifftn(a):
+    mesh = a.shape[1:]
+    if mesh[0] in _EXCLUDE and mesh[1] in _EXCLUDE and mesh[2] in _EXCLUDE:
         return _ifftn_blas(a, mesh)
+    else:
+        return np.fft.ifftn(a, axes=(1,2,3))
+register_fft_engine('NUMPY+BLAS', _numpy_blas_fftn, _numpy_blas_ifftn)
+
+try:
+    import scipy.fft
+    def _scipy_fftn(a):
+        return scipy.fft.fftn(a, axes=(1,2,3), workers=lib.num_threads())
+    def _scipy_ifftn(a):
+        return scipy.fft.ifftn(a, axes=(1,2,3), workers=lib.num_threads())
+    def _scipy_rfftn(a):
+        return scipy.fft.rfftn(a, axes=(1,2,3), workers=lib.num_threads())
+    def _scipy_irfftn(a, mesh):
+        return scipy.fft.irfftn(a, s=mesh, axes=(1,2,3), workers=lib.num_threads())
+    register_fft_engine('SCIPY', _scipy_fftn, _scipy_ifftn, _scipy_rfftn, _scipy_irfftn)
+except ImportError:
+    pass
+
+try:
+    import pyfftw
+    _fftw_plans = _PlanCache()
+    def _fftw_plan(kind, a, mesh=None):
+        def make_plan():
+            kwargs = {'axes': (1,2,3), 'threads': lib.num_threads(),
+                      'planner_effort': FFTW_PLANNER_EFFORT}
+            if mesh is not None:
+                kwargs['s'] = mesh
+            return getattr(pyfftw.builders, kind)(a, **kwargs)
+        return _fftw_plans.get_plan((kind, a.shape, a.dtype.char), make_plan)
+    # The output array of a plan is reused by the next call of the plan. It is
+    # copied to avoid being overwritten.
+    def _fftw_fftn(a):
+        return _fftw_plan('fftn', a)(a).copy()
+    def _fftw_ifftn(a):
+        return _fftw_plan('ifftn', a)(a).copy()
+    def _fftw_rfftn(a):
+        return _fftw_plan('rfftn', a)(a).copy()
+    def _fftw_irfftn(a, mesh):
+        return _fftw_plan('irfftn', a, tuple(mesh))(a).copy()
+    register_fft_engine('FFTW', _fftw_fftn, _fftw_ifftn, _fftw_rfftn, _fftw_irfftn)
+
+    if FFTW_WISDOM:
+        import os
+        import atexit
+        import pickle
+        if os.path.isfile(FFTW_WISDOM):
+            with open(FFTW_WISDOM, 'rb') as f:
+                pyfftw.import_wisdom(pickle.load(f))
+        def _save_fftw_wisdom():
+            with open(FFTW_WISDOM, 'wb') as f:
+                pickle.dump(pyfftw.export_wisdom(), f)
+        atexit.register(_save_fftw_wisdom)
+except ImportError:
+    pass
+
+set_fft_engine(FFT_ENGINE)
 
 
 def fft(f, mesh):
@@ -171,6 +309,60 @@ def ifft(g, mesh):
         return f3d.reshape(-1, ngrids)
 
 
+def rfft(f, mesh):
+    '''Perform the 3D FFT of real functions from real (R) to reciprocal (G)
+    space.  Only the first nz//2+1 elements along the last dimension of the
+    mesh are computed.  The rest are determined by g(-G) = g(G)^*.
+
+    Args:
+        f : (nx*ny*nz,) or (n,nx*ny*nz) ndarray of floats
+            The function(s) to be FFT'd.
+        mesh : (3,) ndarray of ints (= nx,ny,nz)
+
+    Returns:
+        (nx*ny*(nz//2+1),) or (n,nx*ny*(nz//2+1)) ndarray. The elements are
+        in the order of Gv[rfft_mesh(mesh)].
+    '''
+    if f.size == 0:
+        return np.zeros(f.shape, dtype=np.complex128)
+
+    f3d = np.asarray(f, dtype=np.double).reshape(-1, *mesh)
+    g3d = _rfftn_wrapper(f3d)
+    if f.ndim == 1:
+        return g3d.ravel()
+    else:
+        return g3d.reshape(f3d.shape[0], -1)
+
+def irfft(g, mesh):
+    '''The inverse transform of :func:`rfft`.  The result is real.
+
+    Args:
+        g : (nx*ny*(nz//2+1),) or (n,nx*ny*(nz//2+1)) ndarray
+            The first nz//2+1 elements (along the last dimension of the mesh)
+            of the FFT of real functions.
+        mesh : (3,) ndarray of ints (= nx,ny,nz)
+
+    Returns:
+        (nx*ny*nz,) or (n,nx*ny*nz) ndarray of floats
+    '''
+    if g.size == 0:
+        return np.zeros(g.shape)
+
+    g3d = g.reshape(-1, mesh[0], mesh[1], mesh[2]//2+1)
+    f3d = _irfftn_wrapper(g3d, tuple(mesh))
+    if g.ndim == 1:
+        return f3d.ravel()
+    else:
+        return f3d.reshape(g3d.shape[0], -1)
+
+def rfft_mesh(mesh):
+    '''The indices of the elements of :func:`rfft` in the flattened mesh
+    (the index order of Gv)'''
+    nx, ny, nz = mesh
+    idx = np.arange(nx*ny*nz).reshape(nx,ny,nz)
+    return idx[:,:,:nz//2+1].ravel()
+
+
 def fftk(f, mesh, expmikr):
     '''Perform the 3D FFT of a real-space function which is (periodic*e^{ikr}).
 
@@ -168,6 +168,21 @@ class KnownValues(unittest.TestCase):
         v = tools.ifft(a, [8,n,8]).ravel()
         self.assertAlmostEqual(abs(ref-v).max(), 0, 10)
 
+    def test_rfft(self):
+        engine = tools.FFT_ENGINE
+        for mesh in ([9,8,7], [8,9,6]):
+            a = numpy.random.random([2,numpy.prod(mesh)])
+            ref = numpy.fft.fftn(a.reshape(-1,*mesh), axes=(1,2,3)).reshape(2,-1)
+            ref = ref[:,tools.rfft_mesh(mesh)]
+            for name in ('BLAS', 'NUMPY', 'SCIPY'):
+                tools.set_fft_engine(name)
+                v = tools.rfft(a, mesh)
+                self.assertAlmostEqual(abs(ref-v).max(), 0, 10)
+                self.assertAlmostEqual(abs(tools.irfft(v, mesh) - a).max(), 0, 12)
+                v = tools.rfft(a[0], mesh)
+                self.assertAlmostEqual(abs(ref[0]-v).max(), 0, 10)
+        tools.set_fft_engine(engine)
+
 
 if __name__ == '__main__':
     print("Full Tests for pbc.tools")
@@ -59,7 +59,7 @@ class KnowValues(unittest.TestCase):
         m.cphf = True
         m.gauge_orig = (1,1,1)
         msc = m.shielding()
-        self.assertAlmostEqual(finger(msc), 1562.3859473764551, 5)
+        self.assertAlmostEqual(finger(msc), 1562.3859050890146, 5)
 
     def test_nr_giao_ucpscf(self):
         m = nmr.RHF(nrhf)
@@ -73,7 +73,7 @@ class KnowValues(unittest.TestCase):
         m.cphf = True
         m.gauge_orig = None
         msc = m.shielding()
-        self.assertAlmostEqual(finger(msc), 1358.9826064972372, 5)
+        self.assertAlmostEqual(finger(msc), 1358.9826216763076, 5)
 
     def test_rmb_common_gauge_ucpscf(self):
         m = nmr.DHF(rhf)
@@ -87,7 +87,7 @@ class KnowValues(unittest.TestCase):
         m.cphf = True
         m.gauge_orig = (1,1,1)
         msc = m.shielding()
-        self.assertAlmostEqual(finger(msc), 1569.0400642905215, 4)
+        self.assertAlmostEqual(finger(msc), 1569.040413923322, 4)
 
     def test_rmb_giao_ucpscf(self):
         m = nmr.DHF(rhf)
@@ -101,7 +101,7 @@ class KnowValues(unittest.TestCase):
         m.cphf = True
         m.gauge_orig = None
         msc = m.shielding()
-        self.assertAlmostEqual(finger(msc), 1365.4679007423506, 4)
+        self.assertAlmostEqual(finger(msc), 1365.4684460689023, 4)
 
     def test_rkb_giao_cpscf(self):
         m = nmr.DHF(rhf)
@@ -109,7 +109,7 @@ class KnowValues(unittest.TestCase):
         m.cphf = True
         m.gauge_orig = None
         msc = m.shielding()
-        self.assertAlmostEqual(finger(msc), 1923.9092803444623, 4)
+        self.assertAlmostEqual(finger(msc), 1923.9098378243687, 4)
 
     def test_rkb_common_gauge_cpscf(self):
         m = nmr.DHF(rhf)
@@ -117,7 +117,7 @@ class KnowValues(unittest.TestCase):
         m.cphf = True
         m.gauge_orig = (1,1,1)
         msc = m.shielding()
-        self.assertAlmostEqual(finger(msc), 1980.1179936444073, 4)
+        self.assertAlmostEqual(finger(msc), 1980.1181101997834, 4)
 
     def test_make_h10(self):
         nao = mol.nao_nr()
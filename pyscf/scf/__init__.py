@@ -56,6 +56,9 @@ to control the SCF method.
         Direct SCF is used by default.
     direct_scf_tol : float
         Direct SCF cutoff threshold.  Default is 1e-13.
+    direct_scf_rebuild : int
+        Number of cycles between two full (non-incremental) builds of the HF
+        potential in direct SCF.  Default is 0 (incremental build only).
     callback : function
         callback function takes one dict as the argument which is
         generated by the builtin function :func:`locals`, so that the
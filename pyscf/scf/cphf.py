@@ -27,7 +27,8 @@ from pyscf.lib import logger
 
 
 def solve(fvind, mo_energy, mo_occ, h1, s1=None,
-          max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN):
+          max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN,
+          space=None):
     '''
     Args:
         fvind : function
@@ -35,19 +36,28 @@ def solve(fvind, mo_energy, mo_occ, h1, s1=None,
 
     Kwargs:
         hermi : boolean
-            Whether the matrix defined by fvind is Hermitian or not.
+            Whether the matrix defined by fvind is Hermitian or not.  It is
+            passed to :func:`lib.block_krylov`.
+        space : list
+            Krylov subspace of the previous CPHF solution (of the same fvind).
+            See also :func:`lib.block_krylov`.
+
+    The perturbations (the first dimension of h1) are solved by the block
+    Krylov solver :func:`lib.block_krylov`.  fvind should accept any number
+    of perturbations.
     '''
     if s1 is None:
         return solve_nos1(fvind, mo_energy, mo_occ, h1,
-                          max_cycle, tol, hermi, verbose)
+                          max_cycle, tol, hermi, verbose, space)
     else:
         return solve_withs1(fvind, mo_energy, mo_occ, h1, s1,
-                            max_cycle, tol, hermi, verbose)
+                            max_cycle, tol, hermi, verbose, space)
 kernel = solve
 
 # h1 shape is (:,nvir,nocc)
 def solve_nos1(fvind, mo_energy, mo_occ, h1,
-               max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN):
+               max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN,
+               space=None):
     '''For field independent basis. First order overlap matrix is zero'''
     log = logger.new_logger(verbose=verbose)
     t0 = (time.clock(), time.time())
@@ -56,19 +66,22 @@ def solve_nos1(fvind, mo_energy, mo_occ, h1,
     e_i = mo_energy[mo_occ>0]
     e_ai = 1 / lib.direct_sum('a-i->ai', e_a, e_i)
     mo1base = h1 * -e_ai
+    x_shape = _x_shape(h1)
 
     def vind_vo(mo1):
-        v = fvind(mo1.reshape(h1.shape)).reshape(h1.shape)
+        v = fvind(mo1.reshape(x_shape)).reshape((-1,)+e_ai.shape)
         v *= e_ai
-        return v.ravel()
-    mo1 = lib.krylov(vind_vo, mo1base.ravel(),
-                     tol=tol, max_cycle=max_cycle, hermi=hermi, verbose=log)
+        return v.reshape(len(v),-1)
+    mo1 = lib.block_krylov(vind_vo, mo1base.reshape(-1,e_ai.size),
+                           tol=tol, max_cycle=max_cycle, space=space,
+                           hermi=hermi, verbose=log)
     log.timer('krylov solver in CPHF', *t0)
     return mo1.reshape(h1.shape), None
 
 # h1 shape is (:,nocc+nvir,nocc)
 def solve_withs1(fvind, mo_energy, mo_occ, h1, s1,
-                 max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN):
+                 max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN,
+                 space=None):
     '''For field dependent basis. First order overlap matrix is non-zero.
     The first order orbitals are set to
     C^1_{ij} = -1/2 S1
@@ -77,6 +90,8 @@ def solve_withs1(fvind, mo_energy, mo_occ, h1, s1,
     Kwargs:
         hermi : boolean
             Whether the matrix defined by fvind is Hermitian or not.
+        space : list
+            Krylov subspace of the previous CPHF solution (of the same fvind).
 
     Returns:
         First order orbital coefficients (in MO basis) and first order orbital
@@ -100,13 +115,16 @@ def solve_withs1(fvind, mo_energy, mo_occ, h1, s1,
     mo1base[:,viridx] *= -e_ai
     mo1base[:,occidx] = -s1[:,occidx] * .5
 
+    x_shape = _x_shape(h1)
+
     def vind_vo(mo1):
-        v = fvind(mo1.reshape(h1.shape)).reshape(-1,nmo,nocc)
+        v = fvind(mo1.reshape(x_shape)).reshape(-1,nmo,nocc)
         v[:,viridx,:] *= e_ai
         v[:,occidx,:] = 0
-        return v.ravel()
-    mo1 = lib.krylov(vind_vo, mo1base.ravel(),
-                     tol=tol, max_cycle=max_cycle, hermi=hermi, verbose=log)
+        return v.reshape(len(v),-1)
+    mo1 = lib.block_krylov(vind_vo, mo1base.reshape(-1,nmo*nocc),
+                           tol=tol, max_cycle=max_cycle, space=space,
+                           hermi=hermi, verbose=log)
     mo1 = mo1.reshape(mo1base.shape)
     log.timer('krylov solver in CPHF', *t0)
 
@@ -123,6 +141,13 @@ def solve_withs1(fvind, mo_energy, mo_occ, h1, s1,
     else:
         return mo1.reshape(h1.shape), mo_e1.reshape(nocc,nocc)
 
+def _x_shape(h1):
+    '''The shape of the trial vectors passed to fvind'''
+    if h1.ndim == 3:
+        return (-1,) + h1.shape[1:]
+    else:
+        return h1.shape
+
 if __name__ == '__main__':
     numpy.random.seed(1)
     nd = 3
@@ -133,8 +158,8 @@ if __name__ == '__main__':
     a = a + a.T
     def fvind(x):
         v = numpy.dot(a,x[:,nocc:].reshape(-1,nocc*nvir).T)
-        v1 = numpy.zeros((nd,nmo,nocc))
-        v1[:,nocc:] = v.T.reshape(nd,nvir,nocc)
+        v1 = numpy.zeros((len(v.T),nmo,nocc))
+        v1[:,nocc:] = v.T.reshape(-1,nvir,nocc)
         return v1
     mo_energy = numpy.sort(numpy.random.random(nmo)) * 10
     mo_occ = numpy.zeros(nmo)
@@ -155,7 +180,7 @@ if __name__ == '__main__':
 ################
     xref = solve(fvind, mo_energy, mo_occ, h1, s1*0, max_cycle=30)[0][:,mo_occ==0]
     def fvind(x):
-        return numpy.dot(a,x.reshape(nd,nocc*nvir).T).T.reshape(nd,nvir,nocc)
+        return numpy.dot(a,x.reshape(-1,nocc*nvir).T).T.reshape(-1,nvir,nocc)
     h1 = h1[:,nocc:]
     x0 = numpy.linalg.solve(numpy.diag(1/e_ai.ravel())+a, -h1.reshape(nd,-1).T).T.reshape(nd,nvir,nocc)
     x1 = solve(fvind, mo_energy, mo_occ, h1, max_cycle=30)[0]
@@ -167,7 +167,16 @@ Keyword argument "init_dm" is replaced by "dm0"''')
         dm = mf.make_rdm1(mo_coeff, mo_occ)
         # attach mo_coeff and mo_occ to dm to improve DFT get_veff efficiency
         dm = lib.tag_array(dm, mo_coeff=mo_coeff, mo_occ=mo_occ)
-        vhf = mf.get_veff(mol, dm, dm_last, vhf)
+        if (mf.direct_scf and mf.direct_scf_rebuild > 0 and
+            (cycle+1) % mf.direct_scf_rebuild == 0):
+            # In direct SCF, get_veff builds the potential from the density
+            # difference dm-dm_last.  The integrals screened out in these
+            # incremental builds introduce errors which are accumulated in
+            # vhf.  Rebuild vhf from the full density matrix periodically.
+            logger.debug(mf, 'Rebuild HF potential from full density matrix')
+            vhf = mf.get_veff(mol, dm)
+        else:
+            vhf = mf.get_veff(mol, dm, dm_last, vhf)
         e_tot = mf.energy_tot(dm, h1e, vhf)
 
         # Here Fock matrix is h1e + vhf, without DIIS.  Calling get_fock
@@ -1249,6 +1258,10 @@ def as_scanner(mf):
     -98.552190448277955
     >>> hf_scanner(gto.M(atom='H 0 0 0; F 0 0 1.5'))
     -98.414750424294368
+
+    A batch of geometries can be computed with the method scan
+
+    >>> hf_scanner.scan(['H 0 0 0; F 0 0 %g' % r for r in (1.1, 1.3, 1.5)])
     '''
     import copy
     if isinstance(mf, lib.SinglePointScanner):
@@ -1309,8 +1322,112 @@ def as_scanner(mf):
             e_tot = self.kernel(dm0=dm0, **kwargs)
             return e_tot
 
+        def scan(self, mols_or_geoms, nproc=1, **kwargs):
+            '''Compute the energies of a batch of geometries.
+
+            The geometries are ordered by similarity (a nearest neighbour
+            chain) and each calculation is started from the density matrix of
+            the nearest geometry which has been converged.  The density
+            matrix is projected to the AO basis of the new geometry.
+
+            Kwargs:
+                nproc : int
+                    The ordered geometries are divided into nproc segments
+                    and the segments are computed in different processes.
+                dm0 : ndarray
+                    Initial guess of the first geometry.  It is not used by
+                    the other geometries.
+
+            Returns:
+                The total energies in the order of the input geometries.
+            '''
+            mols = [m if isinstance(m, gto.Mole) else
+                    self.mol.set_geom_(m, inplace=False) for m in mols_or_geoms]
+            nmols = len(mols)
+            dist = _geom_distance(mols)
+            order = _order_by_similarity(dist)
+            nproc = max(1, min(nproc, nmols))
+            seg = (nmols+nproc-1) // nproc
+
+            # The initial guess given by the caller is only used by the first
+            # geometry
+            kwargs_rest = dict(kwargs)
+            kwargs_rest.pop('dm0', None)
+
+            def scan_segment(idx):
+                e_tot = []
+                done = []
+                dms = {}
+                for i in idx:
+                    if done:
+                        j = done[numpy.argmin(dist[i,done])]
+                        if numpy.isinf(dist[i,j]):
+                            dm0 = None
+                        else:
+                            dm0 = _project_dm_geom(mols[j], dms[j], mols[i])
+                        e_tot.append(self(mols[i], **dict(kwargs_rest, dm0=dm0)))
+                    elif i == order[0]:
+                        e_tot.append(self(mols[i], **kwargs))
+                    else:
+                        e_tot.append(self(mols[i], **kwargs_rest))
+                    if not self.converged:
+                        logger.warn(self, 'SCF of scan point %d not converged', i)
+                    done.append(i)
+                    dms[i] = self.make_rdm1()
+                return e_tot
+
+            segments = [order[i0:i1] for i0, i1 in lib.prange(0, nmols, seg)]
+            if nproc == 1:
+                out = [scan_segment(idx) for idx in segments]
+            else:
+                # Processes should not write to the same chkfile
+                with lib.temporary_env(self, chkfile=None):
+                    out = lib.map_in_processes(scan_segment,
+                                               [(idx,) for idx in segments],
+                                               nproc)
+            e_tot = numpy.zeros(nmols)
+            for idx, e in zip(segments, out):
+                e_tot[idx] = e
+            return e_tot
+
     return SCF_Scanner(mf)
 
+def _geom_distance(mols):
+    '''RMS displacements between the geometries.  The distance is infinite
+    if two molecules have different atoms or basis sets.'''
+    nmols = len(mols)
+    dist = numpy.empty((nmols,nmols))
+    for i in range(nmols):
+        for j in range(i+1):
+            if (mols[i].natm == mols[j].natm and
+                mols[i].nao_nr() == mols[j].nao_nr() and
+                numpy.all(mols[i].atom_charges() == mols[j].atom_charges())):
+                dr = mols[i].atom_coords() - mols[j].atom_coords()
+                dist[i,j] = dist[j,i] = numpy.sqrt(numpy.einsum('ix,ix->', dr, dr)
+                                                   / max(1, mols[i].natm))
+            else:
+                dist[i,j] = dist[j,i] = numpy.inf
+    return dist
+
+def _order_by_similarity(dist):
+    '''A nearest neighbour chain starting from the first geometry'''
+    nmols = dist.shape[0]
+    order = [0]
+    left = list(range(1, nmols))
+    while left:
+        k = numpy.argmin(dist[order[-1],left])
+        order.append(left.pop(k))
+    return order
+
+def _project_dm_geom(mol1, dm1, mol2):
+    '''Project the density matrix of mol1 to the AO basis of mol2'''
+    from pyscf.scf import addons
+    dm1 = numpy.asarray(dm1)
+    if dm1.shape[-1] == mol2.nao_nr() and dm1.dtype == numpy.double:
+        return addons.project_dm_nr2nr(mol1, dm1, mol2)
+    else:  # GHF, DHF etc.
+        return dm1
+
 ############
 
 
@@ -1358,6 +1475,12 @@ class SCF(lib.StreamObject):
             Direct SCF is used by default.
         direct_scf_tol : float
             Direct SCF cutoff threshold.  Default is 1e-13.
+        direct_scf_rebuild : int
+            In direct SCF, the HF potential is built incrementally from the
+            change of density matrix.  The potential is rebuilt from the full
+            density matrix every direct_scf_rebuild cycles to remove the
+            errors accumulated in the incremental builds.  Default is 0 which
+            means always using the incremental build.
         callback : function(envs_dict) => None
             callback function takes one dict as the argument which is
             generated by the builtin function :func:`locals`, so that the
@@ -1410,6 +1533,7 @@ class SCF(lib.StreamObject):
     level_shift = getattr(__config__, 'scf_hf_SCF_level_shift', 0)
     direct_scf = getattr(__config__, 'scf_hf_SCF_direct_scf', True)
     direct_scf_tol = getattr(__config__, 'scf_hf_SCF_direct_scf_tol', 1e-13)
+    direct_scf_rebuild = getattr(__config__, 'scf_hf_SCF_direct_scf_rebuild', 0)
     conv_check = getattr(__config__, 'scf_hf_SCF_conv_check', True)
 
     def __init__(self, mol):
@@ -1447,7 +1571,8 @@ class SCF(lib.StreamObject):
         keys = set(('conv_tol', 'conv_tol_grad', 'max_cycle', 'init_guess',
                     'DIIS', 'diis', 'diis_space', 'diis_start_cycle',
                     'diis_file', 'diis_space_rollback', 'damp', 'level_shift',
-                    'direct_scf', 'direct_scf_tol', 'conv_check'))
+                    'direct_scf', 'direct_scf_tol', 'direct_scf_rebuild',
+                    'conv_check'))
         self._keys = set(self.__dict__.keys()).union(keys)
 
     def build(self, mol=None):
@@ -1485,6 +1610,8 @@ class SCF(lib.StreamObject):
         log.info('direct_scf = %s', self.direct_scf)
         if self.direct_scf:
             log.info('direct_scf_tol = %g', self.direct_scf_tol)
+            if self.direct_scf_rebuild > 0:
+                log.info('direct_scf_rebuild = %d', self.direct_scf_rebuild)
         if self.chkfile:
             log.info('chkfile to save SCF result = %s', self.chkfile)
         log.info('max_memory %d MB (current use %d MB)',
@@ -578,6 +578,20 @@ H     0    0.757    0.587'''
         e = mfs(mol1)
         self.assertAlmostEqual(e, -1.1163913004438035, 9)
 
+    def test_scanner_scan(self):
+        mol1 = gto.M(atom='H 0 0 0; F 0 0 1.1', basis='631g', verbose=0)
+        geoms = ['H 0 0 0; F 0 0 %g' % r for r in (1.3, 0.9, 1.1, 1.2)]
+        ref = [scf.RHF(mol1.set_geom_(g, inplace=False)).kernel() for g in geoms]
+        mf_scanner = scf.RHF(mol1).as_scanner()
+        e = mf_scanner.scan(geoms)
+        self.assertAlmostEqual(abs(e - ref).max(), 0, 9)
+        e = mf_scanner.scan(geoms, nproc=2)
+        self.assertAlmostEqual(abs(e - ref).max(), 0, 9)
+
+        dm0 = scf.RHF(mol1.set_geom_(geoms[0], inplace=False)).run().make_rdm1()
+        e = mf_scanner.scan(geoms, nproc=2, dm0=dm0)
+        self.assertAlmostEqual(abs(e - ref).max(), 0, 9)
+
     def test_natm_eq_0(self):
         mol = gto.M()
         mol.nelectron = 2
@@ -723,6 +737,16 @@ H     0    0.757    0.587'''
         self.assertAlmostEqual(abs(vk1 - vk2).max(), 0, 12)
         self.assertAlmostEqual(lib.finger(vk1), -12.365527167710301, 12)
 
+    def test_direct_scf_rebuild(self):
+        mf1 = scf.RHF(mol)
+        mf1.max_memory = 0
+        mf1.direct_scf_rebuild = 3
+        mf1.conv_tol = 1e-10
+        self.assertAlmostEqual(mf1.kernel(), mf.e_tot, 9)
+
+        mf1 = scf.UHF(mol).set(max_memory=0, direct_scf_rebuild=2)
+        self.assertAlmostEqual(mf1.kernel(), mf.e_tot, 8)
+
     def test_get_vj_lr(self):
         numpy.random.seed(1)
         nao = mol.nao
@@ -136,6 +136,16 @@ def sgx_fit(mf, auxbasis=None, with_df=None):
             self._in_scf = False
             self._last_dm = 0
 
+        def gen_response(self, *args, **kwargs):
+            '''Response functions (CPHF, TDDFT) on the grids of level
+            with_df.grids_level_r (with_df.grids_level_f by default)'''
+            if not self.with_df:
+                return mf_class.gen_response(self, *args, **kwargs)
+            mf = copy.copy(self)
+            mf.with_df = self.with_df.response_object()
+            mf._in_scf = False
+            return mf_class.gen_response(mf, *args, **kwargs)
+
         def nuc_grad_method(self):
             raise NotImplementedError
 
@@ -182,6 +192,12 @@ class SGX(lib.StreamObject):
         self.grids_level_i = 0  # initial grids level
         self.grids_level_f = 1  # final grids level
         self.grids_switch_thrd = 0.03
+        # grids level for response functions. If not specified, the final
+        # grids level is used
+        self.grids_level_r = None
+        # P-junction screening. Shells of which the density contracted
+        # Fg = X_g D are below grids_thrd are skipped in the K matrix
+        self.pjs = False
         # compute J matrix using DF and K matrix using SGX. It's identical to
         # the RIJCOSX method in ORCA
         self.dfj = False
@@ -199,6 +215,7 @@ class SGX(lib.StreamObject):
         self._opt = None
         self._last_dm = 0
         self._rsh_df = {}  # Range separated Coulomb DF objects
+        self._response_df = None
         self._keys = set(self.__dict__.keys())
 
     @property
@@ -218,7 +235,9 @@ class SGX(lib.StreamObject):
         log.info('grids_level_f = %s', self.grids_level_f)
         log.info('grids_thrd = %s', self.grids_thrd)
         log.info('grids_switch_thrd = %s', self.grids_switch_thrd)
-        log.info('df_j = %s', self.df_j)
+        log.info('grids_level_r = %s', self.grids_level_r)
+        log.info('pjs = %s', self.pjs)
+        log.info('dfj = %s', self.dfj)
         log.info('auxbasis = %s', self.auxbasis)
         return self
 
@@ -233,6 +252,7 @@ class SGX(lib.StreamObject):
             level = self.grids_level_f
         self.grids = sgx_jk.get_gridss(self.mol, level, self.grids_thrd)
         self._opt = _make_opt(self.mol)
+        self._response_df = None
 
         # In the RSH-integral temporary treatment, recursively rebuild SGX
         # objects in _rsh_df.
@@ -254,8 +274,26 @@ class SGX(lib.StreamObject):
         self._opt = None
         self._last_dm = 0
         self._rsh_df = {}
+        self._response_df = None
         return self
 
+    def response_object(self):
+        '''An SGX object on the grids of level grids_level_r (grids_level_f
+        by default) for the response functions.  Multiple and non-Hermitian
+        density matrices are supported by get_jk.'''
+        rdf = self._response_df
+        if rdf is None:
+            rdf = copy.copy(self)
+            rdf._rsh_df = {}
+            rdf._response_df = None
+            rdf._vjopt = None
+            level = self.grids_level_r
+            if level is None:
+                level = self.grids_level_f
+            rdf.build(level)
+            self._response_df = rdf
+        return rdf
+
     def get_jk(self, dm, hermi=1, with_j=True, with_k=True,
                direct_scf_tol=getattr(__config__, 'scf_hf_SCF_direct_scf_tol', 1e-13),
                omega=None):
@@ -38,11 +38,14 @@ grdlvl_f = 1
 thrd_nddm = 0.03
 # set block size to adapt memory 
 sblk = 200
+# P-junction screening (shells of Fg below gthrd are skipped in K)
+pjs = False
 
 Set mf.direct_scf = False because no traditional 2e integrals
 '''
 
 import time
+import copy
 import ctypes
 import numpy
 import scipy.linalg
@@ -157,11 +160,19 @@ def get_jk_favorj(sgx, dm, hermi=1, with_j=True, with_k=True,
     dms = dms.reshape(-1,nao,nao)
     nset = dms.shape[0]
 
+    # P-junction screening: shells of negligible Fg are excluded from the
+    # contraction of the K matrix
+    pjs = getattr(sgx, 'pjs', False) and with_k
     if sgx.debug:
         batch_nuc = _gen_batch_nuc(mol)
+    elif pjs:
+        batch_jk = _gen_jk_direct(mol, 's2', with_j, False, direct_scf_tol,
+                                  sgx._opt)
+        batch_k = _gen_k_direct(mol, direct_scf_tol, sgx._opt)
     else:
         batch_jk = _gen_jk_direct(mol, 's2', with_j, with_k, direct_scf_tol,
                                   sgx._opt)
+    ao_loc = mol.ao_loc_nr()
 
     sn = numpy.zeros((nao,nao))
     ngrids = grids.coords.shape[0]
@@ -194,7 +205,8 @@ def get_jk_favorj(sgx, dm, hermi=1, with_j=True, with_k=True,
             mask |= numpy.any(fg[i]<-gthrd, axis=1)
         if not numpy.all(mask):
             ao = ao[mask]
-            fg = fg[:,mask]
+            # fg[:,mask] is not C-contiguous for multiple density matrices
+            fg = numpy.ascontiguousarray(fg[:,mask])
             coords = coords[mask]
 
         if with_j:
@@ -202,18 +214,29 @@ def get_jk_favorj(sgx, dm, hermi=1, with_j=True, with_k=True,
         else:
             rhog = None
 
+        if pjs:
+            fmax = numpy.max(abs(fg).reshape(-1,nao), axis=0)
+            fmax = numpy.maximum.reduceat(fmax, ao_loc[:-1])
+            shls_k = numpy.where(fmax > gthrd)[0]
+
         if sgx.debug:
             tnuc = tnuc[0] - time.clock(), tnuc[1] - time.time()
             gbn = batch_nuc(mol, coords)
             tnuc = tnuc[0] + time.clock(), tnuc[1] + time.time()
             if with_j:
                 jpart = numpy.einsum('guv,xg->xuv', gbn, rhog)
-            if with_k:
+            if pjs:
+                ao_k = numpy.hstack([numpy.arange(ao_loc[i], ao_loc[i+1])
+                                     for i in shls_k] + [[]]).astype(int)
+                gv = lib.einsum('gtv,xgt->xgv', gbn[:,ao_k], fg[:,:,ao_k])
+            elif with_k:
                 gv = lib.einsum('gtv,xgt->xgv', gbn, fg)
             gbn = None
         else:
             tnuc = tnuc[0] - time.clock(), tnuc[1] - time.time()
             jpart, gv = batch_jk(mol, coords, rhog, fg)
+            if pjs:
+                gv = batch_k(mol, coords, fg, shls_k)
             tnuc = tnuc[0] + time.clock(), tnuc[1] + time.time()
 
         if with_j:
@@ -311,6 +334,64 @@ def _gen_jk_direct(mol, aosym, with_j, with_k, direct_scf_tol, sgxopt=None):
     return jk_part
 
 
+def _gen_k_direct(mol, direct_scf_tol, sgxopt=None):
+    '''Contraction between sgX Coulomb integrals and the P-junction screened
+    Fg.  Only the shells shls_k of Fg are included in the contraction
+    K: einsum('gtv,xgt->xgv', gbn[:,shls_k], fg[:,:,shls_k])
+    '''
+    if sgxopt is None:
+        from pyscf.sgx import sgx
+        sgxopt = sgx._make_opt(mol)
+    sgxopt.direct_scf_tol = direct_scf_tol
+
+    ncomp = 1
+    nao = mol.nao
+    nbas = mol.nbas
+    cintor = _vhf._fpointer(sgxopt._intor)
+    fdot = _vhf._fpointer('SGXdot_nrs1')
+    drv = _vhf.libcvhf.SGXnr_direct_drv
+
+    def k_part(mol, grid_coords, fg, shls_k):
+        ngrids = grid_coords.shape[0]
+        n_dm = len(fg)
+        vk = numpy.zeros((n_dm,ncomp,ngrids,nao))[:,0]
+        if len(shls_k) == 0:
+            return vk
+
+        fakemol = gto.fakemol_for_charges(grid_coords)
+        atm, bas, env = gto.mole.conc_env(mol._atm, mol._bas, mol._env,
+                                          fakemol._atm, fakemol._bas, fakemol._env)
+        ao_loc = moleintor.make_loc(bas, sgxopt._intor)
+        fjk = (ctypes.c_void_p*(n_dm))(
+            *[_vhf._fpointer('SGXnrs1_ijg_gj_gi')] * n_dm)
+
+        # Each contiguous range of shls_k is one shell slice of the
+        # integral driver. The shell indices are those of mol, so the
+        # screening conditions in sgxopt are reused for all grid batches.
+        shls_k = numpy.asarray(shls_k)
+        seg = numpy.where(numpy.diff(shls_k) != 1)[0] + 1
+        for shls in numpy.split(shls_k, seg):
+            sh0, sh1 = shls[0], shls[-1] + 1
+            p0, p1 = ao_loc[sh0], ao_loc[sh1]
+            fg_seg = numpy.asarray(fg[:,:,p0:p1], order='C')
+            vk_seg = numpy.empty_like(vk)
+            shls_slice = (0, nbas, sh0, sh1, nbas, len(bas))
+            dmsptr = (ctypes.c_void_p*(n_dm))(
+                *[dm.ctypes.data_as(ctypes.c_void_p) for dm in fg_seg])
+            vjkptr = (ctypes.c_void_p*(n_dm))(
+                *[v.ctypes.data_as(ctypes.c_void_p) for v in vk_seg])
+            drv(cintor, fdot, fjk, dmsptr, vjkptr, n_dm, ncomp,
+                (ctypes.c_int*6)(*shls_slice),
+                ao_loc.ctypes.data_as(ctypes.c_void_p),
+                sgxopt._cintopt, sgxopt._this,
+                atm.ctypes.data_as(ctypes.c_void_p), ctypes.c_int(mol.natm),
+                bas.ctypes.data_as(ctypes.c_void_p), ctypes.c_int(mol.nbas),
+                env.ctypes.data_as(ctypes.c_void_p))
+            vk += vk_seg
+        return vk
+    return k_part
+
+
 # pre for get_k
 # Use default mesh grids and weights
 def get_gridss(mol, level=1, gthrd=1e-10):
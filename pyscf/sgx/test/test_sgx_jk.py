@@ -20,6 +20,7 @@ import numpy
 from pyscf import gto
 from pyscf import lib
 from pyscf import scf
+from pyscf import tdscf
 from pyscf.sgx import sgx
 from pyscf.sgx import sgx_jk
 
@@ -98,6 +99,60 @@ class KnownValues(unittest.TestCase):
         self.assertAlmostEqual(abs(vj-vj1).max(), 0, 2)
         self.assertAlmostEqual(abs(vk-vk1).max(), 0, 2)
 
+    def test_pjs(self):
+        mol = gto.M(verbose = 0,
+            atom = [["O" , (0. , 0.     , 0.)],
+                    [1   , (0. , -0.757 , 0.587)],
+                    [1   , (0. , 0.757  , 0.587)] ],
+            basis = 'ccpvdz',
+        )
+        nao = mol.nao
+        numpy.random.seed(1)
+        dm = numpy.random.random((3,nao,nao)) - .5
+        dm[2] = dm[2] - dm[2].T
+        sgxobj = sgx.SGX(mol)
+        sgxobj.grids = sgx_jk.get_gridss(mol, 0, 1e-10)
+        vj, vk = sgx_jk.get_jk_favorj(sgxobj, dm, hermi=0)
+        with lib.temporary_env(sgxobj, pjs=True):
+            vj1, vk1 = sgx_jk.get_jk_favorj(sgxobj, dm, hermi=0)
+        self.assertAlmostEqual(abs(vj1-vj).max(), 0, 9)
+        self.assertAlmostEqual(abs(vk1-vk).max(), 0, 9)
+        with lib.temporary_env(sgxobj, pjs=True, debug=True):
+            vj1, vk1 = sgx_jk.get_jk_favorj(sgxobj, dm, hermi=0)
+        self.assertAlmostEqual(abs(vj1-vj).max(), 0, 9)
+        self.assertAlmostEqual(abs(vk1-vk).max(), 0, 9)
+
+    def test_nonhermi_dms(self):
+        mol = gto.M(verbose = 0,
+            atom = [["O" , (0. , 0.     , 0.)],
+                    [1   , (0. , -0.757 , 0.587)],
+                    [1   , (0. , 0.757  , 0.587)] ],
+            basis = 'ccpvdz',
+        )
+        nao = mol.nao
+        numpy.random.seed(1)
+        dm = numpy.random.random((2,nao,nao)) * .01
+        sgxobj = sgx.SGX(mol)
+        sgxobj.build(2)
+        vj, vk = sgxobj.get_jk(dm, hermi=0)
+        vj1, vk1 = scf.hf.get_jk(mol, dm, hermi=0)
+        self.assertAlmostEqual(abs(vj1-vj).max(), 0, 5)
+        self.assertAlmostEqual(abs(vk1-vk).max(), 0, 5)
+
+    def test_tda_response(self):
+        mol = gto.M(verbose = 0,
+            atom = [["O" , (0. , 0.     , 0.)],
+                    [1   , (0. , -0.757 , 0.587)],
+                    [1   , (0. , 0.757  , 0.587)] ],
+            basis = 'ccpvdz',
+        )
+        mf = scf.RHF(mol).run()
+        e0 = tdscf.TDA(mf).kernel(nstates=3)[0]
+        mf1 = sgx.sgx_fit(mf)
+        mf1.with_df.pjs = True
+        e1 = tdscf.TDA(mf1).kernel(nstates=3)[0]
+        self.assertAlmostEqual(abs(e1 - e0).max(), 0, 3)
+
 
 if __name__ == "__main__":
     print("Full Tests for sgx_jk")
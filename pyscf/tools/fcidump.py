@@ -19,11 +19,15 @@ FCIDUMP functions (write, read) for real Hamiltonian
 
 from functools import reduce
 import numpy
+import h5py
+from pyscf import lib
 from pyscf import ao2mo
 from pyscf import __config__
 
 DEFAULT_FLOAT_FORMAT = getattr(__config__, 'fcidump_float_format', ' %.16g')
 TOL = getattr(__config__, 'fcidump_write_tol', 1e-15)
+# Number of integrals to format or parse in one batch
+BLOCK_SIZE = getattr(__config__, 'fcidump_block_size', 1000000)
 
 def write_head(fout, nmo, nelec, ms=0, orbsym=None):
     if not isinstance(nelec, (int, numpy.number)):
@@ -44,41 +48,58 @@ def write_eri(fout, eri, nmo, tol=TOL, float_format=DEFAULT_FLOAT_FORMAT):
     if eri.size == nmo**4:
         eri = ao2mo.restore(8, eri, nmo)
 
+    # orbital indices (1-based) of the compound index ij (i >= j)
+    idx, idy = numpy.tril_indices(nmo)
+    idx += 1
+    idy += 1
     if eri.ndim == 2: # 4-fold symmetry
         assert(eri.size == npair**2)
-        ij = 0
-        for i in range(nmo):
-            for j in range(0, i+1):
-                kl = 0
-                for k in range(0, nmo):
-                    for l in range(0, k+1):
-                        if abs(eri[ij,kl]) > tol:
-                            fout.write(output_format % (eri[ij,kl], i+1, j+1, k+1, l+1))
-                        kl += 1
-                ij += 1
+        blksize = max(1, BLOCK_SIZE // npair)
+        for ij0, ij1 in lib.prange(0, npair, blksize):
+            ij = numpy.repeat(numpy.arange(ij0, ij1), npair)
+            kl = numpy.tile(numpy.arange(npair), ij1-ij0)
+            _write_block(fout, output_format, eri[ij0:ij1].ravel(),
+                         idx[ij], idy[ij], idx[kl], idy[kl], tol)
     else:  # 8-fold symmetry
         assert(eri.size == npair*(npair+1)//2)
-        ij = 0
-        ijkl = 0
-        for i in range(nmo):
-            for j in range(0, i+1):
-                kl = 0
-                for k in range(0, i+1):
-                    for l in range(0, k+1):
-                        if ij >= kl:
-                            if abs(eri[ijkl]) > tol:
-                                fout.write(output_format % (eri[ijkl], i+1, j+1, k+1, l+1))
-                            ijkl += 1
-                        kl += 1
-                ij += 1
+        # Row ij of the 8-fold symmetric eri has ij+1 elements. Each block
+        # holds as many rows as possible within BLOCK_SIZE integrals.
+        offsets = numpy.arange(npair+1)
+        offsets = offsets * (offsets+1) // 2
+        ij0 = 0
+        while ij0 < npair:
+            p0 = offsets[ij0]
+            ij1 = numpy.searchsorted(offsets, p0+BLOCK_SIZE, side='right') - 1
+            ij1 = min(npair, max(ij0+1, ij1))
+            p1 = offsets[ij1]
+            ij = numpy.repeat(numpy.arange(ij0, ij1), numpy.arange(ij0+1, ij1+1))
+            kl = numpy.arange(p0, p1) - offsets[ij]
+            _write_block(fout, output_format, eri[p0:p1],
+                         idx[ij], idy[ij], idx[kl], idy[kl], tol)
+            ij0 = ij1
 
 def write_hcore(fout, h, nmo, tol=TOL, float_format=DEFAULT_FLOAT_FORMAT):
     h = h.reshape(nmo,nmo)
     output_format = float_format + ' %4d %4d  0  0\n'
-    for i in range(nmo):
-        for j in range(0, i+1):
-            if abs(h[i,j]) > tol:
-                fout.write(output_format % (h[i,j], i+1, j+1))
+    idx, idy = numpy.tril_indices(nmo)
+    h = h[idx,idy]
+    mask = abs(h) > tol
+    dat = numpy.empty((numpy.count_nonzero(mask),3))
+    dat[:,0] = h[mask]
+    dat[:,1] = idx[mask] + 1
+    dat[:,2] = idy[mask] + 1
+    fout.write((output_format * len(dat)) % tuple(dat.ravel().tolist()))
+
+def _write_block(fout, output_format, val, i, j, k, l, tol):
+    '''Format all integrals (larger than tol) of a block in one write call'''
+    mask = abs(val) > tol
+    dat = numpy.empty((numpy.count_nonzero(mask),5))
+    dat[:,0] = val[mask]
+    dat[:,1] = i[mask]
+    dat[:,2] = j[mask]
+    dat[:,3] = k[mask]
+    dat[:,4] = l[mask]
+    fout.write((output_format * len(dat)) % tuple(dat.ravel().tolist()))
 
 
 def from_chkfile(filename, chkfile, tol=TOL, float_format=DEFAULT_FLOAT_FORMAT):
@@ -161,11 +182,43 @@ def from_scf(mf, filename, tol=TOL, float_format=DEFAULT_FLOAT_FORMAT):
     from_integrals(filename, h1e, eri, h1e.shape[0], mf.mol.nelec, nuc, 0, orbsym,
                    tol, float_format)
 
+def write_h5(filename, h1e, h2e, nmo, nelec, nuc=0, ms=0, orbsym=None):
+    '''Save the integrals in the binary (HDF5) variant of FCIDUMP. The file
+    can be parsed by the function :func:`read`.  h2e is stored with 8-fold
+    permutation symmetry.
+    '''
+    if not isinstance(nelec, (int, numpy.number)):
+        ms = abs(nelec[0] - nelec[1])
+        nelec = nelec[0] + nelec[1]
+    if orbsym is None or len(orbsym) == 0:
+        orbsym = [1] * nmo
+    with h5py.File(filename, 'w') as f:
+        f['NORB'] = nmo
+        f['NELEC'] = nelec
+        f['MS2'] = ms
+        f['ISYM'] = 1
+        f['ORBSYM'] = numpy.asarray(orbsym, dtype=int)
+        f['ECORE'] = nuc
+        f['H1'] = numpy.asarray(h1e).reshape(nmo,nmo)
+        f['H2'] = ao2mo.restore(8, h2e, nmo)
+
 def read(filename):
     '''Parse FCIDUMP.  Return a dictionary to hold the integrals and
     parameters with keys:  H1, H2, ECORE, NORB, NELEC, MS, ORBSYM, ISYM
+
+    The binary FCIDUMP generated by :func:`write_h5` is recognized
+    automatically.
     '''
     import re
+    if h5py.is_hdf5(filename):
+        with h5py.File(filename, 'r') as f:
+            dic = dict((k, f[k][()]) for k in f)
+        for k in ('NORB', 'NELEC', 'MS2', 'ISYM'):
+            dic[k] = int(dic[k])
+        dic['ECORE'] = float(dic['ECORE'])
+        dic['ORBSYM'] = dic['ORBSYM'].tolist()
+        return dic
+
     dic = {}
     print('Parsing %s' % filename)
     finp = open(filename, 'r')
@@ -192,28 +245,43 @@ def read(filename):
     norb_pair = norb * (norb+1) // 2
     h1e = numpy.zeros((norb,norb))
     h2e = numpy.zeros(norb_pair*(norb_pair+1)//2)
-    dat = finp.readline().split()
-    while dat:
-        i, j, k, l = [int(x) for x in dat[1:5]]
-        if k != 0:
-            if i >= j:
-                ij = i * (i-1) // 2 + j-1
-            else:
-                ij = j * (j-1) // 2 + i-1
-            if k >= l:
-                kl = k * (k-1) // 2 + l-1
-            else:
-                kl = l * (l-1) // 2 + k-1
-            if ij >= kl:
-                h2e[ij*(ij+1)//2+kl] = float(dat[0])
-            else:
-                h2e[kl*(kl+1)//2+ij] = float(dat[0])
-        elif k == 0:
-            if j != 0:
-                h1e[i-1,j-1] = float(dat[0])
-            else:
-                dic['ECORE'] = float(dat[0])
-        dat = finp.readline().split()
+    # Parse the integrals in batches of lines. Data end at the first blank
+    # line. Tokens after the 4th orbital index are ignored.
+    finished = False
+    while not finished:
+        lines = finp.readlines(BLOCK_SIZE * 40)
+        if not lines:
+            break
+        dat = []
+        for line in lines:
+            tokens = line.split()
+            if not tokens:
+                finished = True
+                break
+            elif len(tokens) < 5:
+                raise ValueError('Invalid FCIDUMP line: %s' % line.strip())
+            dat.append(tokens[:5])
+        if not dat:
+            break
+        dat = numpy.array(dat, dtype=float)
+        val = dat[:,0]
+        i, j, k, l = dat[:,1:].astype(int).T
+
+        mask = k != 0
+        ij = numpy.maximum(i[mask], j[mask])
+        ij = ij * (ij-1) // 2 + numpy.minimum(i[mask], j[mask]) - 1
+        kl = numpy.maximum(k[mask], l[mask])
+        kl = kl * (kl-1) // 2 + numpy.minimum(k[mask], l[mask]) - 1
+        ijkl = numpy.maximum(ij, kl)
+        ijkl = ijkl * (ijkl+1) // 2 + numpy.minimum(ij, kl)
+        h2e[ijkl] = val[mask]
+
+        mask = (k == 0) & (j != 0)
+        h1e[i[mask]-1,j[mask]-1] = val[mask]
+
+        mask = (k == 0) & (j == 0)
+        if numpy.any(mask):
+            dic['ECORE'] = val[mask][-1]
 
     idx, idy = numpy.tril_indices(norb, -1)
     if numpy.linalg.norm(h1e[idy,idx]) == 0:
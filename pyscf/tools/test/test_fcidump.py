@@ -52,6 +52,44 @@ class KnownValues(unittest.TestCase):
         fcidump.from_integrals(tmpfcidump.name, h1, h2, h1.shape[0],
                                mol.nelectron, tol=1e-15)
 
+    def test_read(self):
+        tmpfcidump = tempfile.NamedTemporaryFile(dir=lib.param.TMPDIR)
+        h1 = reduce(numpy.dot, (mf.mo_coeff.T, mf.get_hcore(), mf.mo_coeff))
+        h2 = ao2mo.full(mf._eri, mf.mo_coeff)
+        nmo = h1.shape[0]
+        fcidump.from_integrals(tmpfcidump.name, h1, h2, nmo, mol.nelectron,
+                               nuc=mf.energy_nuc(), tol=1e-15)
+        result = fcidump.read(tmpfcidump.name)
+        self.assertEqual(result['NORB'], nmo)
+        self.assertAlmostEqual(result['ECORE'], mf.energy_nuc(), 12)
+        self.assertAlmostEqual(abs(result['H1'] - h1).max(), 0, 12)
+        self.assertAlmostEqual(abs(result['H2'] - ao2mo.restore(8, h2, nmo)).max(), 0, 12)
+
+        fcidump.write_h5(tmpfcidump.name, h1, h2, nmo, mol.nelectron, mf.energy_nuc())
+        result1 = fcidump.read(tmpfcidump.name)
+        self.assertEqual(result1['NORB'], nmo)
+        self.assertEqual(result1['ORBSYM'], result['ORBSYM'])
+        self.assertAlmostEqual(result1['ECORE'], mf.energy_nuc(), 12)
+        self.assertAlmostEqual(abs(result1['H1'] - h1).max(), 0, 12)
+        self.assertAlmostEqual(abs(result1['H2'] - result['H2']).max(), 0, 12)
+
+    def test_read_blocks(self):
+        tmpfcidump = tempfile.NamedTemporaryFile(dir=lib.param.TMPDIR)
+        h1 = reduce(numpy.dot, (mf.mo_coeff.T, mf.get_hcore(), mf.mo_coeff))
+        h2 = ao2mo.restore(8, ao2mo.full(mf._eri, mf.mo_coeff), h1.shape[0])
+        nmo = h1.shape[0]
+        with lib.temporary_env(fcidump, BLOCK_SIZE=7):
+            fcidump.from_integrals(tmpfcidump.name, h1, h2, nmo, mol.nelectron,
+                                   nuc=mf.energy_nuc(), tol=1e-15)
+            result = fcidump.read(tmpfcidump.name)
+        self.assertAlmostEqual(result['ECORE'], mf.energy_nuc(), 12)
+        self.assertAlmostEqual(abs(result['H1'] - h1).max(), 0, 12)
+        self.assertAlmostEqual(abs(result['H2'] - h2).max(), 0, 12)
+
+        with open(tmpfcidump.name, 'a') as f:
+            f.write(' 0.5  1  1\n')
+        self.assertRaises(ValueError, fcidump.read, tmpfcidump.name)
+
 if __name__ == "__main__":
     print("Full Tests for fcidump")
     unittest.main()